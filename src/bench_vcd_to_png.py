@@ -0,0 +1,193 @@
+# bench_vcd_to_png.py — scaling benchmark of the vcd_to_png pipeline on synthetic captures
+# For each transaction count a capture is generated (gen_swd_vcd), then a fresh child
+# process runs the pipeline stage by stage — parse, cycle build, alignment, decode, lane
+# derivation, render — and reports wall time per stage, throughput and peak RSS. One
+# child per size keeps the RSS figures independent of earlier (smaller) runs.
+
+from contextlib import redirect_stdout
+from pathlib import Path
+import argparse
+import io
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, RSS is reported as '-'
+    resource = None
+
+HERE = Path(__file__).resolve().parent
+STAGES = ("parse", "cycles", "align", "decode", "lanes", "render")
+DEFAULT_SIZES = (100, 1000, 10000, 100000)
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1 << 20) if sys.platform == "darwin" else rss / 1024  # bytes on macOS, KiB elsewhere
+
+# ===== Child: one capture, timed stage by stage =====
+def run_stages(vcd_path: Path, outdir: Path, render_frames=2, render=True):
+    from swd_capture import SIGNAL_ROLES, build_lanes, rise_edges, select_signals
+    from swd_decode import CycleSamples, FrameTable, align_frames, frame_scores, sck_cycle_arrays
+    from vcd_signal import Signal
+    from vcd_stream import VcdReader
+    import vcd_to_png as v2p
+
+    rec = dict(stages={}, rss_mb={})
+    clock = [time.perf_counter()]
+
+    def lap(stage):
+        now = time.perf_counter()
+        rec["stages"][stage] = now - clock[0]
+        rec["rss_mb"][stage] = peak_rss_mb()
+        clock[0] = now
+
+    with VcdReader(vcd_path) as rd:
+        sel = select_signals(rd.names, {})
+        by_name = rd.read_signals(sel.values())
+    sigs = {role: by_name.get(sel[role]) or Signal(name=sel[role]) for role, _ in SIGNAL_ROLES}
+    lap("parse")
+
+    pos, neg = sck_cycle_arrays(sigs["sck"])
+    lap("cycles")
+
+    tv_tb_en = sigs["tb_en"]
+    cs = CycleSamples((pos, neg), sigs["mosi"], sigs["swdio"], rnw=sigs["rnw"], rst_n=sigs["rst_n"],
+                      tb_en=tv_tb_en, tb_val=(sigs["tb_val"] if tv_tb_en else None))
+    scores, _ = frame_scores(cs)
+    starts = align_frames(cs, scores, rise_edges(sigs["rst_n"]))
+    lap("align")
+
+    frames = FrameTable(cs, starts, scores)
+    lap("decode")
+
+    if render:
+        cycles = list(zip(pos.tolist(), neg.tolist()))
+        lanes = build_lanes((pos, neg), sigs["sck"], sigs["rst_n"], sigs["rnw"], sigs["mosi"],
+                                sigs["swdio"], sigs["tb_en"], sigs["tb_val"])
+        lap("lanes")
+        with redirect_stdout(io.StringIO()):
+            v2p.plot_raw(vcd_path, outdir / "raw", lanes)
+            for i in range(min(render_frames, len(frames))):
+                start_idx, rnw, summary = v2p.frame_job(frames, i)
+                v2p.plot_frame(vcd_path, outdir / "frames", lanes, cycles, start_idx, rnw, summary, idx=i)
+        lap("render")
+
+    rec.update(cycles=int(pos.size), frames=len(frames),
+               changes=int(sum(len(s) for s in sigs.values())), peak_rss_mb=peak_rss_mb())
+    return rec
+
+def child_main(argv):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("vcd")
+    ap.add_argument("outdir")
+    ap.add_argument("--frames", type=int, default=2)
+    ap.add_argument("--no-render", dest="no_render", action="store_true")
+    a = ap.parse_args(argv)
+    rec = run_stages(Path(a.vcd), Path(a.outdir), a.frames, render=not a.no_render)
+    print(json.dumps(rec))
+
+# ===== Parent: generate, run children, report =====
+def bench_size(n, workdir: Path, args):
+    from gen_swd_vcd import generate
+
+    vcd = workdir / f"bench_{n}.vcd"
+    t0 = time.perf_counter()
+    gen = generate(vcd, n, seed=args.seed, read_ratio=0.5, wait_rate=args.wait,
+                   fault_rate=args.fault, parity_err_rate=args.parity_err)
+    t_gen = time.perf_counter() - t0
+
+    cmd = [sys.executable, str(Path(__file__).resolve()), "--child", str(vcd), str(workdir / f"png_{n}"),
+           "--frames", str(args.frames)]
+    if args.no_render:
+        cmd.append("--no-render")
+    t0 = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=str(HERE), capture_output=True, text=True)
+    t_run = time.perf_counter() - t0
+    if proc.returncode != 0:
+        raise RuntimeError(f"benchmark child failed for n={n}:\n{proc.stderr}")
+    rec = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    total = sum(rec["stages"].values())
+    rec.update(transactions=n, vcd_mb=gen["bytes"] / 1e6, gen_s=t_gen, process_s=t_run, total_s=total,
+               tx_per_s=n / total if total else None,
+               parse_mb_per_s=gen["bytes"] / 1e6 / rec["stages"]["parse"] if rec["stages"]["parse"] else None,
+               expected_frames=gen["ok"] + gen["wait"] + gen["fault"])
+    if not args.keep:
+        vcd.unlink()
+    return rec
+
+def fmt_row(cells, widths):
+    return "  ".join(str(c).rjust(w) for c, w in zip(cells, widths))
+
+def print_table(records, stages):
+    head = ["tx", "MB"] + [f"{s}[s]" for s in stages] + ["total[s]", "tx/s", "MB/s", "frames", "RSS[MB]"]
+    widths = [max(9, len(h)) for h in head]
+    print(fmt_row(head, widths))
+    for r in records:
+        rss = r["peak_rss_mb"]
+        cells = [r["transactions"], f"{r['vcd_mb']:.1f}"]
+        cells += [f"{r['stages'][s]:.3f}" if s in r["stages"] else "-" for s in stages]
+        cells += [f"{r['total_s']:.3f}", f"{r['tx_per_s']:.0f}", f"{r['parse_mb_per_s']:.1f}",
+                  f"{r['frames']}/{r['expected_frames']}", "-" if rss is None else f"{rss:.0f}"]
+        print(fmt_row(cells, widths))
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        return child_main(sys.argv[2:])
+
+    ap = argparse.ArgumentParser(description="Time the vcd_to_png stages on synthetic captures of growing size.")
+    ap.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                    help="transaction counts (10^6 writes a ~2.5 GB VCD)")
+    ap.add_argument("--frames", type=int, default=2, help="frame PNGs rendered per size")
+    ap.add_argument("--no-render", dest="no_render", action="store_true", help="stop after decode")
+    ap.add_argument("--wait", type=float, default=0.05, help="WAIT ACK rate of the generated traffic")
+    ap.add_argument("--fault", type=float, default=0.01, help="FAULT ACK rate of the generated traffic")
+    ap.add_argument("--parity-err", dest="parity_err", type=float, default=0.01)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--workdir", default="", help="where VCDs/PNGs go (default: a temp dir, removed afterwards)")
+    ap.add_argument("--keep", action="store_true", help="keep the generated VCDs")
+    ap.add_argument("--json", default="", help="write all results to this JSON file")
+    args = ap.parse_args()
+
+    tmp = None
+    if args.workdir:
+        workdir = Path(args.workdir)
+        workdir.mkdir(parents=True, exist_ok=True)
+    else:
+        tmp = workdir = Path(tempfile.mkdtemp(prefix="bench_vcd_to_png_"))
+
+    stages = STAGES[:4] if args.no_render else STAGES
+    records = []
+    try:
+        for n in args.sizes:
+            print(f"[INFO] n={n}: generating + running ...", flush=True)
+            rec = bench_size(n, workdir, args)
+            records.append(rec)
+            if rec["frames"] != rec["expected_frames"]:
+                print(f"[WARN] n={n}: decoded {rec['frames']} frame(s), generated {rec['expected_frames']}")
+    finally:
+        if tmp is not None and not args.keep:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    print()
+    print_table(records, stages)
+
+    if args.json:
+        env = dict(python=platform.python_version(), platform=platform.platform(), machine=platform.machine())
+        try:
+            import numpy
+            env["numpy"] = numpy.__version__
+        except ImportError:
+            pass
+        Path(args.json).write_text(json.dumps(dict(env=env, results=records), indent=2))
+        print(f"[OK] {args.json}")
+
+if __name__ == "__main__":
+    main()
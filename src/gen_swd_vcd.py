@@ -0,0 +1,231 @@
+# gen_swd_vcd.py — synthetic SWD capture generator (same hierarchy/net names as the testbenches)
+# Writes a VCD of N back-to-back 48-bit probe frames as testbench_read/write would dump
+# them: arm (rst_n low for one cycle), REQ, TURN1, ACK, DATA/PARITY, then idle cycles.
+# Transaction mix, WAIT/FAULT/invalid ACKs, parity errors and idle gaps are configurable.
+# SWDIO/MISO/SWCLK follow the frontend's drive rules, so the decoder sees what a real
+# simulation would produce. Rows are built and formatted per chunk with NumPy, which
+# keeps 10^5..10^6 transactions practical for benchmarking.
+
+from pathlib import Path
+import argparse
+
+import numpy as np
+
+from swd_decode import ACK_FAULT, ACK_OK, ACK_WAIT, FRAME_BITS
+from vcd_signal import V_0, V_1, V_X, V_Z, VAL_CHARS
+
+HALF_PERIOD = 1000  # ps; testbench: `timescale 1ns/1ps, always #1 sck = ~sck
+PREAMBLE_CYCLES = 4
+CHUNK_TX = 4096
+
+# ===== Nets (dump order, VCD id codes) =====
+# top-level testbench regs/wires; the dut scope aliases the port nets to the same codes
+NETS = ("sck", "mosi", "miso", "rst_n", "rnw", "swclk", "swdio", "tb_swdio_en", "tb_swdio_val", "tb_bit_idx")
+IDS = dict(zip(NETS, "!\"#$%&'()*"))
+DUT_PORTS = ("sck", "mosi", "miso", "rst_n", "rnw", "swclk", "swdio")
+BIT_IDX_WIDTH = 6
+
+ACK_INVALID = (0b000, 0b011, 0b101, 0b110, 0b111)
+
+def _value_lut():
+    """(net, value) -> dump line; 1-bit nets use codes 0..3, tb_bit_idx uses 0..63."""
+    lut = np.empty(len(NETS) * 64, dtype=object)
+    for k, net in enumerate(NETS):
+        for v in range(64):
+            if net == "tb_bit_idx":
+                lut[k * 64 + v] = f"b{v:b} {IDS[net]}\n"
+            else:
+                lut[k * 64 + v] = f"{VAL_CHARS[v & 3]}{IDS[net]}\n"
+    return lut
+
+VALUE_LUT = _value_lut()
+
+def vcd_header(top):
+    out = ["$timescale 1ps $end\n", f"$scope module {top} $end\n"]
+    for net in NETS:
+        kind = "wire" if net in ("miso", "swclk", "swdio") else "reg"
+        if net == "tb_bit_idx":
+            out.append(f"$var reg {BIT_IDX_WIDTH} {IDS[net]} {net} [{BIT_IDX_WIDTH - 1}:0] $end\n")
+        else:
+            out.append(f"$var {kind} 1 {IDS[net]} {net} $end\n")
+    out.append("$scope module dut $end\n")
+    for net in DUT_PORTS:
+        out.append(f"$var wire 1 {IDS[net]} {net} $end\n")
+    out.append("$upscope $end\n$upscope $end\n$enddefinitions $end\n")
+    return "".join(out)
+
+# ===== Transactions =====
+def swd_request(apndp, rnw, addr):
+    """8-bit SWD request, LSB-first on the wire: start, APnDP, RnW, A[2:3], parity, stop, park."""
+    a2, a3 = addr & 1, (addr >> 1) & 1
+    par = (apndp ^ rnw ^ a2 ^ a3) & 1
+    return 1 | apndp << 1 | rnw << 2 | a2 << 3 | a3 << 4 | par << 5 | 0 << 6 | 1 << 7
+
+def make_transactions(n, seed=1, read_ratio=0.5, wait_rate=0.0, fault_rate=0.0,
+                      bad_ack_rate=0.0, parity_err_rate=0.0, idle_max=2):
+    """
+    Ground truth, one row per transaction:
+      rnw (1=READ), req, ack (b0|b1<<1|b2<<2), data, par_err, idle (cycles after the frame)
+    """
+    rng = np.random.default_rng(seed)
+    rnw = (rng.random(n) < read_ratio).astype(np.uint8)
+    apndp = rng.integers(0, 2, n)
+    req = swd_request(apndp, rnw.astype(np.int64), rng.integers(0, 4, n)).astype(np.uint8)
+    u = rng.random(n)
+    ack = np.full(n, ACK_OK, dtype=np.uint8)
+    bad = u < wait_rate + fault_rate + bad_ack_rate
+    ack[bad] = rng.choice(ACK_INVALID, int(bad.sum()))
+    ack[u < wait_rate + fault_rate] = ACK_FAULT
+    ack[u < wait_rate] = ACK_WAIT
+    data = rng.integers(0, 1 << 32, n, dtype=np.uint64).astype(np.uint32)
+    par_err = rng.random(n) < parity_err_rate
+    idle = rng.integers(0, idle_max + 1, n) if idle_max > 0 else np.zeros(n, dtype=np.int64)
+    return dict(rnw=rnw, req=req, ack=ack, data=data, par_err=par_err, idle=idle.astype(np.int64))
+
+def _bits(words, nbits):
+    return ((np.asarray(words, dtype=np.uint64)[:, None] >> np.arange(nbits, dtype=np.uint64)) & 1).astype(np.uint8)
+
+def frame_bits(tx):
+    """Per transaction: host MOSI bits and target (tb_swdio_en, tb_swdio_val) per bit, shape (n, 48)."""
+    n = tx["rnw"].size
+    data_bits = _bits(tx["data"], 32)
+    par = (data_bits.sum(axis=1) & 1).astype(np.uint8) ^ tx["par_err"].astype(np.uint8)
+    is_read = tx["rnw"] == 1
+
+    host = np.zeros((n, FRAME_BITS), dtype=np.uint8)
+    host[:, 2:10] = _bits(tx["req"], 8)
+    wr = ~is_read
+    host[wr, 15:47] = data_bits[wr]
+    host[wr, 47] = par[wr]
+
+    en = np.zeros((n, FRAME_BITS), dtype=np.uint8)
+    val = np.zeros((n, FRAME_BITS), dtype=np.uint8)
+    en[:, 11:14] = 1
+    val[:, 11:14] = _bits(tx["ack"], 3)
+    rd_ok = is_read & (tx["ack"] == ACK_OK)
+    en[rd_ok, 14:47] = 1
+    val[rd_ok, 14:46] = data_bits[rd_ok]
+    val[rd_ok, 46] = par[rd_ok]
+    return host, en, val
+
+# ===== Rows: one per SCK half-cycle =====
+# Transaction layout (row r): 0 = arm posedge, 1 = arm negedge (rst_n rises, MOSI bit 0),
+# 2+2b / 3+2b = posedge / negedge of bit b, then idle. The last row of a transaction is the
+# negedge at which the testbench already arms the next one (rst_n low, rnw of the next).
+def _rows(tx, lo, hi, host, en, val, next_rnw):
+    nrows = 2 * (1 + FRAME_BITS + tx["idle"][lo:hi])
+    ti = np.repeat(np.arange(lo, hi), nrows)
+    start = np.cumsum(nrows) - nrows
+    r = np.arange(ti.size) - np.repeat(start, nrows)
+    last = r == np.repeat(nrows, nrows) - 1
+
+    sck = (r % 2 == 0).astype(np.uint8)
+    rst = ((r >= 1) & ~last).astype(np.uint8)
+    rnw = np.where(last, next_rnw[ti - lo], tx["rnw"][ti]).astype(np.uint8)
+
+    k = (r - 1) // 2  # host bit on MOSI (set at the negedge before its posedge)
+    mosi = np.where((r >= 1) & (k < FRAME_BITS), host[ti, np.clip(k, 0, FRAME_BITS - 1)], 0).astype(np.uint8)
+    b = (r - 2) // 2  # bit whose posedge/negedge this row is
+    in_frame = (r >= 2) & (b < FRAME_BITS)
+    bc = np.clip(b, 0, FRAME_BITS - 1)
+    tb_en = np.where(in_frame, en[ti, bc], 0).astype(np.uint8)
+    tb_val = np.where(in_frame, val[ti, bc], 0).astype(np.uint8)
+    bit_idx = np.where(r >= 2, np.minimum(b, FRAME_BITS - 1), 0).astype(np.uint8)
+
+    # frontend: saturating bit counter, host drives PAD/REQ, RAW mode and after TA2 on WRITE
+    idx = np.where(r >= 2, np.minimum(b + 1, 15), 0)
+    drive = (rst == 0) | (idx <= 9) | ((rnw == 0) & (idx == 15))
+    swdio = np.where(tb_en == 1, np.where(drive, V_X, tb_val),
+                     np.where(drive, mosi, V_Z)).astype(np.uint8)
+    miso = np.where(rst == 1, swdio, V_Z).astype(np.uint8)
+
+    cols = dict(sck=sck, mosi=mosi, miso=miso, rst_n=rst, rnw=rnw, swclk=sck, swdio=swdio,
+                tb_swdio_en=tb_en, tb_swdio_val=tb_val, tb_bit_idx=bit_idx)
+    bit0 = start + 2  # posedge of bit 0
+    return np.stack([cols[n] for n in NETS], axis=1), bit0
+
+def _format_rows(vals, prev, t0):
+    """Dump text for rows whose values are `vals` (rows, nets); `prev` is the row before."""
+    mask = vals != np.vstack([prev[None, :], vals[:-1]])
+    per_row = mask.sum(axis=1)
+    cnt = per_row + 1
+    starts = np.cumsum(cnt) - cnt
+    rr, cc = np.nonzero(mask)
+    first = np.cumsum(per_row) - per_row
+    lines = np.empty(int(cnt.sum()), dtype=object)
+    times = t0 + HALF_PERIOD * np.arange(1, vals.shape[0] + 1)
+    lines[starts] = [f"#{t}\n" for t in times.tolist()]
+    lines[starts[rr] + 1 + (np.arange(rr.size) - first[rr])] = VALUE_LUT[cc * 64 + vals[rr, cc]]
+    return "".join(lines), int(times[-1])
+
+def write_vcd(path, tx, top="testbench_read"):
+    """Write the capture; returns (bytes written, half-cycle rows, bit-0 posedge time per transaction)."""
+    n = tx["rnw"].size
+    host, en, val = frame_bits(tx)
+    first_rnw = int(tx["rnw"][0]) if n else 1
+    # t=0: armed (rst_n low), host driving 0, then a few free-running SCK cycles
+    init = dict(sck=V_0, mosi=V_0, miso=V_Z, rst_n=V_0, rnw=first_rnw, swclk=V_0, swdio=V_0,
+                tb_swdio_en=V_0, tb_swdio_val=V_0, tb_bit_idx=0)
+    prev = np.array([init[net] for net in NETS], dtype=np.uint8)
+    start_t = np.zeros(n, dtype=np.int64)
+
+    with open(path, "w", newline="\n") as fh:
+        fh.write(vcd_header(top))
+        fh.write("#0\n$dumpvars\n" + "".join(VALUE_LUT[k * 64 + int(v)] for k, v in enumerate(prev)) + "$end\n")
+        pre = np.repeat(prev[None, :], 2 * PREAMBLE_CYCLES, axis=0)
+        pre[0::2, NETS.index("sck")] = pre[0::2, NETS.index("swclk")] = V_1
+        text, t = _format_rows(pre, prev, 0)
+        fh.write(text)
+        prev = pre[-1]
+        rows = 2 * PREAMBLE_CYCLES
+        for lo in range(0, n, CHUNK_TX):
+            hi = min(n, lo + CHUNK_TX)
+            next_rnw = np.r_[tx["rnw"][lo + 1:hi + 1], tx["rnw"][n - 1:n]][:hi - lo]
+            vals, bit0 = _rows(tx, lo, hi, host, en, val, next_rnw)
+            start_t[lo:hi] = t + HALF_PERIOD * (bit0 + 1)
+            text, t = _format_rows(vals, prev, t)
+            fh.write(text)
+            prev = vals[-1]
+            rows += vals.shape[0]
+    return Path(path).stat().st_size, rows, start_t
+
+def generate(path, n, top="testbench_read", truth=None, **mix):
+    """make_transactions() + write_vcd(); optionally saves the ground truth as .npz."""
+    tx = make_transactions(n, **mix)
+    nbytes, rows, start_t = write_vcd(path, tx, top)
+    if truth:
+        np.savez_compressed(truth, start_t=start_t, **tx)
+    return dict(transactions=n, bytes=nbytes, half_cycles=rows,
+                reads=int(tx["rnw"].sum()), writes=int(n - tx["rnw"].sum()),
+                ok=int((tx["ack"] == ACK_OK).sum()), wait=int((tx["ack"] == ACK_WAIT).sum()),
+                fault=int((tx["ack"] == ACK_FAULT).sum()),
+                bad_ack=int(np.isin(tx["ack"], ACK_INVALID).sum()),
+                parity_err=int(tx["par_err"].sum()))
+
+# ===== Main =====
+def main():
+    ap = argparse.ArgumentParser(description="Generate a synthetic SWD probe VCD (testbench hierarchy/net names).")
+    ap.add_argument("out", help="output .vcd path")
+    ap.add_argument("-n", "--transactions", type=int, default=1000)
+    ap.add_argument("--top", default="testbench_read", help="top scope name (testbench_read / testbench_write / ...)")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--read-ratio", dest="read_ratio", type=float, default=0.5, help="fraction of READ transactions")
+    ap.add_argument("--wait", dest="wait_rate", type=float, default=0.0, help="fraction answered with ACK=WAIT")
+    ap.add_argument("--fault", dest="fault_rate", type=float, default=0.0, help="fraction answered with ACK=FAULT")
+    ap.add_argument("--bad-ack", dest="bad_ack_rate", type=float, default=0.0, help="fraction answered with an invalid ACK")
+    ap.add_argument("--parity-err", dest="parity_err_rate", type=float, default=0.0,
+                    help="fraction whose DATA parity bit is flipped")
+    ap.add_argument("--idle-max", dest="idle_max", type=int, default=2, help="idle cycles after each frame: uniform 0..N")
+    ap.add_argument("--truth", default="", help="also write the ground truth (.npz, one row per transaction)")
+    args = ap.parse_args()
+
+    st = generate(args.out, args.transactions, top=args.top, truth=args.truth or None, seed=args.seed,
+                  read_ratio=args.read_ratio, wait_rate=args.wait_rate, fault_rate=args.fault_rate,
+                  bad_ack_rate=args.bad_ack_rate, parity_err_rate=args.parity_err_rate, idle_max=args.idle_max)
+    print(f"[OK] {args.out}: {st['transactions']} transaction(s), {st['half_cycles']} half-cycles, "
+          f"{st['bytes'] / 1e6:.1f} MB")
+    print(f"[INFO] read={st['reads']} write={st['writes']} ok={st['ok']} wait={st['wait']} "
+          f"fault={st['fault']} bad_ack={st['bad_ack']} parity_err={st['parity_err']}")
+
+if __name__ == "__main__":
+    main()
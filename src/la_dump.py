@@ -0,0 +1,154 @@
+# la_dump.py — logic-analyzer sample dumps (raw packed samples) as Signals
+# A dump is a flat file of fixed-size little-endian sample words (1/2/4/8 bytes, as written
+# by sigrok's "binary" output or a raw LA/FPGA stream), bit k of a word = channel k. The file
+# is memory-mapped and walked in chunks: one XOR of neighbouring words marks the samples
+# where any mapped channel toggles, and only those (sparse) positions are split per channel.
+# Each channel becomes a Signal of its transitions, times in ps from the sample rate, so the
+# cycle table, decoder, lanes and plots take it like a VCD net. Nothing is built per sample.
+#
+#   fmt  = LaFormat(parse_channel_map("sck=0,mosi=1,swdio=2,rst_n=3"), rate=100e6)
+#   sigs, n = read_dump("capture.bin", fmt)
+
+from pathlib import Path
+
+import numpy as np
+
+from swd_decode import sck_cycle_arrays
+from vcd_profile import count, stage
+from vcd_signal import Signal
+
+CHUNK_SAMPLES = 1 << 24
+PS_PER_S = 1e12
+UNIT_BYTES = (1, 2, 4, 8)
+
+# ===== Format =====
+def parse_channel_map(text, roles=None):
+    """'sck=0,mosi=1,...' -> {role: bit}; roles (optional) = accepted role names."""
+    chans = {}
+    for part in text.replace(" ", ",").split(","):
+        if not part:
+            continue
+        role, sep, bit = part.partition("=")
+        if not sep or not bit.strip().isdigit():
+            raise ValueError(f"bad channel mapping {part!r} (want ROLE=BIT, e.g. sck=0)")
+        role = role.strip()
+        if roles is not None and role not in roles:
+            raise ValueError(f"unknown role {role!r} in channel map (roles: {' '.join(roles)})")
+        chans[role] = int(bit)
+    if not chans:
+        raise ValueError("empty channel map")
+    return chans
+
+class LaFormat:
+    """
+    channels : {role: bit index in the sample word}
+    rate     : samples per second
+    unit     : bytes per sample word (1/2/4/8, little-endian)
+    offset   : header bytes before the first sample
+    """
+
+    def __init__(self, channels, rate, unit=1, offset=0):
+        if unit not in UNIT_BYTES:
+            raise ValueError(f"sample unit {unit} not in {UNIT_BYTES} bytes")
+        if rate <= 0:
+            raise ValueError(f"sample rate {rate} must be > 0")
+        wide = {r: b for r, b in channels.items() if not 0 <= b < 8 * unit}
+        if wide:
+            raise ValueError(f"channel bit(s) {wide} outside a {unit}-byte sample")
+        self.channels = dict(channels)
+        self.rate = float(rate)
+        self.unit = int(unit)
+        self.offset = int(offset)
+
+    @property
+    def dtype(self):
+        return np.dtype(f"<u{self.unit}")
+
+    def net_name(self, role):
+        return f"D{self.channels[role]}" if role in self.channels else ""
+
+    def spec(self):
+        """JSON-able description (part of the parse-cache key)."""
+        return dict(channels=self.channels, rate=self.rate, unit=self.unit, offset=self.offset)
+
+    def times(self, idx):
+        """Sample indices -> int64 ps (rounded; float64 is exact to the ps for ~2.5 h of capture)."""
+        return np.rint(np.asarray(idx, dtype=np.float64) * (PS_PER_S / self.rate)).astype(np.int64)
+
+# ===== Edge extraction =====
+def dump_transitions(words, mask, chunk=CHUNK_SAMPLES):
+    """
+    Positions where (word & mask) differs from the previous sample, with the XOR of the
+    two (which channels toggled) and the new word: (idx int64, flips, new), plus the
+    first word. Chunks overlap by one sample so no boundary change is lost.
+    """
+    n = int(words.size)
+    if not n:
+        z = np.zeros(0, dtype=words.dtype)
+        return np.zeros(0, dtype=np.int64), z, z, words.dtype.type(0)
+    mask = words.dtype.type(mask)
+    first = words.dtype.type(words[0] & mask)
+    idx, flips, new = [], [], []
+    for lo in range(0, n - 1, chunk):
+        w = np.asarray(words[lo:lo + chunk + 1]) & mask  # one sample of look-back for the next chunk
+        d = w[1:] ^ w[:-1]
+        nz = np.flatnonzero(d)
+        count("samples", w.size - 1)
+        if nz.size:
+            idx.append(nz + (lo + 1))
+            flips.append(d[nz])
+            new.append(w[nz + 1])
+    if not idx:
+        z = np.zeros(0, dtype=words.dtype)
+        return np.zeros(0, dtype=np.int64), z, z, first
+    return np.concatenate(idx), np.concatenate(flips), np.concatenate(new), first
+
+def read_dump(path, fmt: LaFormat, chunk=CHUNK_SAMPLES):
+    """({role: Signal} for the mapped channels, sample count). Each net starts with its sample-0 value at t=0."""
+    path = Path(path)
+    size = path.stat().st_size - fmt.offset
+    n = max(size, 0) // fmt.unit
+    if not n:
+        return {role: Signal(name=fmt.net_name(role)) for role in fmt.channels}, 0
+    words = np.memmap(path, dtype=fmt.dtype, mode="r", offset=fmt.offset, shape=(n,))
+    mask = 0
+    for b in fmt.channels.values():
+        mask |= 1 << b
+    idx, flips, new, first = dump_transitions(words, mask, chunk)
+    t_all = fmt.times(idx)
+    sigs = {}
+    for role, b in fmt.channels.items():
+        sh = fmt.dtype.type(b)
+        hit = np.flatnonzero((flips >> sh) & fmt.dtype.type(1))
+        t = np.concatenate(([0], t_all[hit]))
+        v = np.concatenate(([(first >> sh) & 1], (new[hit] >> sh) & 1)).astype(np.uint8)
+        sigs[role] = Signal(t, v, fmt.net_name(role))
+        count("changes", t.size)
+    return sigs, n
+
+def load_dump(path: Path, fmt: LaFormat, roles, cache=None):
+    """
+    (key, sel, {role: Signal}, pos, neg) like swd_capture.load_signals(); roles = all role
+    names (unmapped ones stay empty). Cached under the dump digest + format.
+    """
+    key = cache.key(path, dict(la=fmt.spec(), roles=list(roles))) if cache else None
+    hit = None
+    if cache:
+        with stage("cache_load"):
+            hit = cache.load(key)
+    if hit is not None:
+        meta, sigs, pos, neg = hit
+        print(f"[CACHE] {path.name}: parse skipped ({key[:12]})")
+        return key, meta["sel"], sigs, pos, neg
+
+    with stage("parse"):
+        found, n = read_dump(path, fmt)
+    print(f"[INFO] {path.name}: {n} sample(s) @ {fmt.rate:g} S/s, {fmt.unit} byte(s)/sample")
+    sel = {role: fmt.net_name(role) for role in roles}
+    sigs = {role: found.get(role) or Signal(name=sel[role]) for role in roles}
+    with stage("cycles"):
+        pos, neg = sck_cycle_arrays(sigs["sck"])
+    if cache:
+        with stage("cache_store"):
+            cache.store(key, sigs, pos, neg, sel=sel, source=path.name)
+    return key, sel, sigs, pos, neg
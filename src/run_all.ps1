@@ -30,12 +30,12 @@ Write-Host "=== [SPECIAL] 运行 $plus ==="
 
 Write-Host "`n==== ALL PASS ===="
 
-# === [PLOT] 生成 PNG 波形图（需要已安装 Python 和依赖：pip install vcdvcd matplotlib） ===
+# === [PLOT] 生成 PNG 波形图（需要已安装 Python 和依赖：pip install numpy matplotlib） ===
 # 选择 python 解释器
 $py = $null
 if (Get-Command python -ErrorAction SilentlyContinue) { $py = "python" }
 elseif (Get-Command py -ErrorAction SilentlyContinue) { $py = "py -3" }
-else { Write-Warning "找不到 python；如需生成 PNG：pip install vcdvcd matplotlib" }
+else { Write-Warning "找不到 python；如需生成 PNG：pip install numpy matplotlib" }
 
 if ($py) {
     if (-not (Test-Path ".\vcd_to_png.py")) {
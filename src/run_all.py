@@ -0,0 +1,258 @@
+# run_all.py — parallel simulation runner (Python replacement for run_all.sh / run_all.ps1)
+# Compiles the selected testbenches concurrently with iverilog, then runs every
+# (testbench × plusarg/seed variant) with vvp on a worker pool. Each simulation dumps its
+# VCD into a FIFO (+vcd=<fifo>) that vcd_to_png.py --follow reads while vvp is still
+# running, so no full VCD touches the disk (--keep-vcd writes it instead; platforms
+# without mkfifo fall back to a file decoded afterwards; --fst dumps FST with vvp -fst,
+# also decoded afterwards since FST is written block-wise). The PASS/FAIL verdicts,
+# [TIMING ERR] lines and fatal messages of every run are collected into one report
+# (printed table + report.json).
+
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+from pathlib import Path
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+
+HERE = Path(__file__).resolve().parent
+SOURCES = ("swd-probe.v",)
+# name -> (top module, testbench source, default dump name)
+TESTBENCHES = {
+    "read": ("testbench_read", "testbench_read.v", "swd_read.vcd"),
+    "write": ("testbench_write", "testbench_write.v", "swd_write.vcd"),
+    "special": ("testbench_special", "testbench_special.v", "swd_special.vcd"),
+}
+
+RE_RESULT = re.compile(r"^\[TIMING RESULT\] (.*?) : (PASS|FAIL)\b")
+RE_TIMING_ERR = re.compile(r"^\[TIMING ERR (\S+)\] (.*?) @(\d+) bit=(\d+)")
+RE_FATAL = re.compile(r"^(?:FATAL|ERROR)\b|\$fatal|\bfatal\b", re.IGNORECASE)
+RE_FRAMES = re.compile(r"^\[INFO\] .*: (\d+) frame\(s\), sck_cycles=(\d+)")
+# file mode (--fst): "[INFO] x: sck_cycles=M" then "[OK] DECODE x: N frame(s) -> ..."
+RE_CYCLES = re.compile(r"^\[INFO\] .*: sck_cycles=(\d+)$")
+RE_DECODED = re.compile(r"^\[OK\] DECODE .*: (\d+) frame\(s\)")
+
+# ===== Variants =====
+def plusarg(arg):
+    """'force_drive0' / '+force_drive0' -> '+force_drive0'; 'none' (or '') -> None (no plusarg)."""
+    arg = arg.strip()
+    if arg in ("", "none"):
+        return None
+    return arg if arg.startswith("+") else "+" + arg
+
+def variants(fixed, sweeps, seeds):
+    """
+    Cartesian product of the sweep axes: every --sweep is one axis of alternatives
+    ('none,force_drive0' = without / with), --seeds adds +seed=N. Returns [[plusarg, ...], ...].
+    """
+    axes = [[plusarg(a) for a in spec.split(",")] for spec in sweeps]
+    if seeds:
+        axes.append([f"+seed={s}" for s in seeds])
+    base = [p for p in map(plusarg, fixed) if p]
+    return [base + [p for p in combo if p] for combo in product(*axes)]
+
+def run_id(tb, plus):
+    tag = "_".join(re.sub(r"[^0-9A-Za-z]+", "-", p.lstrip("+")).strip("-") for p in plus)
+    return f"{tb}__{tag}" if tag else tb
+
+# ===== Compile =====
+def compile_tb(tb, build: Path):
+    top, src, _ = TESTBENCHES[tb]
+    out = build / f"sim_{tb}.vvp"
+    cmd = ["iverilog", "-g2012", "-Wall", "-s", top, "-o", str(out), *SOURCES, src]
+    t0 = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=str(HERE), capture_output=True, text=True)
+    return dict(tb=tb, ok=proc.returncode == 0, vvp=str(out), seconds=time.perf_counter() - t0,
+                log=(proc.stdout + proc.stderr).strip())
+
+# ===== Run one simulation + decoder =====
+def parse_sim_log(text):
+    """PASS/FAIL verdicts, [TIMING ERR] lines and fatal messages of one vvp run."""
+    results, errors, fatal = [], [], []
+    for line in text.splitlines():
+        m = RE_RESULT.match(line)
+        if m:
+            results.append(dict(frame=m.group(1), verdict=m.group(2)))
+            continue
+        m = RE_TIMING_ERR.match(line)
+        if m:
+            errors.append(dict(tag=m.group(1), detail=m.group(2), t=int(m.group(3)), bit=int(m.group(4))))
+            continue
+        if RE_FATAL.search(line):
+            fatal.append(line.strip())
+    return results, errors, fatal
+
+def decoder_cmd(args, follow_path, outdir: Path):
+    if args.fst:  # FST cannot be followed: decode the finished file (run with cwd=outdir)
+        cmd = [sys.executable, str(HERE / "vcd_to_png.py"), "--glob", follow_path.name, "--outdir", str(outdir),
+               "--export", "jsonl", "--no-cache"]
+    else:
+        cmd = [sys.executable, str(HERE / "vcd_to_png.py"), "--follow", str(follow_path), "--outdir", str(outdir),
+               "--export", "jsonl", "--follow-timeout", "0"]
+    if not args.png:
+        cmd.append("--decode-only")
+    return cmd
+
+def release_fifo(fifo: Path):
+    """Unblock a decoder still waiting in open() when the simulation never opened the FIFO."""
+    try:
+        fd = os.open(str(fifo), os.O_WRONLY | os.O_NONBLOCK)
+    except OSError:  # no reader yet (ENXIO) or already gone
+        return False
+    os.close(fd)
+    return True
+
+def run_sim(tb, plus, vvp, args, outroot: Path):
+    rid = run_id(tb, plus)
+    outdir = outroot / rid
+    outdir.mkdir(parents=True, exist_ok=True)
+    stream = not args.keep_vcd and not args.fst and not args.no_decode and hasattr(os, "mkfifo")
+    dump = TESTBENCHES[tb][2]
+    if args.fst:
+        dump = Path(dump).with_suffix(".fst").name
+    vcd = outdir / (Path(dump).stem + ".fifo" if stream else dump)
+    if stream:
+        if vcd.exists():
+            vcd.unlink()
+        os.mkfifo(str(vcd))
+
+    rec = dict(run=rid, tb=tb, plusargs=plus, streamed=stream, vcd=None if stream else str(vcd))
+    t0 = time.perf_counter()
+    dec = None
+    with open(outdir / "decode.log", "w") as dec_log:
+        if stream:  # reader first: vvp's open() of the FIFO waits for it
+            dec = subprocess.Popen(decoder_cmd(args, vcd, outdir), cwd=str(HERE), stdout=dec_log,
+                                   stderr=subprocess.STDOUT, text=True)
+        try:
+            fmt = ["-fst"] if args.fst else []
+            sim = subprocess.run(["vvp", "-n", vvp, *fmt, f"+vcd={vcd}", *plus], cwd=str(HERE), capture_output=True,
+                                 text=True, timeout=args.timeout or None)
+            sim_out, rc = sim.stdout + sim.stderr, sim.returncode
+        except subprocess.TimeoutExpired as e:  # partial output arrives as bytes even in text mode
+            sim_out = e.stdout.decode(errors="replace") if isinstance(e.stdout, bytes) else (e.stdout or "")
+            rc = None
+        rec["sim_s"] = time.perf_counter() - t0
+        if dec is None and not args.no_decode:
+            dec = subprocess.Popen(decoder_cmd(args, vcd, outdir), cwd=str(outdir if args.fst else HERE),
+                                   stdout=dec_log, stderr=subprocess.STDOUT, text=True)
+        if dec is not None:
+            while True:
+                try:
+                    dec.wait(timeout=1.0)
+                    break
+                except subprocess.TimeoutExpired:
+                    if stream:
+                        release_fifo(vcd)
+    if stream:
+        vcd.unlink()
+
+    (outdir / "sim.log").write_text(sim_out)
+    results, errors, fatal = parse_sim_log(sim_out)
+    rec.update(returncode=rc, results=results, timing_errors=errors, fatal=fatal, wall_s=time.perf_counter() - t0)
+    if rc is None:
+        fatal.append(f"timeout after {args.timeout:g}s")
+    if dec is not None:
+        text = (outdir / "decode.log").read_text()
+        lines = text.splitlines()
+        m = [x for x in map(RE_FRAMES.match, lines) if x]
+        if m:
+            frames, cycles = int(m[-1].group(1)), int(m[-1].group(2))
+        else:
+            dm = [x for x in map(RE_DECODED.match, lines) if x]
+            cm = [x for x in map(RE_CYCLES.match, lines) if x]
+            frames = int(dm[-1].group(1)) if dm else None
+            cycles = int(cm[-1].group(1)) if cm else None
+        rec.update(decoder_rc=dec.returncode, frames=frames, sck_cycles=cycles)
+    rec["verdict"] = "PASS" if (rc == 0 and not errors and not fatal
+                                and all(r["verdict"] == "PASS" for r in results)) else "FAIL"
+    return rec
+
+# ===== Report =====
+def print_report(compiles, runs):
+    for c in compiles:
+        if not c["ok"]:
+            print(f"[ERR] compile {c['tb']}:\n{c['log']}")
+    head = ("run", "verdict", "results", "timing_err", "frames", "sim[s]")
+    rows = []
+    for r in runs:
+        n_pass = sum(x["verdict"] == "PASS" for x in r["results"])
+        rows.append((r["run"], r["verdict"], f"{n_pass}/{len(r['results'])}", str(len(r["timing_errors"])),
+                     "-" if r.get("frames") is None else str(r["frames"]), f"{r['sim_s']:.2f}"))
+    widths = [max(len(h), *(len(row[i]) for row in rows)) if rows else len(h) for i, h in enumerate(head)]
+    print("  ".join(h.ljust(w) for h, w in zip(head, widths)))
+    for row in rows:
+        print("  ".join(c.ljust(w) if i < 2 else c.rjust(w) for i, (c, w) in enumerate(zip(row, widths))))
+    for r in runs:
+        for e in r["timing_errors"]:
+            print(f"[TIMING ERR] {r['run']}: {e['tag']} {e['detail']} @{e['t']} bit={e['bit']}")
+        for line in r["fatal"]:
+            print(f"[ERR] {r['run']}: {line}")
+
+def main():
+    ap = argparse.ArgumentParser(description="Compile and run the SWD probe testbenches in parallel, "
+                                             "decode their VCDs on the fly and summarize PASS/FAIL.")
+    ap.add_argument("tb", nargs="*", default=[],
+                    help="testbenches to run (default: all of read write special)")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="concurrent compiles / simulations")
+    ap.add_argument("--plusarg", action="append", default=[], metavar="ARG",
+                    help="plusarg passed to every run, e.g. force_drive0 (repeatable)")
+    ap.add_argument("--sweep", action="append", default=[], metavar="A,B,...",
+                    help="one sweep axis of alternative plusargs, 'none' = no plusarg (e.g. none,force_drive0); "
+                         "several axes run as a cartesian product")
+    ap.add_argument("--seeds", type=int, nargs="+", default=[], help="sweep +seed=N over these values: each testbench draws its stimulus (idle "
+                         "gap, request, data / phase lengths) from $random(N); without it the fixed stimulus runs")
+    ap.add_argument("--outdir", default="sim_runs", help="per-run logs, decoded frames and report.json")
+    ap.add_argument("--keep-vcd", dest="keep_vcd", action="store_true",
+                    help="write each VCD to <outdir>/<run>/ and decode it afterwards instead of streaming")
+    ap.add_argument("--fst", action="store_true",
+                    help="dump FST (vvp -fst) instead of VCD: kept in <outdir>/<run>/ and decoded afterwards")
+    ap.add_argument("--no-decode", dest="no_decode", action="store_true", help="simulate only (implies a VCD file)")
+    ap.add_argument("--png", action="store_true", help="also render frame PNGs while decoding")
+    ap.add_argument("--timeout", type=float, default=0, help="per-simulation timeout in seconds (0 = none)")
+    args = ap.parse_args()
+    unknown = [tb for tb in args.tb if tb not in TESTBENCHES]
+    if unknown:
+        ap.error(f"unknown testbench(es): {', '.join(unknown)} (choose from {', '.join(TESTBENCHES)})")
+
+    for tool in ("iverilog", "vvp"):
+        if shutil.which(tool) is None:
+            print(f"[ERR] {tool} not found in PATH")
+            sys.exit(2)
+
+    tbs = args.tb or list(TESTBENCHES)
+    outroot = Path(args.outdir).resolve()
+    build = HERE / "build"
+    build.mkdir(exist_ok=True)
+    runs_plus = variants(args.plusarg, args.sweep, args.seeds)
+
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as ex:
+        print(f"[INFO] compiling {', '.join(tbs)} ...", flush=True)
+        compiles = list(ex.map(lambda tb: compile_tb(tb, build), tbs))
+        ok = {c["tb"]: c["vvp"] for c in compiles if c["ok"]}
+        todo = [(tb, plus) for tb in tbs if tb in ok for plus in runs_plus]
+        print(f"[INFO] {len(todo)} simulation(s) on {args.jobs} worker(s)", flush=True)
+        futs = [ex.submit(run_sim, tb, plus, ok[tb], args, outroot) for tb, plus in todo]
+        runs = []
+        for fut in futs:
+            r = fut.result()
+            print(f"[{'OK' if r['verdict'] == 'PASS' else 'ERR'}] {r['run']}: {r['verdict']}", flush=True)
+            runs.append(r)
+
+    print()
+    print_report(compiles, runs)
+    report = outroot / "report.json"
+    report.parent.mkdir(parents=True, exist_ok=True)
+    report.write_text(json.dumps(dict(compiles=compiles, runs=runs), indent=2))
+    print(f"[OK] {report}")
+
+    failed = [c for c in compiles if not c["ok"]] + [r for r in runs if r["verdict"] != "PASS"]
+    print("\n==== ALL PASS ====" if not failed else f"\n==== {len(failed)} FAILED ====")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -61,7 +61,7 @@ if [[ -n "$PY" && -f "./vcd_to_png.py" ]]; then
   echo "  - vcd_png/frames/ （识别到帧后输出 *_ZONES.png）"
 else
   echo "提示：未检测到可用的 Python 或 vcd_to_png.py，跳过 PNG 生成。" >&2
-  echo "如需生成图：pip install vcdvcd matplotlib" >&2
+  echo "如需生成图：pip install numpy matplotlib" >&2
 fi
 
 echo
@@ -0,0 +1,456 @@
+# swd_capture.py — importable view of one SWD capture (the library behind vcd_to_png)
+# Capture opens a VCD once and computes everything on first access: the selected nets
+# (through the parse cache when one is given), the SCK cycle table, the per-cycle samples,
+# the decoded frames and the semantic lanes. Frames are non-overlapping and sorted, so
+# their [start, end) times form an interval index: time-range queries are two binary
+# searches, ACK/REQ/RnW filters are column masks, and lanes are sliced to a window with
+# Signal.window() (binary search on the sorted change times), never rescanned.
+#
+#   cap = Capture("swd_read.vcd")
+#   rows = cap.query(t0=10_000, t1=90_000, ack=("WAIT", "FAULT"))
+#   for rec in cap.records(cap.with_req(0xA5)): ...
+#   sig = cap.lane("swdio", *cap.frame_span(0))
+#   for inst in Capture.probes("board.vcd"): ...   # every swd-probe instance, one parse
+#   print(cap.stats.summary()["frames"]["transactions_per_s"])
+
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+
+from swd_decode import (ACK_FAULT, ACK_OK, ACK_WAIT, FRAME_BITS, SAMPLE_EPS, CycleSamples,
+                        as_cycle_arrays, decode_capture, sck_cycle_arrays)
+from fst_stream import open_waveform
+from la_dump import load_dump
+from swd_export import frame_columns
+from swd_stats import analyze_capture
+from vcd_profile import stage
+from vcd_signal import V_0, V_1, V_Z, Signal, as_signal
+from vcd_stream import timescale_seconds
+from vcd_sweep import LaneSpec, bit, derive, tri, where
+
+# ===== Net selection =====
+# (role, default suffix) — role names are also the --map keys
+SIGNAL_ROLES = [
+    ("sck",    ".sck"),
+    ("rst_n",  ".rst_n"),
+    ("rnw",    ".rnw"),
+    ("mosi",   ".mosi"),
+    ("swdio",  ".swdio"),
+    ("tb_en",  ".tb_swdio_en"),
+    ("tb_val", ".tb_swdio_val"),
+    ("miso",   ".miso"),
+]
+
+def pick_by_suffix(names, suffix):
+    return next((full for full in names if full.endswith(suffix)), "")
+
+def select_signals(names, explicit):
+    """role -> full net name ('' if absent); --map entries win over suffix matching."""
+    return {role: explicit.get(role) or pick_by_suffix(names, suffix) for role, suffix in SIGNAL_ROLES}
+
+def load_signals(vcd_path: Path, explicit, cache):
+    """
+    (key, sel, {role: Signal}, pos, neg). On a cache hit nothing is parsed: signals and
+    the SCK cycle table are memory-mapped from the entry.
+    """
+    key = cache.key(vcd_path, dict(map=explicit, roles=SIGNAL_ROLES)) if cache else None
+    hit = None
+    if cache:
+        with stage("cache_load"):
+            hit = cache.load(key)
+    if hit is not None:
+        meta, sigs, pos, neg = hit
+        print(f"[CACHE] {vcd_path.name}: parse skipped ({key[:12]})")
+        return key, meta["sel"], sigs, pos, neg
+
+    with stage("parse"), open_waveform(vcd_path) as rd:
+        sel = select_signals(rd.names, explicit)
+        by_name = rd.read_signals(sel.values())
+    sigs = {role: by_name.get(sel[role]) or Signal(name=sel[role]) for role, _ in SIGNAL_ROLES}
+    with stage("cycles"):
+        pos, neg = sck_cycle_arrays(sigs["sck"])
+    if cache:
+        with stage("cache_store"):
+            cache.store(key, sigs, pos, neg, sel=sel, source=vcd_path.name)
+    return key, sel, sigs, pos, neg
+
+# ===== Probe discovery (several swd-probe instances in one capture) =====
+# A scope declaring .sck, .mosi and .swdio is a candidate probe. Port-connected scopes
+# (the testbench and its dut) dump the same nets under one VCD id code, so candidates
+# with identical sck/mosi/swdio codes are one probe seen twice; the scope resolving the
+# most roles (usually the testbench side, which also has tb_swdio_en/val) names it.
+PROBE_CORE = ("sck", "mosi", "swdio")
+
+def discover_probes(vars_):
+    """[(scope, sel)] per probe instance, in declaration order (vars_: VcdVar list)."""
+    code = {v.name: v.code for v in vars_}
+    sck_suffix = dict(SIGNAL_ROLES)["sck"]
+    groups = {}
+    for name in code:
+        if not name.endswith(sck_suffix):
+            continue
+        scope = name[:-len(sck_suffix)]
+        sel = {role: scope + suffix if scope + suffix in code else "" for role, suffix in SIGNAL_ROLES}
+        if all(sel[r] for r in PROBE_CORE):
+            groups.setdefault(tuple(code[sel[r]] for r in PROBE_CORE), []).append((scope, sel))
+    probes = []
+    for cands in groups.values():
+        scope, sel = max(cands, key=lambda c: sum(map(bool, c[1].values())))
+        for _, alias in cands:
+            sel = {role: net or alias[role] for role, net in sel.items()}
+        probes.append((scope, sel))
+    return probes
+
+def probe_scopes(vcd_path: Path):
+    """Scopes of the probe instances in a VCD (header only, the body is not read)."""
+    with open_waveform(vcd_path) as rd:
+        return [scope for scope, _ in discover_probes(rd.vars)]
+
+def instance_labels(scopes):
+    """Shortest distinct trailing scope parts, file-name safe: tb.u0, tb.u1 -> u0, u1."""
+    parts = [s.split(".") for s in scopes]
+    depth = 1
+    while True:
+        labels = ["_".join(p[-depth:]) for p in parts]
+        if len(set(labels)) == len(labels) or depth >= max(map(len, parts), default=1):
+            break
+        depth += 1
+    return ["".join(ch if ch.isalnum() or ch in "_-" else "_" for ch in lab) for lab in labels]
+
+def probe_key(cache, vcd_path: Path, scope):
+    return cache.key(vcd_path, dict(instance=scope, roles=SIGNAL_ROLES)) if cache else None
+
+def load_probes(vcd_path: Path, cache=None, scopes=None, log=True):
+    """
+    [(scope, (key, sel, {role: Signal}, pos, neg))] for every probe instance (or only
+    `scopes`). Instances missing from the cache are extracted together in ONE streaming
+    pass over the body, then split per instance and stored as separate cache entries.
+    """
+    with open_waveform(vcd_path) as rd:
+        probes = discover_probes(rd.vars)
+        if scopes is not None:
+            known = dict(probes)
+            missing = [s for s in scopes if s not in known]
+            if missing:
+                raise ValueError(f"{vcd_path.name}: no probe instance {', '.join(missing)}")
+            probes = [(s, known[s]) for s in scopes]
+        out = {}
+        for scope, sel in probes:
+            key = probe_key(cache, vcd_path, scope)
+            hit = None
+            if cache:
+                with stage("cache_load"):
+                    hit = cache.load(key)
+            if hit is not None:
+                _, sigs, pos, neg = hit
+                out[scope] = (key, sel, sigs, pos, neg)
+        todo = [(scope, sel) for scope, sel in probes if scope not in out]
+        if not todo and probes and log:
+            print(f"[CACHE] {vcd_path.name}: parse skipped ({len(probes)} probe instances)")
+        if todo:
+            with stage("parse"):
+                by_name = rd.read_signals([net for _, sel in todo for net in sel.values()])
+    for scope, sel in todo:
+        sigs = {role: by_name.get(sel[role]) or Signal(name=sel[role]) for role, _ in SIGNAL_ROLES}
+        with stage("cycles"):
+            pos, neg = sck_cycle_arrays(sigs["sck"])
+        key = probe_key(cache, vcd_path, scope)
+        if cache:
+            with stage("cache_store"):
+                cache.store(key, sigs, pos, neg, sel=sel, source=vcd_path.name, instance=scope)
+        out[scope] = (key, sel, sigs, pos, neg)
+    return [(scope, out[scope]) for scope, _ in probes]
+
+# ===== Semantic lane derivations =====
+def rise_edges(tv):
+    return as_signal(tv).rise_times().tolist()
+
+def derive_target_drive_tv(tv_tb_en, tv_tb_val):
+    """
+    target_drive = tb_en ? tb_val : Z
+    """
+    if not tv_tb_en or not tv_tb_val:
+        return Signal()
+    return derive(lambda s: tri(s.tb_en, s.tb_val), dict(tb_en=tv_tb_en, tb_val=tv_tb_val), "target_drive")
+
+def derive_host_drive_on_wire_tv(tv_mosi, tv_swdio, tv_tb_en=None):
+    """
+    host_drive = (target not driving) AND (bus not Z) ? MOSI : Z
+    - If TB drives (tb_en=1): host_drive=Z
+    - Else if bus is Z: host_drive=Z (turnaround / released)
+    - Else host_drive = MOSI (what host is putting onto the line through DUT)
+    """
+    if not tv_mosi or not tv_swdio:
+        return Signal()
+    inputs = dict(mosi=tv_mosi, swdio=tv_swdio)
+    if tv_tb_en:
+        inputs["tb_en"] = tv_tb_en
+
+    def host_drive(s):
+        released = s.swdio == V_Z
+        if "tb_en" in s.codes:
+            released |= s.tb_en == V_1
+        return where(released, V_Z, bit(s.mosi))
+    return derive(host_drive, inputs, "host_drive")
+
+def derive_sample_hold_tv_from_cycles(cycles, tv_sig, edge="pos"):
+    """
+    Build a sample-hold waveform:
+      - edge="pos": sample tv_sig at each posedge+eps, update at posedge time
+      - edge="neg": sample tv_sig at each negedge+eps, update at negedge time
+    """
+    pos, neg = as_cycle_arrays(cycles)
+    if not pos.size or not tv_sig:
+        return Signal()
+    return derive(lambda s: s.sig, dict(sig=tv_sig), f"sample_{edge}",
+                  at=pos if edge == "pos" else neg, eps=SAMPLE_EPS)
+
+# ===== Lane set (--default semantic lanes) =====
+def build_lanes(cycles, tv_sck, tv_rst, tv_rnw, tv_mosi, tv_swdio, tv_tb_en, tv_tb_val):
+    lanes = []
+    lanes.append(("clk (SCK)", tv_sck))
+    lanes.append(("rst_n", tv_rst))
+    lanes.append(("rnw (1=READ)", tv_rnw))
+
+    host_drive = derive_host_drive_on_wire_tv(tv_mosi, tv_swdio, tv_tb_en if tv_tb_en else None)
+    host_samp  = derive_sample_hold_tv_from_cycles(cycles, tv_swdio, edge="pos")
+    tgt_drive  = derive_target_drive_tv(tv_tb_en, tv_tb_val) if (tv_tb_en and tv_tb_val) else []
+    tgt_samp   = derive_sample_hold_tv_from_cycles(cycles, tv_swdio, edge="neg")
+
+    lanes.append(("host_drive (to SWDIO)", host_drive))
+    lanes.append(("host_sample (SWDIO @posedge)", host_samp))
+    lanes.append(("target_drive (TB)", tgt_drive))
+    lanes.append(("target_sample (SWDIO @negedge)", tgt_samp))
+    return lanes
+
+def user_lanes(specs, sigs, pos, neg):
+    """--lane NAME=EXPR[@pos|@neg] -> [(name, Signal)], evaluated with the sweep engine."""
+    roles = [role for role, _ in SIGNAL_ROLES]
+    return [(ls.name, ls.evaluate(sigs, pos, neg, SAMPLE_EPS)) for ls in (LaneSpec(s, roles) for s in specs)]
+
+# ===== Capture =====
+ACK_NAMES = dict(OK=ACK_OK, WAIT=ACK_WAIT, FAULT=ACK_FAULT)
+
+def _ack_code(a):
+    if isinstance(a, str):
+        try:
+            return ACK_NAMES[a.upper()]
+        except KeyError:
+            raise ValueError(f"unknown ACK {a!r} (use {', '.join(ACK_NAMES)} or a 3-bit code)") from None
+    return int(a)
+
+class Capture:
+    """
+    One VCD capture; every property is computed on first access and kept.
+      key, sel, signals         parse-cache key, {role: net name}, {role: Signal}
+      pos, neg                  SCK cycle table (posedge / negedge times)
+      samples                   CycleSamples, None without sck/mosi/swdio or < 48 cycles
+      frames                    decoded FrameTable (empty when samples is None)
+      start_t, end_t            frame interval index: frame i spans [start_t[i], end_t[i])
+      lanes                     semantic lanes + lane_specs (--lane) as [(name, Signal)]
+    With instance=<scope> the nets are those of that probe instance (see probes()), with
+    la=LaFormat the file is a logic-analyzer sample dump (la_dump.py), otherwise --map
+    entries / first suffix match.
+    Queries return frame row indices (int64, ascending) for frames / records().
+    """
+
+    def __init__(self, path, explicit=None, cache=None, align="auto", mode="auto",
+                 max_shift=32, min_score=8, lane_specs=(), instance="", label="", la=None):
+        self.path = Path(path)
+        self.la = la
+        self.instance = instance
+        self.label = label or (instance_labels([instance])[0] if instance else "")
+        self.explicit = dict(explicit or {})
+        self.cache = cache
+        self.align, self.mode = align, mode
+        self.max_shift, self.min_score = max_shift, min_score
+        self.lane_specs = list(lane_specs)
+
+    def __repr__(self):
+        return f"Capture({self.out_path.name!r})"
+
+    @classmethod
+    def probes(cls, path, cache=None, **kw):
+        """One Capture per probe instance in the VCD, all extracted in a single pass."""
+        loaded = load_probes(Path(path), cache)
+        labels = instance_labels([scope for scope, _ in loaded])
+        caps = []
+        for (scope, res), label in zip(loaded, labels):
+            cap = cls(path, cache=cache, instance=scope, label=label, **kw)
+            cap.__dict__["_loaded"] = res
+            caps.append(cap)
+        return caps
+
+    @property
+    def out_path(self):
+        """Name for outputs and log lines: the VCD, or <stem>@<label>.vcd for a probe instance."""
+        if not self.instance:
+            return self.path
+        return self.path.with_name(f"{self.path.stem}@{self.label}{self.path.suffix}")
+
+    # ----- nets and cycles -----
+    @cached_property
+    def _loaded(self):
+        if self.la is not None:
+            return load_dump(self.path, self.la, [role for role, _ in SIGNAL_ROLES], self.cache)
+        if self.instance:
+            return load_probes(self.path, self.cache, [self.instance], log=False)[0][1]
+        return load_signals(self.path, self.explicit, self.cache)
+
+    @property
+    def key(self):
+        return self._loaded[0]
+
+    @property
+    def sel(self):
+        return self._loaded[1]
+
+    @property
+    def signals(self):
+        return self._loaded[2]
+
+    @property
+    def pos(self):
+        return self._loaded[3]
+
+    @property
+    def neg(self):
+        return self._loaded[4]
+
+    @cached_property
+    def cycles(self):
+        """[(posedge, negedge), ...] as the frame plots index it."""
+        return list(zip(self.pos.tolist(), self.neg.tolist()))
+
+    @property
+    def decodable(self):
+        s = self.signals
+        return bool(s["sck"] and s["mosi"] and s["swdio"] and self.pos.size >= FRAME_BITS)
+
+    # ----- decode -----
+    @cached_property
+    def rst_rises(self):
+        return rise_edges(self.signals["rst_n"]) if self.signals["rst_n"] else []
+
+    @cached_property
+    def samples(self):
+        if not self.decodable:
+            return None
+        s = self.signals
+        with stage("samples"):
+            return CycleSamples((self.pos, self.neg), s["mosi"], s["swdio"], rnw=s["rnw"], rst_n=s["rst_n"],
+                                tb_en=s["tb_en"], tb_val=(s["tb_val"] if s["tb_en"] else None))
+
+    @cached_property
+    def frames(self):
+        cs = self.samples
+        if cs is None:
+            empty = np.zeros(0, dtype=np.int64)
+            cs = CycleSamples((empty, empty), Signal(), Signal())
+        with stage("decode"):
+            return decode_capture(cs, self.rst_rises, align=self.align, mode=self.mode,
+                                  max_shift=self.max_shift, min_score=self.min_score)
+
+    @property
+    def start_t(self):
+        return np.asarray(self.frames.start_t, dtype=np.int64)
+
+    @cached_property
+    def end_t(self):
+        """Negedge closing bit 47 of each frame."""
+        idx = np.asarray(self.frames.start_idx, dtype=np.int64) + FRAME_BITS - 1
+        return self.neg[idx] if idx.size else np.zeros(0, dtype=np.int64)
+
+    def frame_span(self, i):
+        """(t_start, t_end) of frame i."""
+        return int(self.start_t[i]), int(self.end_t[i])
+
+    # ----- queries -----
+    def between(self, t0=None, t1=None):
+        """Frames overlapping [t0, t1) (open ends when None)."""
+        lo = 0 if t0 is None else int(np.searchsorted(self.end_t, t0, side="right"))
+        hi = len(self.frames) if t1 is None else int(np.searchsorted(self.start_t, t1, side="left"))
+        return np.arange(lo, max(lo, hi), dtype=np.int64)
+
+    def query(self, t0=None, t1=None, ack=None, req=None, rnw=None):
+        """
+        Frames overlapping [t0, t1) that match every given filter:
+          ack  one ACK or several: 3-bit codes or "OK" / "WAIT" / "FAULT"
+          req  request byte (only frames whose REQ decoded without x/z)
+          rnw  1 = READ, 0 = WRITE
+        """
+        rows = self.between(t0, t1)
+        fr = self.frames
+        keep = np.ones(rows.size, dtype=bool)
+        if ack is not None:
+            acks = [_ack_code(a) for a in (ack if isinstance(ack, (list, tuple, set)) else [ack])]
+            keep &= np.isin(fr.ack[rows], acks)
+        if req is not None:
+            keep &= fr.req_ok[rows] & (fr.req[rows] == int(req))
+        if rnw is not None:
+            keep &= fr.rnw[rows] == (V_1 if rnw else V_0)
+        return rows[keep]
+
+    def with_ack(self, *acks):
+        return self.query(ack=acks)
+
+    def with_req(self, req):
+        return self.query(req=req)
+
+    def waits_and_faults(self):
+        return self.query(ack=("WAIT", "FAULT"))
+
+    def records(self, rows=None):
+        """One dict per frame row (the export columns plus frame number and summary)."""
+        fr = self.frames
+        rows = np.arange(len(fr)) if rows is None else np.asarray(rows, dtype=np.int64)
+        cols = frame_columns(fr)
+        out = []
+        for i in rows.tolist():
+            rec = {k: v[i].item() for k, v in cols.items()}
+            rec.update(frame=i, end_t=int(self.end_t[i]), ack_str=fr.ack_str(i), summary=fr.summary(i))
+            out.append(rec)
+        return out
+
+    @cached_property
+    def tick_s(self):
+        """Seconds per time unit (the dump's timescale; LA dumps are converted to ps)."""
+        if self.la is not None:
+            return 1e-12
+        with open_waveform(self.path) as rd:
+            return timescale_seconds(rd.timescale)
+
+    @cached_property
+    def stats(self):
+        """Throughput / bus-efficiency analytics of the decoded frames (swd_stats.BusStats)."""
+        with stage("stats"):
+            return analyze_capture(self.pos, self.neg, self.frames, self.tick_s)
+
+    # ----- lanes -----
+    @cached_property
+    def lanes(self):
+        s = self.signals
+        with stage("lanes"):
+            lanes = build_lanes((self.pos, self.neg), s["sck"], s["rst_n"], s["rnw"], s["mosi"], s["swdio"],
+                                s["tb_en"], s["tb_val"])
+            lanes += user_lanes(self.lane_specs, s, self.pos, self.neg)
+        return lanes
+
+    def lane(self, name, t0=None, t1=None):
+        """
+        A role ("swdio") or a lane name ("host_drive (to SWDIO)", a --lane NAME) as a Signal,
+        sliced to [t0, t1] (value held at t0 included) by binary search.
+        """
+        if name in self.signals:
+            sig = as_signal(self.signals[name])
+        else:
+            found = [tv for n, tv in self.lanes if n == name]
+            if not found:
+                raise KeyError(f"no role or lane {name!r}")
+            sig = as_signal(found[0])
+        if t0 is None and t1 is None:
+            return sig
+        t0 = sig.t_first if t0 is None else t0
+        t1 = sig.t_last if t1 is None else t1
+        return sig.window(t0, t1)
@@ -0,0 +1,230 @@
+# swd_check.py — whole-capture timing / bus-ownership checker over the SCK cycle table
+# The testbench tasks in tb_timing_helpers.vh only check the hand-written frames, one
+# $display per bit. This pass checks every cycle of a capture at once with array ops:
+# each cycle gets its frame bit (from the decoded FrameTable) and thereby who should own
+# SWDIO, then every rule is a boolean mask over cycles; consecutive cycles failing the
+# same rule collapse into one row of the violation table.
+#
+# Rules (cycle = posedge to next posedge):
+#   x           SWDIO is X at any time inside the cycle
+#   contention  target drives (tb_en=1) while the wire is X or disagrees with tb_val,
+#               i.e. a second driver (the probe) is on the line
+#   undriven    SWDIO is Z just before the sampling edge of a host bit (posedge; REQ, WRITE data,
+#               RAW mode) or of a target bit (negedge; ACK, READ data/parity)
+#   turn1       TURN1 (bit 10) not released: target enabled or SWDIO not Z at posedge
+#   ta2         TA2 not released: WRITE bit 14 with the target enabled or X on the line,
+#               READ bit 47 with the target enabled or SWDIO not Z after its posedge
+#   margin      SWDIO changes closer than min_margin to the sampling edge of a host or
+#               target bit (setup: last change at/before the edge, hold: next change);
+#               on the park bit (bit 9) a release to Z is not a change: the probe lets go
+#               of the line on that very posedge, and a release before it is `undriven`
+
+import numpy as np
+
+from swd_decode import ACK_OK, FRAME_BITS, SAMPLE_EPS
+from vcd_signal import V_0, V_1, V_X, V_Z, as_signal
+from vcd_sweep import sweep
+
+RULES = ("x", "contention", "undriven", "turn1", "ta2", "margin")
+
+# expected owner of SWDIO per frame bit
+OWN_NONE, OWN_HOST, OWN_TARGET = 0, 1, 2
+
+def bit_owner(rnw_read, ack_ok):
+    """(k, 48) owner codes for k frames; host bits sample at posedge, target bits at negedge."""
+    k = rnw_read.size
+    own = np.zeros((k, FRAME_BITS), dtype=np.int8)
+    own[:, 0:10] = OWN_HOST                         # PAD + REQ
+    own[:, 11:14] = OWN_TARGET                      # ACK
+    rd = rnw_read & ack_ok
+    own[rd, 14:47] = OWN_TARGET                     # READ data + parity
+    own[~rnw_read, 15:48] = OWN_HOST                # WRITE data + parity (probe drives from bit 15 on)
+    return own
+
+# ===== Cycle geometry =====
+def cycle_frame_bits(n, starts):
+    """Per cycle: (frame index, bit 0..47), -1 outside decoded frames (a later frame wins)."""
+    frame = np.full(n, -1, dtype=np.int64)
+    bit = np.full(n, -1, dtype=np.int8)
+    if starts.size:
+        idx = starts[:, None] + np.arange(FRAME_BITS)[None, :]
+        ok = idx < n
+        frame[idx[ok]] = np.broadcast_to(np.arange(starts.size)[:, None], idx.shape)[ok]
+        bit[idx[ok]] = np.broadcast_to(np.arange(FRAME_BITS, dtype=np.int8)[None, :], idx.shape)[ok]
+    return frame, bit
+
+def cycles_hit(t, cond, pos, t_end):
+    """
+    Cycles overlapping any interval [t[i], t[i+1]) where cond[i] holds (the last row lasts
+    until t_end). Cycle c spans [pos[c], pos[c+1]); the last one ends at t_end.
+    """
+    n = pos.size
+    hit = np.zeros(n + 1, dtype=np.int32)
+    rows = np.flatnonzero(cond)
+    if not n or not rows.size:
+        return hit[:n] > 0
+    t1 = np.append(t[1:], max(int(t_end), int(t[-1]) + 1))
+    a, b = t[rows], t1[rows]
+    c0 = np.maximum(np.searchsorted(pos, a, side="right") - 1, 0)
+    c1 = np.searchsorted(pos, b, side="left") - 1  # cycle holding the instant just before b
+    keep = (c1 >= 0) & (c1 >= c0)
+    np.add.at(hit, c0[keep], 1)
+    np.add.at(hit, c1[keep] + 1, -1)
+    return np.cumsum(hit[:n]) > 0
+
+def edge_margins(sig, edges, releases=True):
+    """
+    (setup, hold) per edge time: distance to the last change at/before it and to the next.
+    releases=False skips the changes to Z.
+    """
+    sig = sig.compress()
+    t = sig.t if releases else sig.t[sig.v != V_Z]
+    big = np.iinfo(np.int64).max
+    if not t.size:
+        return np.full(edges.shape, big), np.full(edges.shape, big)
+    i = np.searchsorted(t, edges, side="right")
+    setup = np.where(i > 0, edges - t[np.maximum(i - 1, 0)], big)
+    hold = np.where(i < t.size, t[np.minimum(i, t.size - 1)] - edges, big)
+    return setup, hold
+
+# ===== Violation table =====
+class ViolationTable:
+    """
+    One row per run of consecutive cycles failing the same rule:
+      rule        index into RULES
+      cycle, ncycles, t
+      frame, bit  position of the run's first cycle (-1 outside decoded frames)
+      worst       margin rule: smallest setup/hold in the run; others: -1
+    """
+
+    COLUMNS = ("rule", "cycle", "ncycles", "t", "frame", "bit", "worst")
+
+    def __init__(self, cols, n_cycles):
+        for k in self.COLUMNS:
+            setattr(self, k, cols[k])
+        self.n_cycles = n_cycles
+
+    def __len__(self):
+        return int(self.rule.size)
+
+    def rule_name(self, i):
+        return RULES[int(self.rule[i])]
+
+    def counts(self):
+        """{rule: (runs, cycles)} for the rules that fired."""
+        out = {}
+        for r, name in enumerate(RULES):
+            m = self.rule == r
+            if m.any():
+                out[name] = (int(m.sum()), int(self.ncycles[m].sum()))
+        return out
+
+    def columns(self):
+        return {k: getattr(self, k) for k in self.COLUMNS}
+
+    def row_text(self, i):
+        where = f"frame#{self.frame[i]} bit {self.bit[i]}" if self.frame[i] >= 0 else "outside frames"
+        worst = f" worst={self.worst[i]}" if self.worst[i] >= 0 else ""
+        return (f"{self.rule_name(i):<10} cycle={self.cycle[i]} n={self.ncycles[i]} t={self.t[i]} "
+                f"({where}){worst}")
+
+    def write_csv(self, path):
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(",".join(self.COLUMNS) + "\n")
+            for i in range(len(self)):
+                fh.write(",".join([self.rule_name(i)] + [str(int(getattr(self, k)[i])) for k in self.COLUMNS[1:]])
+                         + "\n")
+
+def _runs(mask):
+    """(first index, length) of the runs of True in mask."""
+    d = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    s = np.flatnonzero(d == 1)
+    return s, np.flatnonzero(d == -1) - s
+
+def check_capture(cs, frames, swdio, tb_en=None, tb_val=None, min_margin=1e-12, tick_s=1e-12, t_end=None):
+    """
+    cs: CycleSamples, frames: FrameTable over cs, swdio/tb_en/tb_val: Signal (or tv).
+    min_margin: smallest accepted edge-to-change distance in seconds (0 disables), rounded up
+    to whole time units of tick_s seconds; the table's t / worst are in time units.
+    """
+    pos, neg = cs.pos, cs.neg
+    n = int(pos.size)
+    swdio = as_signal(swdio)
+    tb_en = as_signal(tb_en) if tb_en else None
+    tb_val = as_signal(tb_val) if tb_val else None
+    if t_end is None:
+        ends = [int(neg[-1]) if n else 0] + [int(s.t_last) for s in (swdio, tb_en, tb_val) if s]
+        t_end = max(ends) + 1
+
+    frame, bit = cycle_frame_bits(n, np.asarray(frames.start_idx, dtype=np.int64))
+    in_fr = bit >= 0
+    own = np.zeros(n, dtype=np.int8)
+    if len(frames):
+        owners = bit_owner(frames.rnw == V_1, frames.ack == ACK_OK)
+        own[in_fr] = owners[frame[in_fr], bit[in_fr]]
+    if cs.rst_pos is not None:
+        own[cs.rst_pos.is_code(V_0) & ~in_fr] = OWN_HOST  # RAW mode: the probe passes MOSI through
+    host, target = own == OWN_HOST, own == OWN_TARGET
+    is_read = np.zeros(n, dtype=bool)
+    if len(frames):
+        is_read[in_fr] = (frames.rnw == V_1)[frame[in_fr]]
+
+    # driven bits are judged on the value set up before their sampling edge (what a
+    # synchronous sampler sees; a change exactly at the edge is the margin rule's
+    # business), turnarounds on the value after the posedge that starts them (the
+    # negedge closing a frame may already arm the next one)
+    pre_pos, pre_neg = swdio.codes_at(pos - SAMPLE_EPS), swdio.codes_at(neg - SAMPLE_EPS)
+    post_pos = swdio.codes_at(pos + SAMPLE_EPS)
+    en_pos = tb_en.codes_at(pos + SAMPLE_EPS) if tb_en else np.full(n, V_0, dtype=np.uint8)
+
+    masks = {}
+    masks["x"] = cycles_hit(swdio.t, swdio.v == V_X, pos, t_end)
+    if tb_en and tb_val:
+        sw = sweep(dict(en=tb_en, val=tb_val, swdio=swdio))
+        drives = sw.en == V_1
+        clash = (sw.swdio == V_X) | ((sw.swdio <= V_1) & (sw.val <= V_1) & (sw.swdio != sw.val))
+        masks["contention"] = cycles_hit(sw.t, drives & clash, pos, t_end)
+    else:
+        masks["contention"] = np.zeros(n, dtype=bool)
+    masks["undriven"] = (host & (pre_pos == V_Z)) | (target & (pre_neg == V_Z))
+    masks["turn1"] = (bit == 10) & ((en_pos == V_1) | (post_pos != V_Z))
+    masks["ta2"] = (((bit == 14) & ~is_read & ((en_pos == V_1) | (post_pos == V_X)))
+                    | ((bit == 47) & is_read & ((en_pos == V_1) | (post_pos != V_Z))))
+
+    worst = np.full(n, -1, dtype=np.int64)
+    if min_margin > 0 and n:
+        ticks = max(1, int(np.ceil(min_margin / tick_s - 1e-6)))
+        edge = np.where(target, neg, pos)
+        setup, hold = edge_margins(swdio, edge)
+        m = np.minimum(setup, hold)
+        park = np.flatnonzero(bit == 9)
+        if park.size:
+            setup, hold = edge_margins(swdio, edge[park], releases=False)
+            m[park] = np.minimum(setup, hold)
+        masks["margin"] = (host | target) & (m < ticks)
+        worst = np.where(masks["margin"], m, -1)
+    else:
+        masks["margin"] = np.zeros(n, dtype=bool)
+
+    parts = []
+    for r, name in enumerate(RULES):
+        s, ln = _runs(masks[name])
+        if not s.size:
+            continue
+        w = np.full(s.size, -1, dtype=np.int64)
+        if name == "margin":
+            w = np.minimum.reduceat(np.where(worst >= 0, worst, np.iinfo(np.int64).max), s)
+        parts.append((np.full(s.size, r, dtype=np.int8), s, ln, w))
+    if parts:
+        rule, cyc, ln, w = (np.concatenate(c) for c in zip(*parts))
+        order = np.lexsort((rule, cyc))
+        rule, cyc, ln, w = rule[order], cyc[order], ln[order], w[order]
+    else:
+        rule = np.zeros(0, dtype=np.int8)
+        cyc = ln = w = np.zeros(0, dtype=np.int64)
+    cols = dict(rule=rule, cycle=cyc.astype(np.int64), ncycles=ln.astype(np.int64),
+                t=pos[cyc] if cyc.size else np.zeros(0, dtype=np.int64),
+                frame=frame[cyc] if cyc.size else np.zeros(0, dtype=np.int64),
+                bit=bit[cyc].astype(np.int64) if cyc.size else np.zeros(0, dtype=np.int64),
+                worst=w.astype(np.int64))
+    return ViolationTable(cols, n)
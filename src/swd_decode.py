@@ -0,0 +1,323 @@
+# swd_decode.py — whole-capture SWD transaction decoder (vectorized, cycle based)
+# All nets are sampled once per SCK cycle (MOSI/rnw/rst_n at posedge+eps, SWDIO/tb_en/
+# tb_val at negedge+eps). Every candidate start index is then scored in one pass by
+# correlating per-cycle features against the PAD/TURN1/ACK pattern, and the per-frame
+# REQ/ACK/DATA/PAR decode runs over all accepted frames at once, as word-level field
+# reads on the packed bitplanes the per-cycle samples are kept in (vcd_bitplane).
+
+from bisect import bisect_right
+
+import numpy as np
+
+from vcd_bitplane import BitPlanes, popcount64
+from vcd_profile import count, stage
+from vcd_signal import V_0, V_1, V_X, V_Z, VAL_CHARS, as_signal
+
+SAMPLE_EPS = 1  # avoid sampling exactly at transition timestamp
+FRAME_BITS = 48
+
+# ack code = b0 | b1<<1 | b2<<2 (LSB-first on the wire); printed as "b2b1b0"
+ACK_OK    = 0b001
+ACK_WAIT  = 0b010
+ACK_FAULT = 0b100
+ACK_VALID = (ACK_OK, ACK_WAIT, ACK_FAULT)
+
+# ===== Bit helpers =====
+def bits_lsb_first_to_int(bit_list):
+    if not bit_list or any(b not in ('0','1') for b in bit_list):
+        return 0, False
+    return int("".join(reversed(bit_list)), 2), True
+
+def parity_even_32(v):
+    """Works on an int or on a uint array of words."""
+    p = popcount64(np.asarray(v, dtype=np.uint64) & np.uint64(0xFFFFFFFF)) & np.uint64(1)
+    return int(p) if np.ndim(p) == 0 else p
+
+def codes_to_int(codes):
+    """(k, w) code matrix, LSB first -> (values uint64, all_bits_known bool)."""
+    codes = np.asarray(codes)
+    ok = (codes <= V_1).all(axis=1)
+    w = np.uint64(1) << np.arange(codes.shape[1], dtype=np.uint64)
+    vals = ((codes == V_1).astype(np.uint64) * w).sum(axis=1, dtype=np.uint64)
+    return np.where(ok, vals, np.uint64(0)), ok
+
+# ===== SCK cycle table =====
+def sck_cycle_arrays(tv_sck):
+    """(posedge_times, negedge_times) int64 arrays; a cycle is a rise followed by its fall."""
+    sig = as_signal(tv_sck)
+    empty = np.zeros(0, dtype=np.int64)
+    if len(sig) < 2:
+        return empty, empty
+    t, v = sig.t, sig.v
+    prev, cur = v[:-1], v[1:]
+    rise = (cur == V_1) & (prev != V_1)
+    fall = (cur == V_0) & (prev == V_1)
+    ev = np.flatnonzero(rise | fall) + 1
+    if not ev.size:
+        return empty, empty
+    ev_rise = v[ev] == V_1
+    # a fall closes a cycle only when the event right before it is a rise
+    k = np.flatnonzero(~ev_rise[1:] & ev_rise[:-1]) + 1
+    return t[ev[k - 1]], t[ev[k]]
+
+def as_cycle_arrays(cycles):
+    if isinstance(cycles, tuple) and len(cycles) == 2 and isinstance(cycles[0], np.ndarray):
+        return cycles
+    arr = np.asarray(cycles, dtype=np.int64).reshape(-1, 2)
+    return arr[:, 0].copy(), arr[:, 1].copy()
+
+# ===== Per-cycle samples =====
+class CycleSamples:
+    """
+    One entry per SCK cycle, each column packed as BitPlanes (2 bits per cycle):
+      mosi_pos / rnw_pos / rst_pos : codes at posedge+eps
+      swdio_neg / tb_en_neg        : codes at negedge+eps
+      tgt_neg                      : target bit (SWDIO, or tb_val while tb_en=1 and SWDIO is not 0/1)
+    Optional nets that are absent stay None. Codes are read back with .at(idx) /
+    .is_code(c) / .known() / .field(); no uint8 code array is kept.
+    """
+
+    def __init__(self, cycles, mosi, swdio, rnw=None, rst_n=None, tb_en=None, tb_val=None):
+        self.pos, self.neg = as_cycle_arrays(cycles)
+        tp = self.pos + SAMPLE_EPS
+        tn = self.neg + SAMPLE_EPS
+
+        self.mosi_pos = BitPlanes.sample(mosi, tp)
+        self.rnw_pos = BitPlanes.sample(rnw, tp) if rnw else None
+        self.rst_pos = BitPlanes.sample(rst_n, tp) if rst_n else None
+        swdio_neg = as_signal(swdio).codes_at(tn)
+        self.swdio_neg = BitPlanes.from_codes(swdio_neg)
+        self.tb_en_neg = None
+        self.tgt_neg = self.swdio_neg
+        if tb_en:
+            tb_en_neg = as_signal(tb_en).codes_at(tn)
+            self.tb_en_neg = BitPlanes.from_codes(tb_en_neg)
+            if tb_val:
+                tb_val_neg = as_signal(tb_val).codes_at(tn)
+                use_tb = (swdio_neg > V_1) & (tb_en_neg == V_1) & (tb_val_neg <= V_1)
+                self.tgt_neg = BitPlanes.from_codes(np.where(use_tb, tb_val_neg, swdio_neg))
+
+    def __len__(self):
+        return int(self.pos.size)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the packed columns (the pos/neg cycle table not included)."""
+        cols = {id(p): p for p in (self.mosi_pos, self.rnw_pos, self.rst_pos, self.swdio_neg,
+                                   self.tb_en_neg, self.tgt_neg) if p is not None}
+        return sum(p.nbytes for p in cols.values())
+
+    def t_edge(self, start_idx, bit_idx):
+        if bit_idx <= FRAME_BITS - 1:
+            return int(self.pos[start_idx + bit_idx])
+        return int(self.neg[start_idx + FRAME_BITS - 1])
+
+# ===== Frame scoring (all start indices at once) =====
+def _window(a, off, m):
+    return a[off:off + m]
+
+def frame_scores(cs):
+    """
+    Score every start index s in [0, n-48] at once. Per-cycle features are correlated
+    against the alignment pattern (same weights as the former per-frame frame_score):
+      PAD[0..1]  MOSI==0           +1 each
+      TURN1[10]  SWDIO==Z          +2   (else tb_en==0: +1)
+      ACK[11..13] valid OK/WAIT/FAULT +8, each bit 0/1 +1
+    Returns (scores int16[m], ack_codes int16[m]) with ack_code=-1 if any ACK bit is x/z.
+    """
+    n = len(cs)
+    m = n - FRAME_BITS + 1
+    if m <= 0:
+        return np.zeros(0, dtype=np.int16), np.zeros(0, dtype=np.int16)
+
+    pad0 = cs.mosi_pos.is_code(V_0).astype(np.int16)
+    known_b = cs.tgt_neg.known()
+    one_b = cs.tgt_neg.is_code(V_1)
+    z = cs.swdio_neg.is_code(V_Z)
+    turn = np.where(z, 2, 0).astype(np.int16)
+    if cs.tb_en_neg is not None:
+        turn[~z & cs.tb_en_neg.is_code(V_0)] = 1
+
+    score = np.zeros(m, dtype=np.int16)
+    known = known_b.astype(np.int16)
+    for feat, offs in ((pad0, (0, 1)), (turn, (10,)), (known, (11, 12, 13))):
+        for off in offs:
+            score += _window(feat, off, m)
+
+    all_known = _window(known_b, 11, m) & _window(known_b, 12, m) & _window(known_b, 13, m)
+    ack = np.zeros(m, dtype=np.int16)
+    for j, off in enumerate((11, 12, 13)):
+        ack |= _window(one_b, off, m).astype(np.int16) << j
+    ack = np.where(all_known, ack, -1).astype(np.int16)
+    score += np.where(np.isin(ack, ACK_VALID), 8, 0).astype(np.int16)
+    return score, ack
+
+def _rst_high_mask(cs, m):
+    """True where rst_n is 1 on every posedge of the 48-cycle window starting there."""
+    low = (~cs.rst_pos.is_code(V_1)).astype(np.int64)
+    c = np.concatenate(([0], np.cumsum(low)))
+    return (c[FRAME_BITS:FRAME_BITS + m] - c[:m]) == 0
+
+def rst_slots(cs, scores, rst_rises, max_shift=32, min_score=8, after=0):
+    """
+    align_after_rst() plus, per start, the index of the first rise that competed for it.
+    Frames never overlap: each window begins at the end of the last accepted frame (or
+    `after`). When the best start of a rise's full window falls inside the last accepted
+    frame, the higher score keeps the slot (a tie keeps the earlier frame).
+    """
+    m = scores.size
+    starts, src = [], []
+    pos = cs.pos
+    nxt = after
+    for r, t0 in enumerate(rst_rises):
+        base = int(np.searchsorted(pos, t0, side="right"))
+        hi = min(base + max_shift, m)
+        if base >= hi:
+            continue
+        if starts and base < nxt:
+            c = base + int(scores[base:hi].argmax())
+            prev_end = starts[-2] + FRAME_BITS if len(starts) > 1 else after
+            if prev_end <= c < nxt and scores[c] > scores[starts[-1]]:
+                starts[-1], nxt = c, c + FRAME_BITS
+                continue
+        lo = max(base, nxt)
+        if lo >= hi:
+            continue
+        s = lo + int(scores[lo:hi].argmax())
+        if scores[s] >= min_score:
+            starts.append(s)
+            src.append(r)
+            nxt = s + FRAME_BITS
+    return np.asarray(starts, dtype=np.int64), np.asarray(src, dtype=np.int64)
+
+def align_after_rst(cs, scores, rst_rises, max_shift=32, min_score=8, after=0):
+    """Best start within max_shift cycles after each rst_n rise, non-overlapping (see rst_slots)."""
+    return rst_slots(cs, scores, rst_rises, max_shift, min_score, after)[0]
+
+def align_scan(cs, scores, min_score=8):
+    """
+    Whole-capture scan: non-overlapping frames, left to right. From each candidate
+    the best-scoring start inside the next 48 cycles is taken, then the scan resumes
+    after that frame. With rst_n present, windows with rst_n low are excluded.
+    """
+    m = scores.size
+    if not m:
+        return np.zeros(0, dtype=np.int64)
+    ok = scores >= min_score
+    if cs.rst_pos is not None:
+        ok &= _rst_high_mask(cs, m)
+    sc = np.where(ok, scores, -1)
+    cand = np.flatnonzero(ok).tolist()
+    starts = []
+    i, nxt = 0, 0
+    while i < len(cand):
+        s0 = cand[i]
+        if s0 < nxt:
+            i = bisect_right(cand, nxt - 1, i)
+            continue
+        s = s0 + int(sc[s0:s0 + FRAME_BITS].argmax())
+        starts.append(s)
+        nxt = s + FRAME_BITS
+        i = bisect_right(cand, nxt - 1, i)
+    return np.asarray(starts, dtype=np.int64)
+
+def align_frames(cs, scores, rst_rises=None, align="auto", max_shift=32, min_score=8):
+    if align == "rst" or (align == "auto" and rst_rises is not None and len(rst_rises)):
+        return align_after_rst(cs, scores, rst_rises if rst_rises is not None else [], max_shift, min_score)
+    return align_scan(cs, scores, min_score)
+
+# ===== Frame table (vectorized REQ/ACK/DATA/PAR decode) =====
+class FrameTable:
+    """
+    Columnar decode of accepted frames; row i describes frame #i.
+      start_idx, start_t, score        alignment
+      rnw                              code ('1'=READ, '0'=WRITE, x unknown)
+      req, req_ok                      8-bit request from MOSI @posedge bits 2..9
+      ack_bits (k,3), ack, ack_str     target bits 11..13; ack=-1 if any bit x/z
+      data, data_ok                    READ: target bits 14..45, WRITE: MOSI bits 15..46
+      par_bit, par_ok, par_verdict     'OK' / 'ERR' / '?'
+      tail_bit                         READ only: target bit 47
+    """
+
+    COLUMNS = ("start_t", "start_idx", "rnw", "req", "ack", "data", "par_ok", "score")
+
+    def __init__(self, cs, starts, scores, mode="auto"):
+        starts = np.asarray(starts, dtype=np.int64)
+        k = starts.size
+        self.start_idx = starts
+        self.start_t = cs.pos[starts] if k else np.zeros(0, dtype=np.int64)
+        self.score = scores[starts] if k else np.zeros(0, dtype=np.int16)
+
+        if mode == "read":
+            self.rnw = np.full(k, V_1, dtype=np.uint8)
+        elif mode == "write":
+            self.rnw = np.full(k, V_0, dtype=np.uint8)
+        elif cs.rnw_pos is not None and k:
+            r = cs.rnw_pos.at(starts)
+            self.rnw = np.where(r <= V_1, r, V_X).astype(np.uint8)
+        else:
+            self.rnw = np.full(k, V_X, dtype=np.uint8)
+
+        host, tgt = cs.mosi_pos, cs.tgt_neg
+        req, self.req_ok = host.field(starts + 2, 8)
+        self.req = req.astype(np.uint8)
+
+        self.ack_bits = tgt.at(starts[:, None] + np.arange(11, 14)[None, :])
+        ack, ack_known = tgt.field(starts + 11, 3)
+        self.ack = np.where(ack_known, ack.astype(np.int16), -1).astype(np.int16)
+        ack_ok = self.ack == ACK_OK
+
+        is_read = self.rnw == V_1
+        rd_data, rd_ok = tgt.field(starts + 14, 32)
+        wr_data, wr_ok = host.field(starts + 15, 32)
+        self.data = np.where(is_read, rd_data, wr_data).astype(np.uint32)
+        self.data_ok = np.where(is_read, rd_ok, wr_ok)
+
+        if k:
+            self.par_bit = np.where(is_read, tgt.at(starts + 46), host.at(starts + 47)).astype(np.uint8)
+            self.tail_bit = np.where(is_read, tgt.at(starts + 47), V_X).astype(np.uint8)
+        else:
+            self.par_bit = np.zeros(0, dtype=np.uint8)
+            self.tail_bit = np.zeros(0, dtype=np.uint8)
+        par_calc = parity_even_32(self.data)
+        par_known = self.par_bit <= V_1
+        checked = ack_ok & self.data_ok & par_known
+        self.par_ok = checked & (self.par_bit == par_calc)
+        self.par_verdict = np.where(self.par_ok, "OK", np.where(checked, "ERR", "?"))
+
+    def __len__(self):
+        return int(self.start_idx.size)
+
+    def ack_str(self, i):
+        b0, b1, b2 = (VAL_CHARS[c] for c in self.ack_bits[i].tolist())
+        return f"{b2}{b1}{b0}"
+
+    def verdict(self, i):
+        kind = "READ" if self.rnw[i] == V_1 else "WRITE"
+        ack = int(self.ack[i])
+        if ack == ACK_OK:
+            return f"{kind}_OK"
+        if ack in (ACK_WAIT, ACK_FAULT):
+            return f"{kind}_WAIT/FAULT"
+        return f"{kind}(?)"
+
+    def summary(self, i):
+        """Same one-line summary the frame PNGs have always carried."""
+        ack_ok = int(self.ack[i]) == ACK_OK
+        data_ok = bool(self.data_ok[i])
+        rnw = VAL_CHARS[int(self.rnw[i])]
+        req_txt = f"0x{int(self.req[i]):02X}" if self.req_ok[i] else "—"
+        data_txt = f"0x{int(self.data[i]):08X}" if (ack_ok and data_ok) else "—"
+        par_txt = f"{VAL_CHARS[int(self.par_bit[i])]}/{self.par_verdict[i]}"
+        tail_txt = f" TAIL={VAL_CHARS[int(self.tail_bit[i])]}" if rnw == '1' else ""
+        return (f"RNW={rnw} REQ={req_txt} ACK={self.ack_str(i)} {self.verdict(i)} "
+                f"DATA={data_txt} PAR={par_txt}{tail_txt}")
+
+def decode_capture(cs, rst_rises=None, align="auto", mode="auto", max_shift=32, min_score=8):
+    with stage("align"):
+        scores, _ = frame_scores(cs)
+        starts = align_frames(cs, scores, rst_rises, align, max_shift, min_score)
+    with stage("frame_table"):
+        frames = FrameTable(cs, starts, scores, mode)
+    count("frames", len(frames))
+    return frames
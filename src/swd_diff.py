@@ -0,0 +1,317 @@
+# swd_diff.py — golden-capture diff on decoded transactions
+# Both captures are decoded (through the parse cache; a --decode-only *_frames.npz export
+# is taken as is, so a golden capture need only be decoded once) and every frame becomes
+# one exact 64-bit fingerprint: RNW, REQ, ACK, DATA (when shown), parity verdict and the
+# idle cycles since the previous frame. Timing is counted in SCK cycles, so a different timescale or
+# slightly shifted edges do not register as a difference. The two fingerprint streams are
+# aligned with Myers' greedy diff (O((N+M)·D) for D edits) after stripping the common
+# prefix/suffix; runs of equal frames ("snakes") are compared as array slices, so similar
+# million-frame captures align in well under a second. Only the first divergence and the
+# totals are printed (all hunks go to a CSV); the frames of the first divergences are
+# rendered zoomed from the signals of just their span, one PNG per differing frame and side.
+#
+#   python swd_diff.py golden/swd_read.vcd new/swd_read.vcd
+#   python swd_diff.py golden_frames.npz new.fst --no-timing --render 3
+
+from pathlib import Path
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from swd_capture import Capture, build_lanes
+from swd_decode import ACK_OK, FRAME_BITS
+from swd_export import PAR_CODE, frame_columns
+from vcd_signal import as_signal
+from vcd_to_png import frame_job, open_cache, plot_frame
+
+MAX_EDITS = 2000
+GAP_MAX = (1 << 14) - 1
+
+# ===== Fingerprints =====
+# bit layout (LSB first): data 32 | req 8 | req_ok 1 | data shown 1 | ack+1 4 | rnw+1 2 | par+1 2 | gap 14
+FIELDS = (("data", 0, 32), ("req", 32, 8), ("req_ok", 40, 1), ("data_ok", 41, 1), ("ack", 42, 4),
+          ("rnw", 46, 2), ("par", 48, 2), ("gap", 50, 14))
+
+def fingerprints(cols, timing=True):
+    """
+    uint64 per frame from the export columns (swd_export.frame_columns / a frames .npz);
+    equal fingerprints = identical transactions (exact packing, no hash).
+    """
+    start_idx = np.asarray(cols["start_idx"], dtype=np.int64)
+    k = start_idx.size
+    ack = np.asarray(cols["ack"], dtype=np.int64)
+    shown = np.asarray(cols["data_ok"], dtype=bool) & (ack == ACK_OK)  # DATA as the frame summary shows it
+    req_ok = np.asarray(cols["req_ok"], dtype=bool)
+    gap = np.zeros(k, dtype=np.int64)
+    if timing and k > 1:
+        gap[1:] = np.clip(np.diff(start_idx) - FRAME_BITS, 0, GAP_MAX)
+    fields = dict(data=np.where(shown, cols["data"], 0), req=np.where(req_ok, cols["req"], 0),
+                  req_ok=req_ok, data_ok=shown, ack=ack + 1, rnw=np.asarray(cols["rnw"], dtype=np.int64) + 1,
+                  par=np.asarray(cols["par"], dtype=np.int64) + 1, gap=gap)
+    fp = np.zeros(k, dtype=np.uint64)
+    for name, shift, _ in FIELDS:
+        fp |= np.asarray(fields[name]).astype(np.uint64) << np.uint64(shift)
+    return fp
+
+def unpack(fp):
+    """Fingerprint -> {field: int}."""
+    fp = int(fp)
+    return {name: (fp >> shift) & ((1 << width) - 1) for name, shift, width in FIELDS}
+
+def field_text(name, v):
+    if name == "data":
+        return f"0x{v:08X}"
+    if name == "req":
+        return f"0x{v:02X}"
+    if name == "ack":
+        return f"{v - 1:03b}" if v else "?"
+    if name == "rnw":
+        return "x01"[v]
+    if name == "par":
+        return {c + 1: s for s, c in PAR_CODE.items()}[v]
+    return str(v)
+
+def frame_text(fp):
+    """RNW/REQ/ACK/DATA/PAR/GAP of one fingerprint."""
+    f = unpack(fp)
+    req = field_text("req", f["req"]) if f["req_ok"] else "—"
+    data = field_text("data", f["data"]) if f["data_ok"] else "—"
+    return (f"RNW={field_text('rnw', f['rnw'])} REQ={req} ACK={field_text('ack', f['ack'])} DATA={data} "
+            f"PAR={field_text('par', f['par'])} GAP={f['gap']}")
+
+def changed_fields(fa, fb):
+    """'DATA 0x..->0x.., GAP 2->5' for the fields that differ between two fingerprints."""
+    a, b = unpack(fa), unpack(fb)
+    return ", ".join(f"{name.upper()} {field_text(name, a[name])}->{field_text(name, b[name])}"
+                     for name, _, _ in FIELDS if a[name] != b[name])
+
+# ===== Alignment =====
+def _common_prefix(a, b):
+    m = min(a.size, b.size)
+    ne = np.flatnonzero(a[:m] != b[:m])
+    return int(ne[0]) if ne.size else m
+
+def _snake(a, b, al, bl, x, y):
+    """Follow equal items from (x, y): scalar check first, then growing vectorized slices."""
+    n, m = len(al), len(bl)
+    if x >= n or y >= m or al[x] != bl[y]:
+        return x
+    step = 64
+    while x < n and y < m:
+        ln = min(step, n - x, m - y)
+        ne = np.flatnonzero(a[x:x + ln] != b[y:y + ln])
+        if ne.size:
+            return x + int(ne[0])
+        x, y = x + ln, y + ln
+        step *= 4
+    return x
+
+def _hunks(ops):
+    """[(kind, x, y)] in forward order ('-' = a[x] deleted, '+' = b[y] inserted) -> [(a0, a1, b0, b1)]."""
+    out = []
+    for kind, x, y in ops:
+        if out and out[-1][1] == x and out[-1][3] == y:
+            a0, a1, b0, b1 = out[-1]
+            out[-1] = (a0, a1 + (kind == "-"), b0, b1 + (kind == "+"))
+        else:
+            out.append((x, x + (kind == "-"), y, y + (kind == "+")))
+    return out
+
+def myers(a, b, max_edits=MAX_EDITS):
+    """Hunks [(a0, a1, b0, b1)] turning a into b with the fewest edits; None past max_edits."""
+    al, bl = a.tolist(), b.tolist()
+    n, m = len(al), len(bl)
+    off = max_edits + 1
+    v = [0] * (2 * off + 1)
+    trace = []
+    for d in range(max_edits + 1):
+        trace.append(v[off - d - 1:off + d + 2])  # state before step d, k = -d-1 .. d+1
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[off + k - 1] < v[off + k + 1]):
+                x = v[off + k + 1]
+            else:
+                x = v[off + k - 1] + 1
+            x = _snake(a, b, al, bl, x, x - k)
+            v[off + k] = x
+            if x >= n and x - k >= m:
+                return _backtrack(trace, n, m)
+    return None
+
+def _backtrack(trace, n, m):
+    ops = []
+    x, y = n, m
+    for d in range(len(trace) - 1, 0, -1):
+        vd = trace[d]  # index k + d + 1
+        k = x - y
+        if k == -d or (k != d and vd[k - 1 + d + 1] < vd[k + 1 + d + 1]):
+            pk = k + 1
+        else:
+            pk = k - 1
+        px = vd[pk + d + 1]
+        ops.append(("+", px, px - pk) if pk == k + 1 else ("-", px, px - pk))  # then a snake to (x, y)
+        x, y = px, px - pk
+    ops.reverse()
+    return _hunks(ops)
+
+def positional(a, b):
+    """Fallback for streams past max_edits: index-by-index mismatches, plus the length difference."""
+    m = min(a.size, b.size)
+    bad = np.concatenate(([False], a[:m] != b[:m], [False])).astype(np.int8)
+    d = np.diff(bad)
+    s, e = np.flatnonzero(d == 1), np.flatnonzero(d == -1)
+    out = [(int(i), int(j), int(i), int(j)) for i, j in zip(s, e)]
+    if a.size != b.size:
+        out.append((m, a.size, m, b.size))
+    return out
+
+def align_streams(a, b, max_edits=MAX_EDITS):
+    """(hunks, exact): common prefix/suffix stripped, Myers on the rest (positional past max_edits)."""
+    p = _common_prefix(a, b)
+    s = _common_prefix(a[p:][::-1], b[p:][::-1])
+    mid_a, mid_b = a[p:a.size - s], b[p:b.size - s]
+    hunks = myers(mid_a, mid_b, max_edits)
+    exact = hunks is not None
+    if not exact:
+        hunks = positional(mid_a, mid_b)
+    return [(a0 + p, a1 + p, b0 + p, b1 + p) for a0, a1, b0, b1 in hunks], exact
+
+# ===== Captures =====
+class Side:
+    """One diff input: a capture decoded here (renderable), or a frames .npz export."""
+
+    def __init__(self, path, explicit=None, cache=None, **kw):
+        self.path = Path(path)
+        self.cap = None
+        if self.path.suffix == ".npz":
+            with np.load(self.path) as z:
+                self.cols = {k: z[k] for k in z.files if not k.startswith("meta_")}
+        else:
+            self.cap = Capture(self.path, explicit, cache, **kw)
+            self.cols = frame_columns(self.cap.frames)
+        self.start_t = self.cols["start_t"]
+
+    def __len__(self):
+        return int(self.start_t.size)
+
+    def info(self):
+        if self.cap is None:
+            return f"{len(self)} frame(s) (decoded export)"
+        return f"{len(self)} frame(s), sck_cycles={self.cap.pos.size}"
+
+def render_frames(cap, rows, outdir: Path, renderer):
+    """Zoomed frame PNG (the usual RAW + zones plot) of each row, from the signals of its span only."""
+    fr, s = cap.frames, cap.signals
+    for i in rows:
+        lo = int(fr.start_idx[i])
+        hi = min(lo + FRAME_BITS, cap.pos.size)
+        pos, neg = cap.pos[lo:hi], cap.neg[lo:hi]
+        w = {role: as_signal(sig).window(int(pos[0]), int(neg[-1])) for role, sig in s.items()}
+        lanes = build_lanes((pos, neg), w["sck"], w["rst_n"], w["rnw"], w["mosi"], w["swdio"], w["tb_en"], w["tb_val"])
+        _, rnw, summary = frame_job(fr, i)
+        plot_frame(cap.out_path, outdir, lanes, list(zip(pos.tolist(), neg.tolist())), 0, rnw, summary,
+                   idx=i, renderer=renderer)
+
+# ===== Report =====
+def _span(lo, hi):
+    return "none" if hi <= lo else (f"{lo}" if hi == lo + 1 else f"{lo}..{hi - 1}")
+
+def hunk_text(h, fa, fb, a, b, show=10):
+    """Header + one line per differing frame (at most `show`) of one divergence."""
+    a0, a1, b0, b1 = h
+    ta = int(a.start_t[a0]) if a0 < len(a) else None
+    tb = int(b.start_t[b0]) if b0 < len(b) else None
+    lines = [f"first divergence: A frame(s) {_span(a0, a1)} (t={ta}) vs B frame(s) {_span(b0, b1)} (t={tb})"]
+    npair = min(a1 - a0, b1 - b0)
+    for j in range(npair):
+        lines.append(f"  A#{a0 + j} vs B#{b0 + j}: {changed_fields(fa[a0 + j], fb[b0 + j])}")
+    for j in range(a0 + npair, a1):
+        lines.append(f"  only in A #{j}: {frame_text(fa[j])}")
+    for j in range(b0 + npair, b1):
+        lines.append(f"  only in B #{j}: {frame_text(fb[j])}")
+    if len(lines) > show + 1:
+        lines = lines[:show + 1] + [f"  ... {len(lines) - show - 1} more frame(s)"]
+    return lines
+
+def write_csv(path, hunks, fa, fb, a, b):
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write("a0,a1,b0,b1,a_t,b_t,changed\n")
+        for a0, a1, b0, b1 in hunks:
+            ta = int(a.start_t[a0]) if a0 < len(a) else -1
+            tb = int(b.start_t[b0]) if b0 < len(b) else -1
+            ch = changed_fields(fa[a0], fb[b0]) if a1 > a0 and b1 > b0 else ""
+            fh.write(f"{a0},{a1},{b0},{b1},{ta},{tb},\"{ch}\"\n")
+
+def run_diff(args, cache=None):
+    """Diff two captures; returns the number of divergent hunks."""
+    explicit = dict(m.split("=", 1) for m in args.map if "=" in m)
+    kw = dict(align=args.align, mode=args.mode, max_shift=args.max_shift, min_score=args.min_score)
+    a, b = (Side(p, explicit, cache, **kw) for p in (args.a, args.b))
+    for tag, side in (("A", a), ("B", b)):
+        print(f"[INFO] {tag} = {side.path}: {side.info()}")
+    t0 = time.perf_counter()
+    fa, fb = (fingerprints(side.cols, timing=not args.no_timing) for side in (a, b))
+    hunks, exact = align_streams(fa, fb, args.max_edits)
+    dt = time.perf_counter() - t0
+    if not exact:
+        print(f"[WARN] more than {args.max_edits} edits: remaining frames compared position by position")
+
+    only_a = sum(max(0, (a1 - a0) - (b1 - b0)) for a0, a1, b0, b1 in hunks)
+    only_b = sum(max(0, (b1 - b0) - (a1 - a0)) for a0, a1, b0, b1 in hunks)
+    changed = sum(min(a1 - a0, b1 - b0) for a0, a1, b0, b1 in hunks)
+    same = len(fa) - only_a - changed
+    print(f"[DIFF] {same} equal frame(s), {len(hunks)} divergence(s): {changed} changed, "
+          f"{only_a} only in A, {only_b} only in B (aligned in {dt * 1e3:.1f} ms)")
+    if not hunks:
+        print("[OK] captures match")
+        return 0
+
+    for line in hunk_text(hunks[0], fa, fb, a, b):
+        print(f"[DIFF] {line}")
+    outdir = Path(args.outdir) / "diff"
+    outdir.mkdir(parents=True, exist_ok=True)
+    out = outdir / f"{a.path.stem}_vs_{b.path.stem}.csv"
+    write_csv(out, hunks, fa, fb, a, b)
+    print(f"[OK] DIFF {len(hunks)} divergence(s) -> {out}")
+
+    for a0, a1, b0, b1 in hunks[:args.render]:
+        for side, lo, hi, sub in ((a, a0, a1, "a"), (b, b0, b1, "b")):
+            if side.cap is not None:
+                render_frames(side.cap, range(lo, min(hi, lo + args.render_frames)), outdir / sub, args.renderer)
+    return len(hunks)
+
+# ===== Main =====
+def main():
+    ap = argparse.ArgumentParser(description="Diff two SWD captures transaction by transaction.")
+    ap.add_argument("a", help="golden capture (VCD / FST, or a --decode-only *_frames.npz)")
+    ap.add_argument("b", help="capture under test (VCD / FST, or a --decode-only *_frames.npz)")
+    ap.add_argument("--outdir", default="vcd_png", help="CSV + frame PNGs go to <outdir>/diff/")
+    ap.add_argument("--map", action="append", default=[],
+                    help="explicit net mapping for both captures (as vcd_to_png.py --map)")
+    ap.add_argument("--mode", choices=("auto", "read", "write"), default="auto")
+    ap.add_argument("--align", choices=("auto", "rst", "scan"), default="auto")
+    ap.add_argument("--max_shift", type=int, default=32, help="alignment search shift (cycles)")
+    ap.add_argument("--min_score", type=int, default=8, help="minimum frame score")
+    ap.add_argument("--no-timing", dest="no_timing", action="store_true",
+                    help="ignore the idle cycles between frames (compare transaction content only)")
+    ap.add_argument("--max-edits", dest="max_edits", type=int, default=MAX_EDITS,
+                    help="edit budget of the alignment; beyond it the rest is compared position by position")
+    ap.add_argument("--render", type=int, default=1,
+                    help="divergences whose frames are rendered (0 = none; not for .npz inputs)")
+    ap.add_argument("--render-frames", dest="render_frames", type=int, default=4,
+                    help="frames rendered per divergence and side")
+    ap.add_argument("--renderer", choices=("matplotlib", "raster"), default="matplotlib")
+    ap.add_argument("--cache", default=".vcd_cache", help="parse cache directory")
+    ap.add_argument("--cache-max-mb", dest="cache_max_mb", type=int, default=1024)
+    ap.add_argument("--no-cache", dest="no_cache", action="store_true")
+    args = ap.parse_args()
+
+    for p in (args.a, args.b):
+        if not Path(p).is_file():
+            ap.error(f"no such capture: {p}")
+    n = run_diff(args, open_cache(args))
+    sys.exit(1 if n else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# swd_export.py — columnar export of decoded SWD frames (one row per frame)
+# .npz is the primary format (compact, typed, loads with np.load); CSV/JSONL are
+# optional human/tool-friendly views of the same columns. FrameWriter appends frames as
+# they are decoded (--follow): text rows are streamed, npz columns written on close.
+
+import csv
+import json
+from pathlib import Path
+
+import numpy as np
+
+from vcd_signal import V_0, V_1
+
+EXPORT_FORMATS = ("npz", "csv", "jsonl")
+
+CSV_FIELDS = ("start_t", "start_idx", "rnw", "req", "ack", "data", "par", "score")
+
+COLUMN_DTYPES = dict(start_t=np.int64, start_idx=np.int64, rnw=np.int8, req=np.uint8, req_ok=bool,
+                     ack=np.int16, data=np.uint32, data_ok=bool, par=np.int8, score=np.int16)
+
+# par verdict codes in the npz: 1=OK, 0=ERR, -1=not checkable ('?')
+PAR_CODE = {"OK": 1, "ERR": 0, "?": -1}
+
+def frame_columns(frames):
+    """
+    FrameTable -> dict of typed column arrays:
+      start_t int64, start_idx int64, rnw int8 (1/0, -1=unknown), req uint8, req_ok bool,
+      ack int16 (b0|b1<<1|b2<<2, -1 if any bit x/z), data uint32, data_ok bool,
+      par int8 (PAR_CODE), score int16
+    """
+    rnw = np.where(frames.rnw == V_1, 1, np.where(frames.rnw == V_0, 0, -1)).astype(np.int8)
+    par = np.where(frames.par_ok, 1, np.where(frames.par_verdict == "ERR", 0, -1)).astype(np.int8)
+    return dict(
+        start_t=np.asarray(frames.start_t, dtype=np.int64),
+        start_idx=np.asarray(frames.start_idx, dtype=np.int64),
+        rnw=rnw,
+        req=np.asarray(frames.req, dtype=np.uint8),
+        req_ok=np.asarray(frames.req_ok, dtype=bool),
+        ack=np.asarray(frames.ack, dtype=np.int16),
+        data=np.asarray(frames.data, dtype=np.uint32),
+        data_ok=np.asarray(frames.data_ok, dtype=bool),
+        par=par,
+        score=np.asarray(frames.score, dtype=np.int16),
+    )
+
+def _text_rows(frames):
+    cols = frame_columns(frames)
+    for i in range(len(frames)):
+        yield dict(
+            start_t=int(cols["start_t"][i]),
+            start_idx=int(cols["start_idx"][i]),
+            rnw=int(cols["rnw"][i]),
+            req=f"0x{int(cols['req'][i]):02X}" if cols["req_ok"][i] else "",
+            ack=frames.ack_str(i),
+            data=f"0x{int(cols['data'][i]):08X}" if cols["data_ok"][i] else "",
+            par=str(frames.par_verdict[i]),
+            score=int(cols["score"][i]),
+        )
+
+def write_npz(frames, path, **meta):
+    """Columns plus scalar metadata (e.g. source=..., timescale=...) stored as 0-d arrays."""
+    extra = {f"meta_{k}": np.asarray(v) for k, v in meta.items()}
+    np.savez_compressed(path, **frame_columns(frames), **extra)
+
+def write_csv(frames, path):
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        w = csv.DictWriter(fh, fieldnames=CSV_FIELDS)
+        w.writeheader()
+        w.writerows(_text_rows(frames))
+
+def write_jsonl(frames, path):
+    with open(path, "w", encoding="utf-8") as fh:
+        for row in _text_rows(frames):
+            fh.write(json.dumps(row) + "\n")
+
+def export_frames(frames, outdir: Path, stem, formats=("npz",), **meta):
+    """Write <outdir>/<stem>_frames.<fmt> for each requested format; returns written paths."""
+    outdir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for fmt in formats:
+        out = outdir / f"{stem}_frames.{fmt}"
+        if fmt == "npz":
+            write_npz(frames, out, **meta)
+        elif fmt == "csv":
+            write_csv(frames, out)
+        elif fmt == "jsonl":
+            write_jsonl(frames, out)
+        else:
+            raise ValueError(f"unknown export format: {fmt}")
+        paths.append(out)
+    return paths
+
+class FrameWriter:
+    """
+    Incremental export_frames(): append(frames) per decoded batch, close() at the end.
+    CSV/JSONL rows reach the file as they arrive; the npz is written once on close().
+    """
+
+    def __init__(self, outdir: Path, stem, formats=("npz",), **meta):
+        for fmt in formats:
+            if fmt not in EXPORT_FORMATS:
+                raise ValueError(f"unknown export format: {fmt}")
+        outdir.mkdir(parents=True, exist_ok=True)
+        self.paths = [outdir / f"{stem}_frames.{fmt}" for fmt in formats]
+        self.meta = meta
+        self.count = 0
+        self.cols = [] if "npz" in formats else None
+        self.csv_fh = self.csv = self.jsonl_fh = None
+        if "csv" in formats:
+            self.csv_fh = open(outdir / f"{stem}_frames.csv", "w", newline="", encoding="utf-8")
+            self.csv = csv.DictWriter(self.csv_fh, fieldnames=CSV_FIELDS)
+            self.csv.writeheader()
+        if "jsonl" in formats:
+            self.jsonl_fh = open(outdir / f"{stem}_frames.jsonl", "w", encoding="utf-8")
+
+    def append(self, frames):
+        self.count += len(frames)
+        if self.cols is not None:
+            self.cols.append(frame_columns(frames))
+        if self.csv is None and self.jsonl_fh is None:
+            return
+        for row in _text_rows(frames):
+            if self.csv is not None:
+                self.csv.writerow(row)
+            if self.jsonl_fh is not None:
+                self.jsonl_fh.write(json.dumps(row) + "\n")
+        for fh in (self.csv_fh, self.jsonl_fh):
+            if fh is not None:
+                fh.flush()
+
+    def close(self):
+        """Finish all files; returns the written paths."""
+        for fh in (self.csv_fh, self.jsonl_fh):
+            if fh is not None:
+                fh.close()
+        if self.cols is not None:
+            cols = {k: np.concatenate([c[k] for c in self.cols]) for k in self.cols[0]} if self.cols else \
+                {k: np.zeros(0, dtype=dt) for k, dt in COLUMN_DTYPES.items()}
+            extra = {f"meta_{k}": np.asarray(v) for k, v in self.meta.items()}
+            np.savez_compressed(next(p for p in self.paths if p.suffix == ".npz"), **cols, **extra)
+        return self.paths
@@ -0,0 +1,271 @@
+# swd_model.py — cycle-accurate Python reference model of swd_frontend_top (swd-probe.v)
+# The probe is a saturating 4-bit counter (74xx161, cleared while rst_n=0, counting SCK
+# posedges up to 15) plus a few gates deciding when MOSI is driven onto SWDIO:
+#   drive = ~rst_n | (bit_idx <= 9) | (~rnw & bit_idx == 15),  miso = rst_n ? swdio : Z
+# The counter is computed for all posedges at once (anchored at the last clear), the
+# gates are the four-state operators of vcd_sweep, so the model runs on whole captures
+# and on batches of millions of synthetic frames alike.
+#
+# Two uses:
+#   compare_capture()  differential check: SWDIO/MISO predicted from the captured inputs
+#                      (sck, rst_n, rnw, mosi, tb_en/tb_val) vs the captured nets, at
+#                      every change time (vcd_to_png --model)
+#   check_frames()     random frames (gen_swd_vcd transaction mix) pushed through the model
+#                      and checked against the frame ownership table of swd_check
+#                      (python swd_model.py --frames N)
+
+import argparse
+import time
+
+import numpy as np
+
+from swd_check import OWN_HOST, OWN_TARGET, bit_owner
+from swd_decode import ACK_OK, FRAME_BITS, SAMPLE_EPS
+from vcd_signal import V_0, V_1, V_X, V_Z, as_signal
+from vcd_sweep import mux, not_, or_, resolve, sweep
+
+Q_MAX = 15          # U1 saturates here (LOAD_n = ~RCO, D = 1111)
+REQ_LAST = 9        # req_drive = ~(Q3 & (Q2|Q1)) = bit_idx <= 9
+T_MIN = np.iinfo(np.int64).min
+
+# ===== Counter (U1) =====
+def posedge_times(sck):
+    """Times at which SCK becomes 1 (the first sample is the initial value, not an edge)."""
+    sig = as_signal(sck)
+    if len(sig) < 2:
+        return np.zeros(0, dtype=np.int64)
+    return sig.t[1:][(sig.v[1:] == V_1) & (sig.v[:-1] != V_1)]
+
+def rst_low_in(rst, a, b):
+    """Per interval [a, b): was rst_n 0 at any time in it (last value of each timestep)?"""
+    t, low = rst.t, rst.v == V_0
+    if not t.size:
+        return np.zeros(np.broadcast(a, b).shape, dtype=bool)
+    nlow = np.concatenate(([0], np.cumsum(low)))
+    ia = np.searchsorted(t, a, side="right")   # changes at/before a
+    ib = np.searchsorted(t, b, side="left")    # changes before b
+    return ((ia > 0) & low[np.maximum(ia - 1, 0)]) | (nlow[np.maximum(ib, ia)] > nlow[ia])
+
+def counter_after_posedges(rst, pos):
+    """
+    bit_idx right after each posedge (int8, -1 = unknown). The posedge sees rst_n as it
+    was before the edge: 0 clears, otherwise the counter counts from 0 when rst_n was low
+    since the previous posedge, else from its previous value; never-cleared is unknown.
+    """
+    n = pos.size
+    if not n:
+        return np.zeros(0, dtype=np.int8)
+    pre = rst.codes_at(pos - SAMPLE_EPS)
+    zero = pre == V_0
+    unknown = pre > V_1
+    cleared = ~zero & ~unknown & rst_low_in(rst, np.r_[T_MIN, pos[:-1]], pos)
+    i = np.arange(n)
+    last = np.maximum.accumulate(np.where(zero | unknown | cleared, i, -1))
+    lc = np.maximum(last, 0)
+    q = np.minimum(i - np.where(zero[lc], lc, lc - 1), Q_MAX)
+    return np.where((last < 0) | unknown[lc], -1, q).astype(np.int8)
+
+def counter_at(rst, pos, q_after, t):
+    """bit_idx at times t (after everything that happened at t, incl. the async clear)."""
+    t = np.asarray(t, dtype=np.int64)
+    q = np.full(t.shape, -1, dtype=np.int8)
+    lo = np.full(t.shape, T_MIN, dtype=np.int64)
+    if pos.size:
+        c = np.searchsorted(pos, t, side="right") - 1
+        after = c >= 0
+        q[after] = q_after[c[after]]
+        lo[after] = pos[c[after]]
+    q[rst_low_in(rst, lo, t + 1)] = 0
+    return q
+
+# ===== Gates (U2/U3) and drivers (U4, testbench) =====
+def _cmp_code(q, cond):
+    return np.where(q < 0, V_X, np.where(cond, V_1, V_0)).astype(np.uint8)
+
+def frontend(q, rst, rnw, mosi):
+    """(swdio_drive, probe output onto SWDIO) code arrays for bit_idx q and input codes."""
+    req_drive = _cmp_code(q, q <= REQ_LAST)
+    inv_rco = not_(_cmp_code(q, q == Q_MAX))
+    raw_mode = not_(rst)
+    write_drive = not_(or_(rnw, inv_rco))
+    drive = or_(or_(raw_mode, req_drive), write_drive)
+    return drive, mux(drive, mosi, V_Z)
+
+def wire(probe, tb_en, tb_val):
+    """Resolved SWDIO with the testbench driver `tb_en ? tb_val : 1'bz`."""
+    return resolve(probe, mux(tb_en, tb_val, V_Z))
+
+def miso_of(rst, swdio):
+    return mux(rst, swdio, V_Z)
+
+# ===== Differential check against a capture =====
+class ModelDiff:
+    """
+    One row per (net, change time) where the capture disagrees with the model:
+      net (0 = swdio, 1 = miso), t, cycle (last posedge index, -1 before), q (bit_idx),
+      expected, got (codes)
+    """
+
+    NETS = ("swdio", "miso")
+    COLUMNS = ("net", "t", "cycle", "q", "expected", "got")
+
+    def __init__(self, cols, n_rows, compared):
+        for k in self.COLUMNS:
+            setattr(self, k, cols[k])
+        self.n_rows = n_rows
+        self.compared = compared  # nets actually compared
+
+    def __len__(self):
+        return int(self.net.size)
+
+    def counts(self):
+        return {name: int((self.net == k).sum()) for k, name in enumerate(self.NETS) if name in self.compared}
+
+    def row_text(self, i):
+        return (f"{self.NETS[self.net[i]]:<5} t={self.t[i]} cycle={self.cycle[i]} bit_idx={self.q[i]} "
+                f"expected={'01xz'[self.expected[i]]} got={'01xz'[self.got[i]]}")
+
+    def write_csv(self, path):
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(",".join(self.COLUMNS) + "\n")
+            for i in range(len(self)):
+                fh.write(f"{self.NETS[self.net[i]]},{self.t[i]},{self.cycle[i]},{self.q[i]},"
+                         f"{'01xz'[self.expected[i]]},{'01xz'[self.got[i]]}\n")
+
+def compare_capture(sigs):
+    """
+    sigs: {role: Signal} with sck, rst_n, rnw, mosi, swdio and optionally tb_en/tb_val, miso.
+    Every distinct change time of any of them is one compared row. Without tb_en/tb_val,
+    SWDIO is only compared where the probe drives; MISO is predicted from the captured
+    SWDIO so a wire mismatch is not reported twice.
+    """
+    for role in ("sck", "rst_n", "rnw", "mosi", "swdio"):
+        if not sigs.get(role):
+            raise ValueError(f"model: no {role} net")
+    has_tb = bool(sigs.get("tb_en")) and bool(sigs.get("tb_val"))
+    has_miso = bool(sigs.get("miso"))
+    rst = as_signal(sigs["rst_n"]).compress()
+    pos = posedge_times(sigs["sck"])
+    q_after = counter_after_posedges(rst, pos)
+
+    nets = {r: sigs[r] for r in ("sck", "rst_n", "rnw", "mosi", "swdio", "tb_en", "tb_val", "miso") if sigs.get(r)}
+    sw = sweep(nets)
+    q = counter_at(rst, pos, q_after, sw.t)
+    drive, probe = frontend(q, sw.rst_n, sw.rnw, sw.mosi)
+
+    checks = []
+    if has_tb:
+        checks.append((0, wire(probe, sw.tb_en, sw.tb_val), sw.swdio, np.ones(len(sw), dtype=bool)))
+    else:
+        checks.append((0, probe, sw.swdio, drive == V_1))
+    if has_miso:
+        checks.append((1, miso_of(sw.rst_n, sw.swdio), sw.miso, np.ones(len(sw), dtype=bool)))
+
+    cycle = np.searchsorted(pos, sw.t, side="right") - 1
+    parts = []
+    for k, exp, got, where in checks:
+        bad = np.flatnonzero(where & (exp != got))
+        parts.append((np.full(bad.size, k, dtype=np.int8), bad, exp[bad], got[bad]))
+    net, rows, exp, got = (np.concatenate(c) for c in zip(*parts))
+    order = np.lexsort((net, rows))
+    net, rows, exp, got = net[order], rows[order], exp[order], got[order]
+    cols = dict(net=net, t=sw.t[rows], cycle=cycle[rows].astype(np.int64), q=q[rows].astype(np.int64),
+                expected=exp, got=got)
+    return ModelDiff(cols, len(sw), [ModelDiff.NETS[k] for k, *_ in checks])
+
+# ===== Random frames =====
+# One frame as the testbenches run it, on a grid of SCK half-cycles: phase 0 is the arm
+# negedge (rst_n rises, MOSI bit 0), then posedge/negedge of bits 0..47. The host sets
+# MOSI bit b at the negedge before posedge b, the target drives bit b from posedge b.
+PHASES = 1 + 2 * FRAME_BITS
+
+def _table(op, nargs):
+    """op tabulated over every code combination: table[a, b, ...] == op(a, b, ...)."""
+    grid = np.indices((4,) * nargs, dtype=np.uint8).reshape(nargs, -1)
+    return op(*grid).reshape((4,) * nargs)
+
+MUX, RESOLVE = _table(mux, 3), _table(resolve, 2)
+
+def frame_phases(host, en, val, rnw):
+    """
+    (n, 48) per-bit stimulus (gen_swd_vcd.frame_bits) -> (n, PHASES) swdio/miso codes.
+    The counter and gates only depend on (rnw, phase), so they run once on a (2, PHASES)
+    table; the per-frame wire is table lookups of the same four-state operators.
+    """
+    p = np.arange(PHASES)
+    b = np.maximum(p - 1, 0) // 2                           # bit of the posedge/negedge phase
+    q = np.where(p == 0, 0, np.minimum(b + 1, Q_MAX))
+    ones = np.full((2, PHASES), V_1, dtype=np.uint8)
+    drive_tab, _ = frontend(np.broadcast_to(q, (2, PHASES)), ones,
+                            np.array([[V_0], [V_1]], dtype=np.uint8) * ones, ones)
+    drive = drive_tab[np.asarray(rnw, dtype=np.intp)]
+
+    k = np.minimum(p // 2, FRAME_BITS - 1)                  # MOSI bit on the line
+    mosi = np.where(p // 2 < FRAME_BITS, host[:, k], V_0)
+    tb_en = np.where(p >= 1, en[:, b], V_0)
+    tb_val = np.where(p >= 1, val[:, b], V_0)
+    swdio = RESOLVE[MUX[drive, mosi, V_Z], MUX[tb_en, tb_val, V_Z]]
+    return swdio, MUX[V_1, swdio, V_Z]
+
+CHECKS = ("x", "host_bit", "target_bit", "turn1", "ta2", "miso")
+
+def check_frames(tx, host, en, val):
+    """
+    Frame rules on the model output, per frame (bool (n,) per CHECKS entry):
+      x           SWDIO is X in any phase
+      host_bit    a host-owned bit is not on SWDIO just before its posedge
+      target_bit  a target-owned bit is not on SWDIO after its negedge
+      turn1/ta2   TURN1 not Z after its posedge; WRITE bit 14 X, READ bit 47 not Z
+      miso        MISO differs from SWDIO (rst_n=1 throughout the frame)
+    """
+    swdio, miso = frame_phases(host, en, val, tx["rnw"])
+    is_read = tx["rnw"] == 1
+    own = bit_owner(is_read, tx["ack"] == ACK_OK)
+    b = np.arange(FRAME_BITS)
+    before_pos, after_pos, after_neg = swdio[:, 2 * b], swdio[:, 2 * b + 1], swdio[:, 2 * b + 2]
+    out = {}
+    out["x"] = (swdio == V_X).any(axis=1)
+    out["host_bit"] = ((own == OWN_HOST) & (before_pos != host)).any(axis=1)
+    out["target_bit"] = ((own == OWN_TARGET) & (after_neg != val)).any(axis=1)
+    out["turn1"] = after_pos[:, 10] != V_Z
+    out["ta2"] = np.where(is_read, after_pos[:, 47] != V_Z, after_pos[:, 14] == V_X)
+    out["miso"] = (miso != swdio).any(axis=1)
+    return out
+
+def run_random(n, seed=1, chunk=1 << 16, **mix):
+    """check_frames() over n random transactions in chunks; returns ({check: failing frames}, seconds)."""
+    from gen_swd_vcd import frame_bits, make_transactions  # imports the generator only here
+
+    fails = dict.fromkeys(CHECKS, 0)
+    t0 = time.perf_counter()
+    for i, lo in enumerate(range(0, n, chunk)):
+        tx = make_transactions(min(chunk, n - lo), seed=seed + i, **mix)
+        for name, bad in check_frames(tx, *frame_bits(tx)).items():
+            fails[name] += int(bad.sum())
+    return fails, time.perf_counter() - t0
+
+def main():
+    ap = argparse.ArgumentParser(description="Random-frame check of the swd-probe.v reference model.")
+    ap.add_argument("--frames", type=int, default=1_000_000, help="number of random transactions")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--chunk", type=int, default=1 << 16, help="frames evaluated per batch")
+    ap.add_argument("--read-ratio", dest="read_ratio", type=float, default=0.5)
+    ap.add_argument("--wait-rate", dest="wait_rate", type=float, default=0.05)
+    ap.add_argument("--fault-rate", dest="fault_rate", type=float, default=0.02)
+    ap.add_argument("--bad-ack-rate", dest="bad_ack_rate", type=float, default=0.01)
+    ap.add_argument("--parity-err-rate", dest="parity_err_rate", type=float, default=0.01)
+    args = ap.parse_args()
+
+    fails, dt = run_random(args.frames, seed=args.seed, chunk=args.chunk, read_ratio=args.read_ratio,
+                           wait_rate=args.wait_rate, fault_rate=args.fault_rate,
+                           bad_ack_rate=args.bad_ack_rate, parity_err_rate=args.parity_err_rate)
+    rate = args.frames / dt if dt > 0 else 0.0
+    print(f"[MODEL] {args.frames} random frame(s) in {dt:.2f}s ({rate:,.0f} frames/s)")
+    bad = {k: v for k, v in fails.items() if v}
+    if bad:
+        print("[ERR] " + " ".join(f"{k}={v}" for k, v in bad.items()) + " frame(s) failing")
+        raise SystemExit(1)
+    print(f"[OK] all frames pass: {', '.join(CHECKS)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# swd_stats.py — throughput / bus-efficiency analytics of a decoded capture
+# The probe exists to run SWD at a high SWCLK through fixed 48-bit SPI/DMA frames; this
+# pass measures how well one capture actually uses the bus, from the SCK cycle table
+# (posedge/negedge arrays) and the FrameTable only, with array ops over all frames:
+#
+#   clock    SCK period (rise to rise): in-frame rate, effective rate over the active span
+#   frames   transactions per second, frame duration, gap from a frame's last SCK fall to
+#            the next frame's start
+#   bits     every clock of the frame span falls in one bucket: payload (REQ + ACK, plus
+#            DATA + PARITY when ACK=OK), padding (bits 0..1), turnarounds (TA1 + TA2 on a
+#            WRITE / the tail bit on a READ), wasted (the DATA + PARITY slots of a frame
+#            without ACK=OK) and idle (clocks between two frames)
+#   retries  a WAIT frame followed by frames with the same request is one retry chain;
+#            its latency runs from the first WAIT's start to the start of its last frame
+#   overlap  a frame starting inside the previous one (fewer than 48 clocks after its
+#            start; a misaligned frame table) is counted on its own: that pair has no
+#            gap, and adds neither idle clocks nor an overhead sample
+#
+# Times in the summary are ns (tick_s = seconds per capture time unit), rates in Hz.
+
+import numpy as np
+
+from swd_decode import ACK_FAULT, ACK_OK, ACK_WAIT, FRAME_BITS
+
+# clocks per bucket of one 48-bit frame (REQ + ACK + DATA/PARITY = payload when ACK=OK)
+PAD_BITS, REQ_BITS, TURN_BITS, ACK_BITS, DATA_BITS = 2, 8, 2, 3, 33
+HIST_BINS = 40
+
+def describe(x):
+    """min / median / mean / p95 / max of a 1-D array (empty -> n=0 only)."""
+    x = np.asarray(x, dtype=float)
+    if not x.size:
+        return dict(n=0)
+    return dict(n=int(x.size), min=float(x.min()), median=float(np.median(x)), mean=float(x.mean()),
+                p95=float(np.percentile(x, 95)), max=float(x.max()))
+
+def _runs(mask):
+    """(first index, length) of the runs of True in mask."""
+    d = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    s = np.flatnonzero(d == 1)
+    return s, np.flatnonzero(d == -1) - s
+
+def retry_chains(frames):
+    """
+    (first frame, retries, last frame) per retry chain: frame i links to i+1 when i got
+    ACK=WAIT and both carry the same (known) request. A chain of r links is r retries;
+    its last frame holds the outcome (OK / FAULT / WAIT = given up).
+    """
+    req, req_ok, ack = frames.req, frames.req_ok, frames.ack
+    link = (ack[:-1] == ACK_WAIT) & req_ok[:-1] & req_ok[1:] & (req[:-1] == req[1:])
+    first, n = _runs(link)
+    return first, n, first + n
+
+class BusStats:
+    """
+    Per-frame and per-cycle arrays of one capture (times in capture units):
+      period        SCK rise-to-rise periods inside frames
+      start_t, end_t, duration     frame start, last SCK fall, and their difference
+      overlap       per consecutive pair: the second frame starts inside the first
+      gap_t, gap_clk               next frame start - end_t, and the idle clocks between them
+                                   (non-overlapping pairs only)
+      payload       payload clocks per frame (44 with ACK=OK, 11 otherwise)
+      overhead      per frame not overlapped by the next: share of (48 + following idle
+                    clocks) that is not payload
+      chain_first, chain_retries, chain_last     see retry_chains()
+    """
+
+    def __init__(self, pos, neg, frames, tick_s=1e-12):
+        self.tick_s = tick_s
+        self.n_cycles = int(pos.size)
+        self.pos = pos
+        self.k = k = len(frames)
+        starts = frames.start_idx
+        self.ack = frames.ack
+        self.start_t = frames.start_t
+        self.end_t = neg[starts + FRAME_BITS - 1] if k else np.zeros(0, dtype=np.int64)
+        self.duration = self.end_t - self.start_t
+
+        # in-frame periods: the 47 rise-to-rise steps of each frame
+        idx = (starts[:, None] + np.arange(FRAME_BITS - 1)[None, :]).ravel()
+        self.period = pos[idx + 1] - pos[idx] if k else np.zeros(0, dtype=np.int64)
+
+        step = np.diff(starts)
+        self.overlap = step < FRAME_BITS
+        clean = ~self.overlap
+        self.gap_t = (self.start_t[1:] - self.end_t[:-1])[clean]
+        self.gap_clk = step[clean] - FRAME_BITS
+        ok = self.ack == ACK_OK
+        self.payload = np.where(ok, REQ_BITS + ACK_BITS + DATA_BITS, REQ_BITS + ACK_BITS)
+        span_clk = FRAME_BITS + np.concatenate((np.where(clean, step - FRAME_BITS, 0), [0]))
+        self.overhead = (1.0 - self.payload / span_clk)[np.concatenate((clean, [True]))] if k else np.zeros(0)
+        self.chain_first, self.chain_retries, self.chain_last = retry_chains(frames)
+
+    def ns(self, t):
+        return np.asarray(t, dtype=float) * (self.tick_s * 1e9)
+
+    def _hz(self, n, ticks):
+        return float(n / (ticks * self.tick_s)) if ticks > 0 else None
+
+    def clocks(self):
+        """{bucket: clocks} over the frame span (first frame start .. last frame end)."""
+        k = self.k
+        ok = int((self.ack == ACK_OK).sum())
+        return dict(payload=int(self.payload.sum()), padding=PAD_BITS * k, turnaround=TURN_BITS * k,
+                    wasted=DATA_BITS * (k - ok), idle=int(self.gap_clk.sum()))
+
+    def summary(self):
+        """JSON-able summary (see the header comment for the definitions)."""
+        k, ack = self.k, self.ack
+        n_ok, n_wait, n_fault = (int((ack == a).sum()) for a in (ACK_OK, ACK_WAIT, ACK_FAULT))
+        active = int(self.pos[-1] - self.pos[0]) if self.n_cycles > 1 else 0
+        span = int(self.end_t[-1] - self.start_t[0]) if k else 0
+        clocks = self.clocks()
+        span_clk = sum(clocks.values())
+        resolved = self.ack[self.chain_last]
+        lat = self.start_t[self.chain_last] - self.start_t[self.chain_first]
+        med_period = float(np.median(self.period)) if self.period.size else 0.0
+        return dict(
+            timescale_s=self.tick_s,
+            clock=dict(cycles=self.n_cycles,
+                       frame_hz=self._hz(1, med_period),
+                       effective_hz=self._hz(self.n_cycles - 1, active),
+                       span_hz=self._hz(span_clk - 1, span),
+                       period_ns=describe(self.ns(self.period))),
+            frames=dict(total=k, ok=n_ok, wait=n_wait, fault=n_fault, invalid=k - n_ok - n_wait - n_fault,
+                        overlapping=int(self.overlap.sum()),
+                        span_ns=float(self.ns(span)),
+                        transactions_per_s=self._hz(k, span),
+                        ok_per_s=self._hz(n_ok, span),
+                        duration_ns=describe(self.ns(self.duration)),
+                        gap_ns=describe(self.ns(self.gap_t)),
+                        gap_clocks=describe(self.gap_clk)),
+            bits=dict(clocks=clocks, span_clocks=span_clk,
+                      payload_ratio=clocks["payload"] / span_clk if span_clk else None,
+                      data_bits=32 * n_ok,
+                      data_ratio=32 * n_ok / span_clk if span_clk else None,
+                      data_bits_per_s=self._hz(32 * n_ok, span),
+                      overhead_per_frame=describe(self.overhead)),
+            retries=dict(chains=int(self.chain_first.size),
+                         retries=int(self.chain_retries.sum()),
+                         max_retries=int(self.chain_retries.max()) if self.chain_retries.size else 0,
+                         unretried_wait=n_wait - int(self.chain_retries.sum()),
+                         resolved_ok=int((resolved == ACK_OK).sum()),
+                         ended_fault=int((resolved == ACK_FAULT).sum()),
+                         ended_wait=int((resolved == ACK_WAIT).sum()),
+                         latency_ns=describe(self.ns(lat))),
+        )
+
+    def histograms(self):
+        """[(title, x label, counts, bin edges)] of the non-empty distributions."""
+        lat = self.start_t[self.chain_last] - self.start_t[self.chain_first]
+        out = []
+        for title, xlabel, x in (("SCK period inside frames", "ns", self.ns(self.period)),
+                                 ("gap between frames", "ns", self.ns(self.gap_t)),
+                                 ("overhead per frame (incl. following idle)", "%", 100.0 * self.overhead),
+                                 ("WAIT retry latency", "ns", self.ns(lat))):
+            if x.size:
+                counts, edges = np.histogram(x, bins=min(HIST_BINS, max(1, np.unique(x).size)))
+                out.append((title, xlabel, counts, edges))
+        return out
+
+    def text(self):
+        """One-line digest for the log."""
+        s = self.summary()
+        hz, b, r = s["clock"]["frame_hz"], s["bits"], s["retries"]
+        tps = s["frames"]["transactions_per_s"]
+        ratio = b["payload_ratio"]
+        return (f"{self.k} frame(s), SCK {hz / 1e6:.3f} MHz in frames" if hz else f"{self.k} frame(s)") + (
+            f", {tps:.4g} transfers/s, payload {100 * ratio:.1f}% of {b['span_clocks']} clocks, "
+            f"{r['retries']} WAIT retr{'y' if r['retries'] == 1 else 'ies'} in {r['chains']} chain(s)"
+            if tps else "") + (
+            f", {s['frames']['overlapping']} overlapping frame(s) left out of gaps" if self.overlap.any() else "")
+
+def analyze_capture(pos, neg, frames, tick_s=1e-12):
+    """BusStats of one capture: pos/neg = SCK cycle arrays, frames = FrameTable over them."""
+    return BusStats(np.asarray(pos, dtype=np.int64), np.asarray(neg, dtype=np.int64), frames, tick_s)
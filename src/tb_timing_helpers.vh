@@ -94,6 +94,11 @@ task automatic timing_report(input string frame_name);
     else                    $display("[TIMING RESULT] %s : FAIL (see errors above)", frame_name);
 endtask
 
+// SWD request byte, LSB-first: start, APnDP, RnW, A[2], A[3], parity, stop, park
+function automatic [7:0] swd_request(input bit apndp, input bit rnw, input [1:0] addr);
+    swd_request = {1'b1, 1'b0, apndp ^ rnw ^ addr[0] ^ addr[1], addr[1], addr[0], rnw, apndp, 1'b1};
+endfunction
+
 task automatic log_ok(input string tag);
     timing_log(tag);
 endtask
@@ -173,15 +173,36 @@ end
         end
     endtask
 
+    // +vcd=<path> redirects the dump (run_all.py streams it through a FIFO into the decoder)
+    string vcd_file;
+
+    // +seed=N draws the stimulus with $random(seed): leading idle cycles, RAW pattern,
+    // request (APnDP, A[3:2]) and read data. Without it the fixed values below are used.
+    integer    seed;
+    reg [31:0] draw;
+    integer    lead_idle   = 4;
+    reg [15:0] raw_pattern = 16'hA5C3;
+    reg [7:0]  req         = 8'hA5;
+    reg [31:0] data        = 32'h1234_5678;
+
     initial begin
-        $dumpfile("swd_read.vcd");
+        if (!$value$plusargs("vcd=%s", vcd_file)) vcd_file = "swd_read.vcd";
+        if ($value$plusargs("seed=%d", seed)) begin
+            $display("== SEED %0d ==", seed);
+            lead_idle   = 1 + {$random(seed)} % 8;
+            raw_pattern = $random(seed);
+            draw        = $random(seed);
+            req         = swd_request(draw[0], 1'b1, draw[2:1]);
+            data        = $random(seed);
+        end
+        $dumpfile(vcd_file);
         $dumpvars(0, testbench_read);
 
-        idle_cycles(4);
-        run_raw_passthrough_test(16'hA5C3);
+        idle_cycles(lead_idle);
+        run_raw_passthrough_test(raw_pattern);
 
-        $display("== READ_OK start @%0t | REQ=0xA5 DATA=0x12345678 ==", $time);
-        send_read_ok_frame(8'hA5, 32'h1234_5678);
+        $display("== READ_OK start @%0t | REQ=0x%02X DATA=0x%08X ==", $time, req, data);
+        send_read_ok_frame(req, data);
         $display("== READ_OK end   @%0t ==", $time);
 
         $finish;
@@ -48,19 +48,34 @@ module testbench_special;
         end
     endtask
 
+    // +vcd=<path> redirects the dump (run_all.py streams it through a FIFO into the decoder)
+    string vcd_file;
+
+    // +seed=N draws the phase lengths with $random(seed): line reset 50..81 cycles (the
+    // spec minimum is 50), idle-zero 2..65 cycles. Without it the fixed values below are used.
+    integer seed;
+    integer reset_cycles = 64;
+    integer zero_cycles  = 50;
+
     initial begin
-        $dumpfile("swd_special.vcd");
+        if (!$value$plusargs("vcd=%s", vcd_file)) vcd_file = "swd_special.vcd";
+        if ($value$plusargs("seed=%d", seed)) begin
+            $display("== SEED %0d ==", seed);
+            reset_cycles = 50 + {$random(seed)} % 32;
+            zero_cycles  = 2 + {$random(seed)} % 64;
+        end
+        $dumpfile(vcd_file);
         $dumpvars(0, testbench_special);
 
         rst_n = 0;
         rnw   = 0;
 
         $display("== RAW LINE_RESET start @%0t ==", $time);
-        drive_swdio_with_log(1'b1, 64, "LINE_RESET");
+        drive_swdio_with_log(1'b1, reset_cycles, "LINE_RESET");
         $display("== RAW LINE_RESET end   @%0t ==", $time);
 
         $display("== RAW IDLE_ZERO start @%0t ==", $time);
-        drive_swdio_with_log(1'b0, 50, "IDLE_ZERO");
+        drive_swdio_with_log(1'b0, zero_cycles, "IDLE_ZERO");
         $display("== RAW IDLE_ZERO end   @%0t ==", $time);
 
         idle_cycles(4);
@@ -150,14 +150,33 @@ module testbench_write;
         end
     endtask
 
+    // +vcd=<path> redirects the dump (run_all.py streams it through a FIFO into the decoder)
+    string vcd_file;
+
+    // +seed=N draws the stimulus with $random(seed): leading idle cycles, request
+    // (APnDP, A[3:2]) and write data. Without it the fixed values below are used.
+    integer    seed;
+    reg [31:0] draw;
+    integer    lead_idle = 4;
+    reg [7:0]  req       = 8'hA1;
+    reg [31:0] data      = 32'hCAFE_BABE;
+
     initial begin
-        $dumpfile("swd_write.vcd");
+        if (!$value$plusargs("vcd=%s", vcd_file)) vcd_file = "swd_write.vcd";
+        if ($value$plusargs("seed=%d", seed)) begin
+            $display("== SEED %0d ==", seed);
+            lead_idle = 1 + {$random(seed)} % 8;
+            draw      = $random(seed);
+            req       = swd_request(draw[0], 1'b0, draw[2:1]);
+            data      = $random(seed);
+        end
+        $dumpfile(vcd_file);
         $dumpvars(0, testbench_write);
 
-        idle_cycles(4);
+        idle_cycles(lead_idle);
 
-        $display("== WRITE_OK start @%0t | REQ=0xA1 DATA=0xCAFEBABE ==", $time);
-        send_write_ok_frame(8'hA1, 32'hCAFE_BABE);
+        $display("== WRITE_OK start @%0t | REQ=0x%02X DATA=0x%08X ==", $time, req, data);
+        send_write_ok_frame(req, data);
         $display("== WRITE_OK end   @%0t ==", $time);
 
         $finish;
@@ -0,0 +1,137 @@
+# check_diff.py — regression check of the frame-stream alignment in swd_diff.py
+# Random fingerprint streams b are made from a by random edit scripts (delete / insert /
+# replace, runs included); the hunks of align_streams(a, b) applied to a must give b,
+# lie in order inside both streams, and (when exact) use no more edits than the script —
+# exactly the minimum on small cases, checked against an LCS table. Past max_edits the
+# positional fallback must still reproduce b. Needs only NumPy; runs as a script or under pytest.
+#
+#   python src/tests/check_diff.py
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from swd_diff import align_streams, myers, positional  # noqa: E402
+
+SEED = 20
+
+def random_stream(rng, n, alphabet=4):
+    """uint64 fingerprints: few distinct values (many equal runs), high bits set."""
+    return (rng.integers(0, alphabet, n).astype(np.uint64) | np.uint64(1 << 63))
+
+def edit(rng, a, n_edits, alphabet=4):
+    """b = a with n_edits random delete / insert / replace runs of 1..3 items."""
+    b = a.tolist()
+    for _ in range(n_edits):
+        op, run = int(rng.integers(0, 3)), int(rng.integers(1, 4))
+        i = int(rng.integers(0, len(b) + 1))
+        new = random_stream(rng, run, alphabet).tolist()
+        if op == 0:
+            del b[i:i + run]
+        elif op == 1:
+            b[i:i] = new
+        else:
+            b[i:i + run] = new[:len(b[i:i + run])]
+    return np.asarray(b, dtype=np.uint64)
+
+def apply_hunks(a, b, hunks):
+    """a with every hunk (a0, a1, b0, b1) replaced by b[b0:b1]; checks order and bounds."""
+    out, ia, ib = [], 0, 0
+    for a0, a1, b0, b1 in hunks:
+        assert ia <= a0 <= a1 <= a.size and ib <= b0 <= b1 <= b.size, f"hunk {(a0, a1, b0, b1)} out of order"
+        assert a0 - ia == b0 - ib, f"hunk {(a0, a1, b0, b1)}: unequal gap before it"
+        assert a[ia:a0].tolist() == b[ib:b0].tolist(), f"hunk {(a0, a1, b0, b1)}: gap before it differs"
+        out += a[ia:a0].tolist() + b[b0:b1].tolist()
+        ia, ib = a1, b1
+    return out + a[ia:].tolist()
+
+def cost(hunks):
+    return sum((a1 - a0) + (b1 - b0) for a0, a1, b0, b1 in hunks)
+
+def min_edits(a, b):
+    """Fewest inserts + deletes turning a into b: n + m - 2 * LCS."""
+    al, bl = a.tolist(), b.tolist()
+    prev = [0] * (len(bl) + 1)
+    for x in al:
+        cur = [0]
+        for j, y in enumerate(bl):
+            cur.append(prev[j] + 1 if x == y else max(prev[j + 1], cur[j]))
+        prev = cur
+    return len(al) + len(bl) - 2 * prev[-1]
+
+# ===== Checks =====
+def test_small_random_minimal():
+    rng = np.random.default_rng(SEED)
+    for case in range(1500):
+        a = random_stream(rng, int(rng.integers(0, 30)))
+        b = edit(rng, a, int(rng.integers(0, 6)))
+        hunks, exact = align_streams(a, b, max_edits=200)
+        assert exact, f"case {case}: fell back below max_edits"
+        assert apply_hunks(a, b, hunks) == b.tolist(), f"case {case}: hunks do not rebuild b"
+        assert cost(hunks) == min_edits(a, b), f"case {case}: {cost(hunks)} edits, minimum {min_edits(a, b)}"
+
+def test_long_streams_few_edits():
+    """Long equal runs exercise the growing vectorized snake slices and the prefix/suffix strip."""
+    rng = np.random.default_rng(SEED + 1)
+    for case in range(40):
+        a = random_stream(rng, int(rng.integers(500, 20000)), alphabet=1 << 20)
+        n_edits = int(rng.integers(0, 12))
+        b = edit(rng, a, n_edits, alphabet=1 << 20)
+        hunks, exact = align_streams(a, b)
+        assert exact, f"case {case}"
+        assert apply_hunks(a, b, hunks) == b.tolist(), f"case {case}: hunks do not rebuild b"
+        assert cost(hunks) <= 6 * n_edits, f"case {case}: {cost(hunks)} edits for a {n_edits}-run script"
+
+def test_myers_without_strip():
+    rng = np.random.default_rng(SEED + 2)
+    for case in range(300):
+        a = random_stream(rng, int(rng.integers(0, 40)), alphabet=3)
+        b = edit(rng, a, int(rng.integers(0, 8)), alphabet=3)
+        hunks = myers(a, b, max_edits=200)
+        assert hunks is not None
+        assert apply_hunks(a, b, hunks) == b.tolist(), f"case {case}"
+        assert cost(hunks) == min_edits(a, b), f"case {case}"
+
+def test_positional_fallback():
+    rng = np.random.default_rng(SEED + 3)
+    for case in range(300):
+        a = random_stream(rng, int(rng.integers(1, 60)))
+        b = edit(rng, a, int(rng.integers(3, 12)))
+        need = min_edits(a, b)
+        limit = int(rng.integers(0, need)) if need else 0
+        hunks, exact = align_streams(a, b, max_edits=limit)
+        assert exact == (need <= limit), f"case {case}: exact={exact}, {need} edits, max_edits={limit}"
+        assert apply_hunks(a, b, hunks) == b.tolist(), f"case {case}: hunks do not rebuild b (exact={exact})"
+        if not exact:
+            assert myers(a, b, limit) is None
+
+def test_edge_cases():
+    e = np.zeros(0, dtype=np.uint64)
+    x = np.arange(1, 6, dtype=np.uint64)
+    for a, b in ((e, e), (e, x), (x, e), (x, x), (x, x[::-1]), (x[:1], x[1:2])):
+        for max_edits in (0, 1, 100):
+            hunks, exact = align_streams(a, b, max_edits)
+            assert apply_hunks(a, b, hunks) == b.tolist(), (a.tolist(), b.tolist(), max_edits)
+    assert align_streams(x, x) == ([], True)
+    assert positional(x, x) == []
+    assert positional(e, x) == [(0, 0, 0, 5)]
+
+CHECKS = (test_small_random_minimal, test_long_streams_few_edits, test_myers_without_strip,
+          test_positional_fallback, test_edge_cases)
+
+def main():
+    failed = 0
+    for check in CHECKS:
+        try:
+            check()
+            print(f"[OK] {check.__name__}")
+        except Exception as e:  # a crash in the aligner is a failure too, not a traceback
+            failed += 1
+            print(f"[FAIL] {check.__name__}: {type(e).__name__}: {e}")
+    print(f"[INFO] {len(CHECKS) - failed}/{len(CHECKS)} check(s) passed")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
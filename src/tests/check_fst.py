@@ -0,0 +1,101 @@
+# check_fst.py — FST reader regression check against fstapi-written fixtures
+# Every fst/<src>_<variant>.fst was written by the real fstapi from fst/<src>.vcd
+# (fst/make_fixtures.py): zlib / FastLZ / LZ4 value chunks, one or many value-change
+# blocks, gzip and LZ4 hierarchies, repack on close, dut port aliases, vectors with x/z.
+# open_waveform(fst).read_signals must return exactly what VcdReader(vcd).read_signals
+# returns, for all nets and for a subset. Needs only NumPy; runs as a script or under pytest.
+#
+#   python src/tests/check_fst.py
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import fst_stream  # noqa: E402
+from fst_stream import FstReader, open_waveform  # noqa: E402
+from vcd_stream import VcdReader  # noqa: E402
+
+FIXTURES = Path(__file__).resolve().parent / "fst"
+
+def fixture_pairs():
+    """[(fst path, source vcd path)] for every committed fixture."""
+    pairs = []
+    for fst in sorted(FIXTURES.glob("*.fst")):
+        vcd = FIXTURES / (fst.stem.split("_")[0] + ".vcd")
+        pairs.append((fst, vcd))
+    return pairs
+
+def read_both(fst, vcd, names=None):
+    with VcdReader(vcd) as rd:
+        ref = rd.read_signals(rd.names if names is None else names)
+    with open_waveform(fst) as rd:
+        assert isinstance(rd, FstReader), f"{fst.name}: not detected as FST"
+        got = rd.read_signals(rd.names if names is None else names)
+    return ref, got
+
+def mismatches(ref, got):
+    """Names whose Signal differs (times or codes), plus a name list mismatch."""
+    bad = [] if list(ref) == list(got) else [f"names {list(ref)} != {list(got)}"]
+    for n, s in ref.items():
+        g = got.get(n)
+        if g is None or not (np.array_equal(s.t, g.t) and np.array_equal(s.v, g.v)):
+            bad.append(n)
+    return bad
+
+# ===== Checks =====
+def test_fixtures_present():
+    pairs = fixture_pairs()
+    assert len(pairs) >= 8, f"expected the committed fixtures in {FIXTURES}"
+    for fst, vcd in pairs:
+        assert vcd.is_file(), f"{fst.name}: source {vcd.name} missing"
+
+def test_names_and_timescale():
+    for fst, vcd in fixture_pairs():
+        with VcdReader(vcd) as a, open_waveform(fst) as b:
+            assert a.names == b.names, fst.name
+            assert a.timescale == b.timescale, f"{fst.name}: {b.timescale} != {a.timescale}"
+
+def test_all_nets():
+    for fst, vcd in fixture_pairs():
+        bad = mismatches(*read_both(fst, vcd))
+        assert not bad, f"{fst.name}: {bad}"
+
+def test_selected_nets():
+    for fst, vcd in fixture_pairs():
+        with VcdReader(vcd) as rd:
+            names = rd.names[1::3] + ["no.such.net"]
+        ref, got = read_both(fst, vcd, names)
+        assert len(got["no.such.net"]) == 0
+        bad = mismatches(ref, got)
+        assert not bad, f"{fst.name}: {bad}"
+
+def test_pure_python_lz4():
+    """The fallback block decoder, also when the lz4 package is installed."""
+    saved, fst_stream._lz4 = fst_stream._lz4, None
+    try:
+        for fst, vcd in fixture_pairs():
+            if "lz4" in fst.stem:
+                bad = mismatches(*read_both(fst, vcd))
+                assert not bad, f"{fst.name}: {bad}"
+    finally:
+        fst_stream._lz4 = saved
+
+CHECKS = (test_fixtures_present, test_names_and_timescale, test_all_nets, test_selected_nets,
+          test_pure_python_lz4)
+
+def main():
+    failed = 0
+    for check in CHECKS:
+        try:
+            check()
+            print(f"[OK] {check.__name__}")
+        except Exception as e:  # a decoder crash is a failure too, not a traceback
+            failed += 1
+            print(f"[FAIL] {check.__name__}: {type(e).__name__}: {e}")
+    print(f"[INFO] {len(fixture_pairs())} fixture(s), {len(CHECKS) - failed}/{len(CHECKS)} check(s) passed")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+# make_fixtures.py — regenerate the FST fixtures of check_fst.py with the real fstapi writer
+# Each source VCD in this directory is replayed through fstapi (GTKWave's writer, via the
+# pylibfst bindings: pip install pylibfst) once per variant below. mixed.vcd is written
+# here (seeded): vectors with x/z digits, aliases across scopes, a 1ns timescale and long
+# gaps; swd.vcd is a short gen_swd_vcd.py capture (testbench hierarchy, dut port aliases).
+# Only needed to change the fixtures; check_fst.py reads the committed files.
+#
+#   python make_fixtures.py
+
+import random
+import sys
+from pathlib import Path
+
+import pylibfst
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from gen_swd_vcd import generate  # noqa: E402
+
+lib, ffi = pylibfst.lib, pylibfst.ffi
+HERE = Path(__file__).resolve().parent
+
+# name suffix -> (pack type, flush a value-change block every N time steps (0 = once), repack on close)
+VARIANTS = {
+    "zlib": ("zlib", 0, False),
+    "fastlz": ("fastlz", 0, False),
+    "lz4": ("lz4", 0, False),
+    "zlib_blocks": ("zlib", 40, False),
+    "fastlz_blocks": ("fastlz", 40, False),
+    "lz4_blocks": ("lz4", 40, False),
+    "repack": ("zlib", 0, True),
+}
+FIXTURES = {"swd.vcd": ("zlib", "fastlz", "lz4", "lz4_blocks", "repack"),
+            "mixed.vcd": ("zlib_blocks", "fastlz_blocks", "lz4")}
+
+# ===== Source VCD =====
+def write_mixed(path, steps=300, seed=7):
+    rnd = random.Random(seed)
+
+    def vec(w):  # leading zeros dropped, as iverilog dumps vectors
+        return "".join(rnd.choice("0101010101xz") for _ in range(w)).lstrip("0") or "0"
+
+    lines = ["$timescale 1ns $end",
+             "$scope module top $end",
+             "$var wire 1 ! clk $end", "$var wire 1 \" en $end", "$var reg 8 ) data [7:0] $end",
+             "$var reg 40 * addr [39:0] $end", "$var wire 1 % flag $end", "$var wire 1 & idle $end",
+             "$scope module core $end",
+             "$var wire 1 ! clk $end", "$var wire 1 % flag $end", "$var reg 3 ' state [2:0] $end",
+             "$upscope $end",
+             "$scope module bus $end",
+             "$var wire 1 ( ready $end", "$var wire 1 \" en $end",
+             "$upscope $end",
+             "$upscope $end",
+             "$enddefinitions $end",
+             "#0", "$dumpvars", "0!", "0\"", "bxxxxxxxx )", "b0 *", "z%", "1&", "b0 '", "x(", "$end"]
+    t, clk = 0, 0
+    for i in range(steps):
+        t += rnd.choice((1, 1, 2, 5)) if i % 97 else 5000  # a few long gaps
+        clk ^= 1
+        lines += [f"#{t}", f"{clk}!"]
+        if rnd.random() < 0.3:
+            lines.append(f"{rnd.choice('01xz')}\"")
+        if clk and rnd.random() < 0.5:
+            lines.append(f"b{vec(8)} )")
+        if rnd.random() < 0.1:
+            lines.append(f"b{vec(40)} *")
+        if rnd.random() < 0.2:
+            lines.append(f"{rnd.choice('01z')}%")
+        if rnd.random() < 0.15:
+            lines.append(f"b{vec(3)} '")
+        if rnd.random() < 0.25:
+            lines.append(f"{rnd.choice('01')}(")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+# ===== VCD -> FST through fstapi =====
+def vcd_to_fst(src, dst, pack="lz4", flush_every=0, repack=False):
+    ctx = lib.fstWriterCreate(str(dst).encode(), 1)
+    lib.fstWriterSetPackType(ctx, dict(zlib=lib.FST_WR_PT_ZLIB, fastlz=lib.FST_WR_PT_FASTLZ,
+                                       lz4=lib.FST_WR_PT_LZ4)[pack])
+    if repack:
+        lib.fstWriterSetRepackOnClose(ctx, 1)
+    head, body = src.read_text(encoding="utf-8").split("$enddefinitions", 1)
+    toks = head.split()
+    exp = {"s": 0, "ms": -3, "us": -6, "ns": -9, "ps": -12, "fs": -15}
+    handles, widths = {}, {}
+    i = 0
+    while i < len(toks):
+        t = toks[i]
+        if t == "$timescale":
+            unit = toks[i + 1]
+            lib.fstWriterSetTimescale(ctx, exp[unit.lstrip("0123456789")])
+            i += 2
+        elif t == "$scope":
+            lib.fstWriterSetScope(ctx, lib.FST_ST_VCD_MODULE, toks[i + 2].encode(), ffi.NULL)
+            i += 3
+        elif t == "$upscope":
+            lib.fstWriterSetUpscope(ctx)
+            i += 1
+        elif t == "$var":
+            j = toks.index("$end", i)
+            kind, size, code = toks[i + 1:i + 4]
+            name = " ".join(toks[i + 4:j])
+            vt = lib.FST_VT_VCD_REG if kind == "reg" else lib.FST_VT_VCD_WIRE
+            alias = handles.get(code, 0)
+            h = lib.fstWriterCreateVar(ctx, vt, lib.FST_VD_IMPLICIT, int(size), name.encode(), alias)
+            if not alias:
+                handles[code], widths[code] = h, int(size)
+            i = j + 1
+        else:
+            i += 1
+    steps, vec = 0, None
+    for tok in body.split("$end", 1)[1].split():
+        if tok.startswith("$"):
+            continue
+        if tok[0] == "#":
+            steps += 1
+            if flush_every and steps % flush_every == 0:
+                lib.fstWriterFlushContext(ctx)
+            lib.fstWriterEmitTimeChange(ctx, int(tok[1:]))
+        elif tok[0] in "bB":
+            vec = tok[1:].lower()
+        elif tok[0] in "01xzXZ" and tok[1:] in handles:
+            lib.fstWriterEmitValueChange(ctx, handles[tok[1:]], tok[0].lower().encode())
+        else:  # identifier code closing a b<bits> vector change
+            w = widths[tok]
+            lib.fstWriterEmitValueChange(ctx, handles[tok], vec.rjust(w, "0" if vec[0] in "01" else vec[0]).encode())
+    lib.fstWriterClose(ctx)
+
+def main():
+    generate(HERE / "swd.vcd", 12, seed=3, wait_rate=0.15, fault_rate=0.1, idle_max=6)
+    write_mixed(HERE / "mixed.vcd")
+    for src, variants in FIXTURES.items():
+        for v in variants:
+            dst = HERE / f"{Path(src).stem}_{v}.fst"
+            pack, flush_every, repack = VARIANTS[v]
+            vcd_to_fst(HERE / src, dst, pack, flush_every, repack)
+            print(f"[OK] {dst.name}: {dst.stat().st_size} bytes")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# vcd_bitplane.py — packed four-state bitplanes for per-cycle samples
+# A four-state code (V_0..V_Z) splits into two bits, val = code & 1 and xz = code >> 1
+# (0 -> 00, 1 -> 01, x -> 10, z -> 11). A stream of n samples (one per SCK edge) is kept
+# as two little-endian uint64 word arrays, sample i at bit i & 63 of word i >> 6: 2 bits
+# per sample instead of a uint8 code. Multi-bit fields (REQ, ACK, DATA) of all frames
+# are then read as word shifts/masks on the planes, parity is a popcount, and "all bits
+# known" is simply xz == 0 — no per-bit gathers.
+
+import numpy as np
+
+from vcd_signal import as_signal, signal_from_codes
+
+WORD_BITS = 64
+
+# ===== Word helpers =====
+def _pack(bits):
+    """bool array -> uint64 words (LSB first), plus one zero word so field() may read w+1."""
+    b = np.packbits(np.asarray(bits, dtype=bool), bitorder="little")
+    nwords = -(-b.size // 8) + 1
+    buf = np.zeros(nwords * 8, dtype=np.uint8)
+    buf[:b.size] = b
+    return buf.view("<u8")
+
+def _unpack(words, n):
+    return np.unpackbits(words.view(np.uint8), count=n, bitorder="little").astype(bool)
+
+if hasattr(np, "bitwise_count"):  # NumPy >= 2.0
+    def popcount64(x):
+        return np.bitwise_count(np.asarray(x, dtype=np.uint64)).astype(np.uint64)
+else:
+    _M1 = np.uint64(0x5555555555555555)
+    _M2 = np.uint64(0x3333333333333333)
+    _M4 = np.uint64(0x0F0F0F0F0F0F0F0F)
+    _H01 = np.uint64(0x0101010101010101)
+
+    def popcount64(x):
+        """Set bits per uint64 (SWAR)."""
+        x = np.asarray(x, dtype=np.uint64)
+        x = x - ((x >> np.uint64(1)) & _M1)
+        x = (x & _M2) + ((x >> np.uint64(2)) & _M2)
+        x = (x + (x >> np.uint64(4))) & _M4
+        return (x * _H01) >> np.uint64(56)
+
+def _field(words, offsets, width):
+    o = np.asarray(offsets, dtype=np.int64)
+    w = o >> 6
+    sh = (o & 63).astype(np.uint64)
+    lo = words[w] >> sh
+    hi = np.where(sh > 0, words[w + 1] << ((np.uint64(WORD_BITS) - sh) & np.uint64(63)), np.uint64(0))
+    v = lo | hi
+    if width < WORD_BITS:
+        v &= (np.uint64(1) << np.uint64(width)) - np.uint64(1)
+    return v
+
+# ===== Planes =====
+class BitPlanes:
+    """
+    n four-state samples as packed planes:
+      val : uint64 words, bit = code & 1
+      xz  : uint64 words, bit = 1 for x/z
+    """
+    __slots__ = ("val", "xz", "n")
+
+    def __init__(self, val, xz, n):
+        self.val = val
+        self.xz = xz
+        self.n = n
+
+    @classmethod
+    def from_codes(cls, codes):
+        c = np.asarray(codes, dtype=np.uint8)
+        return cls(_pack(c & 1), _pack(c >> 1), int(c.size))
+
+    @classmethod
+    def sample(cls, sig, times):
+        """Codes of a net (Signal or tv list) at the given times, packed."""
+        return cls.from_codes(as_signal(sig).codes_at(np.asarray(times, dtype=np.int64)))
+
+    from_tv = sample
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def nbytes(self):
+        return int(self.val.nbytes + self.xz.nbytes)
+
+    def codes(self):
+        """Back to one uint8 code per sample."""
+        return (_unpack(self.val, self.n).astype(np.uint8) | (_unpack(self.xz, self.n).astype(np.uint8) << 1))
+
+    def at(self, idx):
+        """Codes of the samples at the given indices (any shape)."""
+        i = np.asarray(idx, dtype=np.int64)
+        w, sh = i >> 6, (i & 63).astype(np.uint64)
+        one = np.uint64(1)
+        return (((self.val[w] >> sh) & one) | (((self.xz[w] >> sh) & one) << one)).astype(np.uint8)
+
+    def is_code(self, code):
+        """bool per sample: the sample equals code (one word op, one unpack)."""
+        v = self.val if code & 1 else ~self.val
+        x = self.xz if code >> 1 else ~self.xz
+        return _unpack(v & x, self.n)
+
+    def known(self):
+        """bool per sample: 0 or 1 (no x/z)."""
+        return _unpack(~self.xz, self.n)
+
+    def to_signal(self, times, name=""):
+        """Sample-and-hold Signal with one point per code change (times: one per sample)."""
+        return signal_from_codes(np.asarray(times, dtype=np.int64), self.codes(), name)
+
+    def to_tv(self, times):
+        return self.to_signal(times).to_tv()
+
+    def field(self, offsets, width):
+        """
+        Bits [o, o+width) of the stream for every o in offsets (width <= 64), LSB first:
+        (value uint64, known bool) with value = 0 where any bit is x/z.
+        """
+        if not 0 < width <= WORD_BITS:
+            raise ValueError(f"field width {width} outside 1..{WORD_BITS}")
+        v = _field(self.val, offsets, width)
+        known = _field(self.xz, offsets, width) == 0
+        return np.where(known, v, np.uint64(0)), known
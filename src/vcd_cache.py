@@ -0,0 +1,189 @@
+# vcd_cache.py — content-addressed on-disk cache for parsed VCD signals
+# Entry key = hash(VCD content, signal selection, parser code). An entry stores the
+# selected Signals and the SCK cycle table as plain .npy files that are memory-mapped
+# on load, so a re-run on an unchanged capture skips parsing entirely. Entries are
+# evicted least-recently-used once the cache grows past its size bound.
+# The same directory also remembers a fingerprint per rendered PNG, so unchanged
+# images (same inputs, same options, same plotting code) are not rendered again.
+# Fingerprints and digest memos name the file they describe: they are dropped once that
+# file is gone, and otherwise share the LRU bound with the signal entries.
+
+from pathlib import Path
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from vcd_signal import Signal
+
+CACHE_VERSION = 1
+HASH_CHUNK = 1 << 20
+
+def _h(*parts):
+    h = hashlib.blake2b(digest_size=20)
+    for p in parts:
+        h.update(p if isinstance(p, bytes) else str(p).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+def code_digest(*module_files):
+    """Digest of source files, so cache entries die with the code that produced them."""
+    return _h(*(Path(f).read_bytes() for f in module_files))
+
+def _disk_bytes(st):
+    """Space a file takes (whole blocks where the OS reports them: fingerprints are tiny files)."""
+    return max(st.st_size, getattr(st, "st_blocks", 0) * 512)
+
+def _dir_size(path: Path):
+    return sum(_disk_bytes(f.stat()) for f in path.rglob("*") if f.is_file())
+
+def _png_target(entry: Path):
+    """PNG path recorded in a fingerprint file (None for entries written without it)."""
+    lines = entry.read_text().split("\n", 1)
+    return lines[1] if len(lines) > 1 and lines[1] else None
+
+def _stat_target(entry: Path):
+    return json.loads(entry.read_text()).get("path")
+
+class VcdCache:
+    """
+    <root>/stat/<path-hash>.json   path, size/mtime -> content digest memo (avoids re-hashing)
+    <root>/sig/<key>/              meta.json + sig_<role>_{t,v}.npy + cycles_{pos,neg}.npy
+    <root>/png/<path-hash>         fingerprint of the last render of that PNG, then its path
+    Every entry's mtime is its last use (the LRU clock of evict()).
+    """
+
+    def __init__(self, root, max_bytes=1 << 30, code_tag=""):
+        self.root = Path(root)
+        self.max_bytes = int(max_bytes)
+        self.code_tag = code_tag
+        for sub in ("stat", "sig", "png"):
+            (self.root / sub).mkdir(parents=True, exist_ok=True)
+
+    # --- content digest ---
+    def file_digest(self, path):
+        path = Path(path).resolve()
+        st = path.stat()
+        memo = self.root / "stat" / f"{_h(path)}.json"
+        try:
+            m = json.loads(memo.read_text())
+            if m["size"] == st.st_size and m["mtime_ns"] == st.st_mtime_ns:
+                os.utime(memo)
+                return m["digest"]
+        except (OSError, ValueError, KeyError):
+            pass
+        h = hashlib.blake2b(digest_size=20)
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(HASH_CHUNK), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        self._write_atomic(memo, json.dumps(dict(path=str(path), size=st.st_size, mtime_ns=st.st_mtime_ns,
+                                                  digest=digest)))
+        return digest
+
+    def key(self, path, selection):
+        """selection: anything JSON-serializable that determines which nets are extracted."""
+        return _h(CACHE_VERSION, self.code_tag, self.file_digest(path), json.dumps(selection, sort_keys=True))
+
+    # --- parsed signals + cycle table ---
+    def load(self, key):
+        """(meta, {role: Signal}, pos, neg) with memory-mapped arrays, or None on miss."""
+        d = self.root / "sig" / key
+        try:
+            meta = json.loads((d / "meta.json").read_text())
+            sigs = {
+                role: Signal(np.load(d / f"sig_{role}_t.npy", mmap_mode="r"),
+                             np.load(d / f"sig_{role}_v.npy", mmap_mode="r"), name)
+                for role, name in meta["roles"].items()
+            }
+            pos = np.load(d / "cycles_pos.npy", mmap_mode="r")
+            neg = np.load(d / "cycles_neg.npy", mmap_mode="r")
+        except (OSError, ValueError, KeyError):
+            return None
+        os.utime(d)  # LRU clock
+        return meta, sigs, pos, neg
+
+    def store(self, key, sigs, pos, neg, **meta):
+        """sigs: {role: Signal}. Written to a temp dir and renamed into place (safe with --jobs)."""
+        final = self.root / "sig" / key
+        if final.exists():
+            return
+        tmp = Path(tempfile.mkdtemp(prefix=".tmp_", dir=self.root / "sig"))
+        try:
+            for role, sig in sigs.items():
+                np.save(tmp / f"sig_{role}_t.npy", np.asarray(sig.t))
+                np.save(tmp / f"sig_{role}_v.npy", np.asarray(sig.v))
+            np.save(tmp / "cycles_pos.npy", np.asarray(pos))
+            np.save(tmp / "cycles_neg.npy", np.asarray(neg))
+            meta = dict(meta, roles={role: sig.name for role, sig in sigs.items()}, created=time.time())
+            (tmp / "meta.json").write_text(json.dumps(meta))
+            os.replace(tmp, final)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def evict(self):
+        """
+        Drop fingerprints / digest memos whose PNG / source file is gone, then
+        least-recently-used entries of all three stores until the cache fits max_bytes.
+        """
+        entries = []
+        for d in (self.root / "sig").iterdir():
+            if d.is_dir() and not d.name.startswith(".tmp_"):
+                entries.append((d.stat().st_mtime, _dir_size(d), d))
+        removed = 0
+        for sub, target in (("png", _png_target), ("stat", _stat_target)):
+            for f in (self.root / sub).iterdir():
+                if f.name.startswith(".tmp_"):
+                    continue
+                try:
+                    t = target(f)
+                    if t is not None and not Path(t).exists():
+                        f.unlink()
+                        removed += 1
+                        continue
+                    entries.append((f.stat().st_mtime, _disk_bytes(f.stat()), f))
+                except (OSError, ValueError, AttributeError):
+                    continue
+        total = sum(sz for _, sz, _ in entries)
+        for _, sz, p in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            if p.is_dir():
+                shutil.rmtree(p, ignore_errors=True)
+            else:
+                p.unlink(missing_ok=True)
+            total -= sz
+            removed += 1
+        return removed, total
+
+    # --- render fingerprints ---
+    def render_fresh(self, out, fingerprint):
+        out = Path(out)
+        if not out.exists():
+            return False
+        entry = self.root / "png" / _h(out.resolve())
+        try:
+            if entry.read_text().split("\n", 1)[0] != fingerprint:
+                return False
+            os.utime(entry)
+        except OSError:
+            return False
+        return True
+
+    def render_done(self, out, fingerprint):
+        out = Path(out).resolve()
+        self._write_atomic(self.root / "png" / _h(out), f"{fingerprint}\n{out}")
+
+    @staticmethod
+    def fingerprint(*parts):
+        return _h(*parts)
+
+    def _write_atomic(self, path: Path, text):
+        fd, tmp = tempfile.mkstemp(prefix=".tmp_", dir=path.parent)
+        with os.fdopen(fd, "w") as fh:
+            fh.write(text)
+        os.replace(tmp, path)
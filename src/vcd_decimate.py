@@ -0,0 +1,140 @@
+# vcd_decimate.py — per-pixel-column envelope decimation of 1-bit four-state lanes
+# A lane with more changes than the output has pixel columns is reduced to one bin
+# per column: the value entering the bin, the value leaving it, and the set of values
+# seen inside (as a bitmask over the 0/1/x/z codes). A renderer turns that into at most
+# a handful of vertices per column, so glitches and X/Z stay visible while vertex count
+# (and memory) is bounded by image width instead of capture length.
+
+import numpy as np
+
+from vcd_signal import as_signal
+
+# ===== Exact step =====
+def step_arrays(tv, levels, t_end=None):
+    """
+    Post-step vertices of a lane, preallocated: for n changes -> 2n-1 (+1 tail) points.
+    levels: array of 4 y values indexed by code (0/1/x/z).
+    """
+    sig = as_signal(tv)
+    n = len(sig)
+    if not n:
+        return np.zeros(0), np.zeros(0)
+    lv = np.asarray(levels, dtype=float)
+    if t_end is None:
+        t_end = int(sig.t[-1]) + 1
+    tail = 1 if t_end > sig.t[-1] else 0
+    m = 2 * n - 1 + tail
+    t = np.empty(m, dtype=np.float64)
+    y = np.empty(m, dtype=np.float64)
+    ys = lv[sig.v]
+    t[0::2][:n] = sig.t
+    t[1::2][:n - 1] = sig.t[1:]
+    y[0::2][:n] = ys
+    y[1::2][:n - 1] = ys[:-1]
+    if tail:
+        t[-1] = t_end
+        y[-1] = ys[-1]
+    return t, y
+
+# ===== Envelope =====
+class Envelope:
+    """
+    ncols bins over [x0, x1]:
+      edges   : float bin edges (ncols+1)
+      enter   : code held when the bin starts
+      leave   : code held when the bin ends
+      present : bitmask (1<<code) of every code held somewhere inside the bin
+      nchg    : number of changes inside the bin
+    """
+
+    def __init__(self, edges, enter, leave, present, nchg):
+        self.edges = edges
+        self.enter = enter
+        self.leave = leave
+        self.present = present
+        self.nchg = nchg
+
+    def __len__(self):
+        return int(self.enter.size)
+
+    @property
+    def toggling(self):
+        """Bins where more than one value is seen (drawn as a vertical min..max bar)."""
+        p = self.present
+        return (p & (p - 1)) != 0
+
+    def has_code(self, code):
+        return (self.present & (1 << code)) != 0
+
+def envelope(tv, x0, x1, ncols):
+    sig = as_signal(tv)
+    ncols = max(1, int(ncols))
+    edges = np.linspace(float(x0), float(x1), ncols + 1)
+    t, v = sig.t, sig.v
+
+    # code held just before each bin starts (changes exactly on an edge belong to that bin)
+    i_enter = np.searchsorted(t, edges[:-1], side="left") - 1
+    enter = np.where(i_enter >= 0, v[np.maximum(i_enter, 0)] if v.size else 0, 0).astype(np.uint8)
+
+    lo = np.searchsorted(t, x0, side="left")
+    hi = np.searchsorted(t, x1, side="left")
+    tc, vc = t[lo:hi], v[lo:hi]
+    b = np.clip(np.searchsorted(edges, tc, side="right") - 1, 0, ncols - 1)
+
+    nchg = np.bincount(b, minlength=ncols)
+    present = (np.uint8(1) << enter).astype(np.uint8)
+    np.bitwise_or.at(present, b, (np.uint8(1) << vc).astype(np.uint8))
+
+    leave = enter.copy()
+    if b.size:
+        # last change of each bin sets the value leaving it
+        last = np.flatnonzero(np.r_[b[1:] != b[:-1], True])
+        leave[b[last]] = vc[last]
+    return Envelope(edges, enter, leave, present, nchg)
+
+def envelope_vertices(env, levels):
+    """
+    Polyline for an envelope: flat bins contribute one point; toggling bins contribute
+    a vertical bar at the bin centre covering every level seen. <= 5 points per bin.
+    """
+    lv = np.asarray(levels, dtype=float)
+    n = len(env)
+    mask_lo = np.full(16, np.inf)
+    mask_hi = np.full(16, -np.inf)
+    for m in range(1, 16):
+        ys = [lv[c] for c in range(4) if m & (1 << c)]
+        mask_lo[m], mask_hi[m] = min(ys), max(ys)
+
+    x0 = env.edges[:-1]
+    xm = 0.5 * (env.edges[:-1] + env.edges[1:])
+    y_in = lv[env.enter]
+    y_out = lv[env.leave]
+    y_lo = mask_lo[env.present]
+    y_hi = mask_hi[env.present]
+
+    xs = np.empty((n, 5))
+    ys = np.empty((n, 5))
+    xs[:, 0], ys[:, 0] = x0, y_in
+    xs[:, 1], ys[:, 1] = xm, y_in
+    # go to the nearer extreme first so the bar is drawn once
+    up_first = np.abs(y_in - y_hi) < np.abs(y_in - y_lo)
+    xs[:, 2], ys[:, 2] = xm, np.where(up_first, y_hi, y_lo)
+    xs[:, 3], ys[:, 3] = xm, np.where(up_first, y_lo, y_hi)
+    xs[:, 4], ys[:, 4] = xm, y_out
+
+    keep = np.zeros((n, 5), dtype=bool)
+    keep[:, 0] = True
+    keep[:, 1:] = env.toggling[:, None]
+    x = np.r_[xs[keep], env.edges[-1]]
+    y = np.r_[ys[keep], y_out[-1] if n else 0.0]
+    return x, y
+
+def xz_runs(env, code):
+    """(x_start, x_end) runs of toggling bins that contain `code` (X or Z) — hidden inside a bar otherwise."""
+    m = env.toggling & env.has_code(code)
+    if not m.any():
+        return np.zeros(0), np.zeros(0)
+    d = np.diff(np.r_[0, m.astype(np.int8), 0])
+    s = np.flatnonzero(d == 1)
+    e = np.flatnonzero(d == -1)
+    return env.edges[s], env.edges[e]
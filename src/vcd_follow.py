@@ -0,0 +1,300 @@
+# vcd_follow.py — incremental decode of a VCD that is still being written (--follow)
+# The source is tailed (growing file until it stays idle, or a FIFO / stdin until EOF),
+# the header is parsed as soon as it is complete and body chunks are scanned for the
+# selected nets only. SCK cycles are built incrementally with a carried edge state, and
+# every `batch` new cycles the current window is scored/aligned with the batch decoder.
+# A frame is emitted once enough cycles follow it that the alignment can no longer
+# change; history older than the undecided part of the window is dropped (the value
+# held at the cut is kept), so memory stays bounded by the window, not the capture.
+
+from array import array
+from pathlib import Path
+import os
+import stat
+import sys
+import time
+
+import numpy as np
+
+from swd_decode import FRAME_BITS, CycleSamples, FrameTable, align_scan, frame_scores, rst_slots
+from vcd_profile import count, stage
+from vcd_signal import V_0, V_1, Signal
+from vcd_stream import change_regex, parse_vcd_header, scan_changes
+
+TAIL_CHUNK = 1 << 20
+POLL_S = 0.2
+BATCH_CYCLES = 256
+
+# ===== Source =====
+def tail_chunks(src, timeout=10.0, poll=POLL_S):
+    """
+    Text chunks ending on line boundaries from `src`: '-' (stdin) or a FIFO are read
+    until EOF; a regular file is tailed until it has not grown for `timeout` seconds
+    (it may also not exist yet when following starts).
+    """
+    if src == "-":
+        fd, growing = sys.stdin.fileno(), False
+    else:
+        path = Path(src)
+        t0 = time.monotonic()
+        while not path.exists():
+            if time.monotonic() - t0 > timeout:
+                raise FileNotFoundError(f"{src}: not created within {timeout:g}s")
+            time.sleep(poll)
+        growing = not stat.S_ISFIFO(path.stat().st_mode)
+        fd = os.open(str(path), os.O_RDONLY)
+
+    carry = ""
+    idle0 = time.monotonic()
+    try:
+        while True:
+            buf = os.read(fd, TAIL_CHUNK)  # returns what is available, b"" at (current) EOF
+            if buf:
+                idle0 = time.monotonic()
+                buf = carry + buf.decode("latin-1")
+                cut = buf.rfind("\n")
+                if cut < 0:
+                    carry = buf
+                    continue
+                carry = buf[cut + 1:]
+                yield buf[:cut + 1]
+                continue
+            if not growing or time.monotonic() - idle0 > timeout:
+                break
+            time.sleep(poll)
+        if carry:
+            yield carry
+    finally:
+        if src != "-":
+            os.close(fd)
+
+def split_header(chunks):
+    """(header lines, iterator over body chunks) — waits until $enddefinitions has arrived."""
+    text = ""
+    for chunk in chunks:
+        text += chunk
+        k = text.find("$enddefinitions")
+        if k >= 0:
+            eol = text.find("\n", k)
+            if eol >= 0:
+                head, rest = text[:eol + 1], text[eol + 1:]
+
+                def body():
+                    if rest:
+                        yield rest
+                    yield from chunks
+                return head.splitlines(), body()
+    raise ValueError("VCD stream ended before $enddefinitions")
+
+# ===== Incremental SCK cycles =====
+class CycleBuilder:
+    """
+    Same cycles as swd_decode.sck_cycle_arrays() (a rise followed directly by a fall),
+    fed with successive pieces of the SCK change list.
+    """
+
+    def __init__(self):
+        self.last = None      # code of the last SCK change seen
+        self.pending = None   # time of a rise still waiting for its fall
+
+    def feed(self, t, v):
+        empty = np.zeros(0, dtype=np.int64)
+        if not t.size:
+            return empty, empty
+        if self.last is None:
+            prev = np.r_[v[:1], v[:-1]]  # first change of the capture is never an edge
+        else:
+            prev = np.r_[np.uint8(self.last), v[:-1]]
+        self.last = int(v[-1])
+        rise = (v == V_1) & (prev != V_1)
+        fall = (v == V_0) & (prev == V_1)
+        ev = np.flatnonzero(rise | fall)
+        ev_t, ev_rise = t[ev], v[ev] == V_1
+        if self.pending is not None:
+            ev_t = np.r_[np.int64(self.pending), ev_t]
+            ev_rise = np.r_[True, ev_rise]
+        k = np.flatnonzero(~ev_rise[1:] & ev_rise[:-1]) + 1
+        self.pending = int(ev_t[-1]) if ev_t.size and ev_rise[-1] else None
+        return ev_t[k - 1], ev_t[k]
+
+# ===== Windowed decoder =====
+class FollowDecoder:
+    """
+    dec = FollowDecoder(header_lines, select)       # select(names) -> {role: net name}
+    for batch in dec.run(body_chunks): ...          # batch: (frames, window) per emitted group
+    frames.start_idx is global; window.start_local maps rows back into window cycles.
+    """
+
+    def __init__(self, header_lines, select, align="auto", mode="auto", max_shift=32, min_score=8,
+                 batch=BATCH_CYCLES):
+        self.timescale, variables = parse_vcd_header(header_lines)
+        by_name = {v.name: v for v in variables}
+        self.sel = select([v.name for v in variables])
+        self.code_of = {role: by_name[n].code for role, n in self.sel.items() if n in by_name}
+        missing = [role for role in ("sck", "mosi", "swdio") if role not in self.code_of]
+        if missing:
+            raise ValueError(f"follow: no net selected for {', '.join(missing)}")
+        self.align = align
+        if align == "auto":  # the whole capture is never seen at once: decide on the nets present
+            self.align = "rst" if "rst_n" in self.code_of else "scan"
+        self.mode = mode
+        self.max_shift = max_shift
+        self.min_score = min_score
+        self.batch = batch
+        # cycles kept beyond a settled frame: a later frame's search window must fit in
+        self.lookahead = max(max_shift, FRAME_BITS) + FRAME_BITS + 2
+
+        self.hist = {role: (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint8)) for role in self.code_of}
+        self.t_head = None    # time of the synthetic first entry after a cut
+        self.off = 0          # global index of window cycle 0
+        self.pos = np.zeros(0, dtype=np.int64)
+        self.neg = np.zeros(0, dtype=np.int64)
+        self.next_free = 0    # global cycle index after the last emitted frame
+        self.last_rise = None # last rst_n rise already aligned (align=rst)
+        self.n_decoded = 0    # window size at the last decode
+        self.cycles_total = 0
+        self.frames_total = 0
+        self.peak_window = 0
+        self.cb = CycleBuilder()
+        self.rx = change_regex(set(self.code_of.values()))
+        self.cur_t = 0
+
+    def signals(self):
+        return {role: Signal(t, v, self.sel[role]) for role, (t, v) in self.hist.items()}
+
+    def feed(self, chunk):
+        codes = set(self.code_of.values())
+        buf_t = {c: array("q") for c in codes}
+        buf_v = {c: array("B") for c in codes}
+        self.cur_t = scan_changes(chunk, self.rx, buf_t, buf_v, self.cur_t)
+        for role, c in self.code_of.items():
+            if buf_t[c]:
+                t, v = self.hist[role]
+                self.hist[role] = (np.concatenate((t, np.frombuffer(buf_t[c], dtype=np.int64))),
+                                   np.concatenate((v, np.frombuffer(buf_v[c], dtype=np.uint8))))
+        c = self.code_of["sck"]
+        if buf_t[c]:
+            pos, neg = self.cb.feed(np.frombuffer(buf_t[c], dtype=np.int64),
+                                    np.frombuffer(buf_v[c], dtype=np.uint8))
+            if pos.size:
+                self.pos = np.concatenate((self.pos, pos))
+                self.neg = np.concatenate((self.neg, neg))
+                self.cycles_total += int(pos.size)
+                count("cycles", int(pos.size))
+        self.peak_window = max(self.peak_window, int(self.pos.size))
+
+    def decode(self, final=False):
+        """Emit every frame whose alignment is settled; returns (FrameTable, Window) or None."""
+        n = int(self.pos.size)
+        if n < FRAME_BITS or (not final and (n < self.lookahead + FRAME_BITS or n - self.n_decoded < self.batch)):
+            return None
+        self.n_decoded = n
+        sigs = self.signals()
+        with stage("decode"):
+            tb_en = sigs.get("tb_en")
+            cs = CycleSamples((self.pos, self.neg), sigs["mosi"], sigs["swdio"], rnw=sigs.get("rnw"),
+                              rst_n=sigs.get("rst_n"), tb_en=tb_en or None,
+                              tb_val=(sigs.get("tb_val") if tb_en else None))
+            scores, _ = frame_scores(cs)
+            if self.align == "rst":
+                starts, keep = self._align_rst(cs, scores, sigs.get("rst_n"), n, final)
+            else:
+                starts, keep = self._align_scan(cs, scores, n, final)
+            frames = FrameTable(cs, starts, scores, self.mode) if starts.size else None
+
+        out = None
+        if frames is not None:
+            win = Window(self.off, self.pos, self.neg, sigs, starts.copy())
+            frames.start_idx = starts + self.off
+            self.next_free = int(frames.start_idx[-1]) + FRAME_BITS
+            self.frames_total += len(frames)
+            out = frames, win
+        if not final:
+            self._cut(keep)
+        return out
+
+    def _align_rst(self, cs, scores, rst, n, final):
+        """
+        rst_slots() for the rises not handled yet, after the last emitted frame. A rise is
+        settled once its whole max_shift search window (plus one frame) has arrived; the
+        cut stays before the first unsettled rise so it is seen again, as a real edge, next
+        time. While an unsettled rise could still take the slot of the last frame, that
+        frame is held back too, with every rise that competed for it.
+        """
+        rises = rst.rise_times() if rst else np.zeros(0, dtype=np.int64)
+        lo = max(x for x in (self.t_head, self.last_rise, -1) if x is not None)
+        rises = rises[rises > lo]  # the held value at a cut is not an edge
+        keep = n - self.lookahead
+        base = np.searchsorted(self.pos, rises, side="right")
+        late = base + self.max_shift + FRAME_BITS > n
+        if not final and late.any():
+            keep = min(keep, int(base[late][0]) - 2)
+        else:
+            late[:] = False
+        starts, src = rst_slots(cs, scores, rises[~late], self.max_shift, self.min_score,
+                                max(self.next_free - self.off, 0))
+        if late.any() and starts.size and int(base[late][0]) < starts[-1] + FRAME_BITS:
+            r = int(src[-1])
+            keep = min(keep, int(base[r]) - 2)
+            starts, late[r:] = starts[:-1], True
+        settled = rises[~late]
+        if settled.size:
+            self.last_rise = int(settled[-1])
+        return starts, keep
+
+    def _align_scan(self, cs, scores, n, final):
+        """
+        align_scan() over the window, which always starts where the scan chain resumes
+        (after the last emitted frame, or before the candidate of the first unsettled one).
+        """
+        starts = align_scan(cs, scores, self.min_score)
+        keep = n - self.lookahead
+        if not final:
+            late = starts + self.lookahead > n
+            if late.any():
+                keep = min(keep, int(starts[late][0]) - FRAME_BITS)  # its candidate is at most 47 earlier
+                starts = starts[~late]
+        if starts.size:
+            keep = max(keep, int(starts[-1]) + FRAME_BITS)
+        return starts, keep
+
+    def _cut(self, k):
+        """Drop window cycles before local index k and signal history before their start."""
+        k = min(k, int(self.pos.size) - 1)
+        if k <= 0:
+            return
+        t_cut = int(self.pos[k])
+        for role, (t, v) in self.hist.items():
+            i0 = int(np.searchsorted(t, t_cut, side="right")) - 1
+            if i0 > 0 or (i0 == 0 and t[0] < t_cut):
+                t, v = t[i0:].copy(), v[i0:].copy()
+                t[0] = t_cut
+                self.hist[role] = (t, v)
+        self.t_head = t_cut
+        self.pos, self.neg = self.pos[k:].copy(), self.neg[k:].copy()
+        self.off += k
+        self.n_decoded = max(0, self.n_decoded - k)
+
+    def run(self, body_chunks):
+        for chunk in body_chunks:
+            with stage("parse"):
+                self.feed(chunk)
+            res = self.decode()
+            if res is not None:
+                yield res
+        res = self.decode(final=True)
+        if res is not None:
+            yield res
+
+class Window:
+    """Decoded window handed to the caller: cycles/signals plus window-local frame starts."""
+
+    def __init__(self, off, pos, neg, sigs, start_local):
+        self.off = off
+        self.pos = pos
+        self.neg = neg
+        self.sigs = sigs
+        self.start_local = start_local
+
+    def cycles(self):
+        return list(zip(self.pos.tolist(), self.neg.tolist()))
@@ -0,0 +1,190 @@
+# vcd_profile.py — opt-in per-stage / per-file instrumentation for the vcd_to_png pipeline
+# Pipeline code wraps its stages in `with stage("parse"):` and bumps counters with
+# count("value_at"); both are no-ops until enable() is called (--profile), so the hot
+# paths pay one global lookup when profiling is off. Per (file, stage) the profiler keeps
+# wall and CPU time, entry count, RSS high-water, optional traced peak allocation
+# (tracemalloc, --profile-mem) and the counters bumped while the stage was innermost.
+# One stage can additionally run under cProfile and be dumped as a .prof file.
+
+from contextlib import contextmanager
+from pathlib import Path
+import cProfile
+import json
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, RSS is reported as '-'
+    resource = None
+
+PROFILER = None
+
+def rss_mb():
+    """Process RSS high-water mark so far (MiB), None where getrusage is unavailable."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1 << 20) if sys.platform == "darwin" else rss / 1024
+
+def _record(records, key):
+    rec = records.get(key)
+    if rec is None:
+        rec = records[key] = dict(file=key[0], stage=key[1], calls=0, wall_s=0.0, cpu_s=0.0,
+                                  peak_mb=None, rss_mb=None, counters={})
+    return rec
+
+def _merge(records, more):
+    for r in more:
+        rec = _record(records, (r["file"], r["stage"]))
+        rec["calls"] += r["calls"]
+        rec["wall_s"] += r["wall_s"]
+        rec["cpu_s"] += r["cpu_s"]
+        for k in ("peak_mb", "rss_mb"):
+            if r[k] is not None:
+                rec[k] = max(rec[k] or 0.0, r[k])
+        for k, n in r["counters"].items():
+            rec["counters"][k] = rec["counters"].get(k, 0) + n
+
+class _Frame:
+    __slots__ = ("key", "t0", "c0", "mem0", "peak_seen")
+
+class Profiler:
+    def __init__(self, mem=False, cprofile_stage=None):
+        self.mem = mem
+        self.cprofile_stage = cprofile_stage
+        self.cprof = cProfile.Profile() if cprofile_stage else None
+        self.records = {}   # (file, stage) -> record dict, insertion ordered
+        self.stack = []
+        self.file = ""
+        if mem and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _record(self, key):
+        return _record(self.records, key)
+
+    def enter(self, name):
+        f = _Frame()
+        f.key = (self.file, name)
+        self._record(f.key)  # table rows in first-entered order
+        f.peak_seen = 0
+        f.mem0 = 0
+        if self.mem:
+            cur, peak = tracemalloc.get_traced_memory()
+            if self.stack:
+                self.stack[-1].peak_seen = max(self.stack[-1].peak_seen, peak)
+            tracemalloc.reset_peak()
+            f.mem0 = cur
+        if self.cprof is not None and name == self.cprofile_stage:
+            self.cprof.enable()
+        f.t0 = time.perf_counter()
+        f.c0 = time.process_time()
+        self.stack.append(f)
+
+    def leave(self):
+        f = self.stack.pop()
+        wall = time.perf_counter() - f.t0
+        cpu = time.process_time() - f.c0
+        if self.cprof is not None and f.key[1] == self.cprofile_stage:
+            self.cprof.disable()
+        rec = self._record(f.key)
+        rec["calls"] += 1
+        rec["wall_s"] += wall
+        rec["cpu_s"] += cpu
+        rec["rss_mb"] = rss_mb()
+        if self.mem:
+            _, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, f.peak_seen)
+            rec["peak_mb"] = max(rec["peak_mb"] or 0.0, (peak - f.mem0) / (1 << 20))
+            if self.stack:
+                self.stack[-1].peak_seen = max(self.stack[-1].peak_seen, peak)
+
+    def count(self, name, n):
+        key = self.stack[-1].key if self.stack else (self.file, "(other)")
+        c = self._record(key)["counters"]
+        c[name] = c.get(name, 0) + n
+
+    # --- collection across processes (--jobs) ---
+    def take(self):
+        """Records so far (picklable), then start afresh — a pool worker returns these per job."""
+        out = list(self.records.values())
+        self.records = {}
+        return out
+
+    def merge(self, records):
+        _merge(self.records, records)
+
+    # --- reporting ---
+    def totals(self):
+        """Per-stage sums over all files (peak/RSS: max)."""
+        agg = {}
+        _merge(agg, (dict(r, file="*") for r in self.records.values()))
+        return list(agg.values())
+
+    def table(self):
+        head = ("file", "stage", "calls", "wall[s]", "cpu[s]", "peak[MB]", "rss[MB]", "counters")
+        rows = []
+        for r in list(self.records.values()) + self.totals():
+            rows.append((
+                r["file"] or "-", r["stage"], str(r["calls"]), f"{r['wall_s']:.3f}", f"{r['cpu_s']:.3f}",
+                "-" if r["peak_mb"] is None else f"{r['peak_mb']:.1f}",
+                "-" if r["rss_mb"] is None else f"{r['rss_mb']:.0f}",
+                " ".join(f"{k}={v}" for k, v in sorted(r["counters"].items())),
+            ))
+        widths = [max(len(h), *(len(row[i]) for row in rows)) if rows else len(h) for i, h in enumerate(head)]
+        lines = ["  ".join(h.ljust(w) for h, w in zip(head, widths))]
+        for row in rows:
+            lines.append("  ".join(c.ljust(w) if i < 2 or i == 7 else c.rjust(w)
+                                   for i, (c, w) in enumerate(zip(row, widths))).rstrip())
+        return "\n".join(lines)
+
+    def write_json(self, path, **meta):
+        Path(path).write_text(json.dumps(dict(meta, records=list(self.records.values()),
+                                              totals=self.totals()), indent=2))
+
+    def dump_cprofile(self, path):
+        if self.cprof is None:
+            return False
+        self.cprof.dump_stats(str(path))
+        return True
+
+# ===== Module-level switch =====
+def enable(mem=False, cprofile_stage=None):
+    global PROFILER
+    PROFILER = Profiler(mem=mem, cprofile_stage=cprofile_stage)
+    return PROFILER
+
+@contextmanager
+def _stage(p, name):
+    p.enter(name)
+    try:
+        yield
+    finally:
+        p.leave()
+
+@contextmanager
+def _noop():
+    yield
+
+def stage(name):
+    p = PROFILER
+    return _noop() if p is None else _stage(p, name)
+
+@contextmanager
+def file_scope(name):
+    """Attribute the stages run inside to one input file."""
+    p = PROFILER
+    if p is None:
+        yield
+        return
+    prev, p.file = p.file, name
+    try:
+        yield
+    finally:
+        p.file = prev
+
+def count(name, n=1):
+    p = PROFILER
+    if p is not None:
+        p.count(name, n)
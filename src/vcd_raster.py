@@ -0,0 +1,343 @@
+# vcd_raster.py — matplotlib-free raster renderer for lane / zone PNGs
+# Draws the fixed layout of the RAW and frame plots (lanes stacked bottom-up, dotted
+# mid-lines, shaded zones, labels, title, summary box, time axis) straight into a uint8
+# palette-index buffer and writes it as an indexed PNG (zlib only). Each lane is reduced
+# to one envelope bin per pixel column (vcd_decimate), so a lane costs a few array ops
+# whatever its change count, and memory is one byte per pixel of a fixed-size image.
+# Text uses the built-in 8x14 bitmap font below (DejaVu Sans Mono, printable ASCII + em dash).
+
+import struct
+import zlib
+
+import numpy as np
+
+from vcd_decimate import envelope
+from vcd_signal import as_signal
+
+# ===== Font =====
+GLYPH_W, GLYPH_H = 8, 14
+GLYPH_CHARS = "".join(chr(c) for c in range(32, 127)) + "—"
+_FONT_HEX = (
+    "00000000000000000000000000000000181818181818001818000000000024242424000000000000000000484828fe24"
+    "247f1612120000000000003c16021c3840623c00000000000e09096e1876d0d07000000000003c06040c9ad363625c00"
+    "0000000018181818000000000000000010101808080808080818101000000c081810101010101018080c00000000084a"
+    "1c1c4a080000000000000000001818187f181818000000000000000000000000001818080800000000000000003c0000"
+    "0000000000000000000000000018180000000000602030101008080c0406020000003c2662425a4262263c0000000000"
+    "1e101010101010107c00000000003c22602030180c067e00000000003c2260203c6060623c0000000000303828242622"
+    "7e202000000000003e06063e206060221c00000000003c06023e664242663c00000000007e602030101818080c000000"
+    "00003c6662263c6642663c00000000003c266262667c60201c0000000000000018180000001818000000000000001818"
+    "0000001818080800000000004038060638400000000000000000007f00007f000000000000000000021c70701c020000"
+    "000000003c606030180800080800000000003c4642f3c9c9c9f302063800000018183c3424667e424300000000003e62"
+    "62623e6242623e000000000038440602020206443800000000001e226242424262221e00000000007e0606067e060606"
+    "7e00000000007e0606067e0606060600000000003c460202724242463c0000000000424242427e424242420000000000"
+    "7e181818181818187e00000000003c202020202020321e00000000004222120e1e123262420000000000060606060606"
+    "06067e00000000006767675f5b5b434343000000000046464e4a5a5272626200000000003c666242424262663c000000"
+    "00003e664646663e06060600000000003c666242424262663c30200000003e6262623e326242c200000000003c060206"
+    "3c6040623c0000000000ff1818181818181818000000000042424242424242663c00000000004342622624243c181800"
+    "00000000c1c1435b5a5a766666000000000042663c18183c24664300000000004366243c181818181800000000007e60"
+    "2030180804067e000000380808080808080808080838000000000206040c08081010302060001c101010101010101010"
+    "101c00000000183c2642000000000000000000000000000000000000000000ff000c0800000000000000000000000000"
+    "00003c22607c62627c000000020202023e66464246663e0000000000000038440606064438000000606060607c666262"
+    "62667c000000000000003c66427e02463c000000701808087e080808080808000000000000007c66626262667c60201c"
+    "020202023e666662626262000000180000001c18181818187e000000100000001c10101010101010180e060606066636"
+    "1e1e3666460000000e08080808080808080870000000000000007e5a5a5a5a5a5a000000000000003e66666262626200"
+    "0000000000003c66424242663c000000000000003e66464246663e020202000000007c66626262667c60606000000000"
+    "7c0c0c0c0c0c0c000000000000003c26063c20223c000000000008087e08080808087800000000000000626262626666"
+    "7c000000000000004262262434181800000000000000c1c35a5a5e662600000000000000622418181c24420000000000"
+    "0000426624243c1818180806000000007e2010180c047e00000030181818080e08181818183000001818181818181818"
+    "1818181818000e081818183018181808080e00000000000000000e7000000000000000000000000000ff000000000000")
+
+def _glyphs():
+    rows = np.frombuffer(bytes.fromhex("".join(_FONT_HEX)), dtype=np.uint8).reshape(-1, GLYPH_H)
+    return ((rows[:, :, None] >> np.arange(GLYPH_W, dtype=np.uint8)) & 1).astype(bool)  # (chars, H, W)
+
+GLYPHS = _glyphs()
+GLYPH_INDEX = {ch: i for i, ch in enumerate(GLYPH_CHARS)}
+
+def text_mask(s):
+    """(GLYPH_H, len(s)*GLYPH_W) bool bitmap of one line of text; unknown characters draw as '?'."""
+    idx = [GLYPH_INDEX.get(ch, GLYPH_INDEX["?"]) for ch in s]
+    return GLYPHS[idx].transpose(1, 0, 2).reshape(GLYPH_H, -1)
+
+# ===== Canvas + PNG =====
+def hex_rgb(color):
+    c = color.lstrip("#")
+    return tuple(int(c[i:i + 2], 16) for i in (0, 2, 4))
+
+def blend(color, alpha, bg=(255, 255, 255)):
+    """color drawn with alpha over bg, as matplotlib composites a translucent span on white."""
+    return tuple(int(round(alpha * c + (1 - alpha) * b)) for c, b in zip(hex_rgb(color), bg))
+
+class Canvas:
+    """h x w palette-index image; colors get palette slots on first use (index 0 = white)."""
+
+    def __init__(self, w, h):
+        self.px = np.zeros((h, w), dtype=np.uint8)
+        self.palette = [(255, 255, 255)]
+        self._slot = {(255, 255, 255): 0}
+
+    @property
+    def shape(self):
+        return self.px.shape
+
+    def color(self, rgb):
+        rgb = hex_rgb(rgb) if isinstance(rgb, str) else tuple(rgb)
+        if rgb not in self._slot:
+            if len(self.palette) == 256:
+                raise ValueError("raster: palette full (256 colors)")
+            self._slot[rgb] = len(self.palette)
+            self.palette.append(rgb)
+        return self._slot[rgb]
+
+    def fill(self, y0, y1, x0, x1, color):
+        self.px[max(y0, 0):max(y1, 0), max(x0, 0):max(x1, 0)] = self.color(color)
+
+    def rect(self, y0, y1, x0, x1, color):
+        """1-px outline of [y0, y1) x [x0, x1)."""
+        c = self.color(color)
+        self.px[y0, x0:x1] = c
+        self.px[y1 - 1, x0:x1] = c
+        self.px[y0:y1, x0] = c
+        self.px[y0:y1, x1 - 1] = c
+
+    def text(self, x, y, s, color, ha="left"):
+        """One line of text with its top at row y; ha: x is the left / center / right end."""
+        m = text_mask(s)
+        w = m.shape[1]
+        x = int(x - {"left": 0, "center": w // 2, "right": w}[ha])
+        h_img, w_img = self.px.shape
+        y0, x0 = max(y, 0), max(x, 0)
+        y1, x1 = min(y + GLYPH_H, h_img), min(x + w, w_img)
+        if y1 <= y0 or x1 <= x0:
+            return
+        self.px[y0:y1, x0:x1][m[y0 - y:y1 - y, x0 - x:x1 - x]] = self.color(color)
+
+    def write_png(self, path, level=1):
+        """8-bit indexed PNG (filter 0 on every row; zlib level 1 — the buffer is mostly runs)."""
+        h, w = self.px.shape
+        raw = np.empty((h, w + 1), dtype=np.uint8)
+        raw[:, 0] = 0
+        raw[:, 1:] = self.px
+
+        def chunk(tag, data):
+            return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+        with open(path, "wb") as fh:
+            fh.write(b"\x89PNG\r\n\x1a\n")
+            fh.write(chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 3, 0, 0, 0)))
+            fh.write(chunk(b"PLTE", bytes(np.asarray(self.palette, dtype=np.uint8).ravel())))
+            fh.write(chunk(b"IDAT", zlib.compress(raw.tobytes(), level)))
+            fh.write(chunk(b"IEND", b""))
+
+# ===== Layout =====
+PLOT_W = 1800        # data columns (= envelope bins) — fixed, so the image size only grows with lanes
+LANE_PX = 40         # one TRACK_STEP in pixels
+LINE_PX = 2          # lane line thickness
+PAD = 8
+ROW_H = GLYPH_H + PAD
+TICK_PX = 4
+# matplotlib's default color cycle, one color per drawn lane in order
+LANE_COLORS = ("#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
+               "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf")
+MIDLINE_CLR = "#bfbfbf"
+AXIS_CLR = "#000000"
+ZONE_LABEL_CLR = "#1f4fbf"
+ZONE_ALPHA = 0.15
+
+def nice_ticks(x0, x1, target=6):
+    """Round tick positions (1/2/5 x 10^k steps) inside [x0, x1]."""
+    span = float(x1 - x0)
+    if span <= 0:
+        return np.array([x0], dtype=float)
+    raw = span / target
+    mag = 10.0 ** np.floor(np.log10(raw))
+    step = next(m * mag for m in (1, 2, 5, 10) if m * mag >= raw)
+    return np.arange(np.ceil(x0 / step) * step, x1 + step * 1e-9, step)
+
+def tick_label(v):
+    return f"{int(v)}" if float(v).is_integer() else f"{v:g}"
+
+class LaneLayout:
+    """Pixel geometry of a lane plot: lanes stacked bottom-up like the matplotlib figure."""
+
+    def __init__(self, names, nlanes, levels, amp, step, n_title_rows, plot_w=PLOT_W):
+        self.plot_w = plot_w
+        self.unit = LANE_PX / step
+        self.levels = np.asarray(levels, dtype=float)
+        self.amp, self.step = amp, step
+        self.y_lo = -0.2
+        self.y_hi = step * (nlanes - 1) + amp + 0.4
+        self.x0 = max((len(n) for n in names), default=0) * GLYPH_W + 2 * PAD
+        self.top = n_title_rows * ROW_H + PAD
+        self.plot_h = int(round((self.y_hi - self.y_lo) * self.unit))
+        self.bottom = self.top + self.plot_h
+        self.width = self.x0 + plot_w + 2 * PAD
+        self.height = self.bottom + TICK_PX + 2 * ROW_H
+
+    def row(self, y):
+        return (self.top + np.round((self.y_hi - np.asarray(y, dtype=float)) * self.unit)).astype(np.int64)
+
+    def col(self, t, t0, t1):
+        w = self.plot_w
+        return np.clip(np.round((np.asarray(t, dtype=float) - t0) / (t1 - t0) * w), 0, w).astype(np.int64)
+
+def _mask_rows(level_rows):
+    """Per present-bitmask (0..15): (top, bottom) pixel rows spanned by the codes in it."""
+    top = np.zeros(16, dtype=np.int64)
+    bot = np.zeros(16, dtype=np.int64)
+    for m in range(1, 16):
+        rs = [level_rows[c] for c in range(4) if m & (1 << c)]
+        top[m], bot[m] = min(rs), max(rs)
+    return top, bot
+
+def draw_lane(cv, lay, sig, yoff, t0, t1, color, xz_colors=None):
+    """
+    One envelope bin per column: a bar from the highest to the lowest level held in the
+    bin (a flat bin is just the line). xz_colors={code: color} re-marks X/Z inside toggling bins.
+    """
+    env = envelope(sig, t0, t1, lay.plot_w)
+    level_rows = lay.row(yoff + lay.levels)
+    top, bot = _mask_rows(level_rows)
+    r0, r1 = int(level_rows.min()), int(level_rows.max()) + LINE_PX
+    r = np.arange(r0, r1)[:, None]
+    on = (r >= top[env.present][None, :]) & (r < bot[env.present][None, :] + LINE_PX)
+    cv.px[r0:r1, lay.x0:lay.x0 + lay.plot_w][on] = cv.color(color)
+    for code, clr in (xz_colors or {}).items():
+        cols = np.flatnonzero(env.toggling & env.has_code(code))
+        if cols.size:
+            rr = int(level_rows[code])
+            cv.px[rr - 1:rr + LINE_PX + 1, lay.x0 + cols] = cv.color(clr)
+
+def render_lanes(path, title, lanes, t0, t1, levels, amp, step, zones=(), summary="",
+                 xz_colors=None, xz_min_changes=None, level=1):
+    """
+    lanes: [(name, Signal|tv)] bottom-up; zones: [(t_start, t_end, label, color)];
+    summary: text in a box at the top right. With xz_colors, lanes with more than
+    xz_min_changes changes in [t0, t1] get their X/Z re-marked (like the decimated RAW plot).
+    """
+    if t1 <= t0:
+        t1 = t0 + 1
+    names = [n for n, _ in lanes]
+    lay = LaneLayout(names, len(lanes), levels, amp, step, 2 if summary else 1)
+    cv = Canvas(lay.width, lay.height)
+    x_plot = slice(lay.x0, lay.x0 + PLOT_W)
+
+    for z0, z1, label, clr in zones:
+        c0, c1 = lay.col([z0, z1], t0, t1)
+        cv.fill(lay.top, lay.bottom, lay.x0 + int(c0), lay.x0 + int(c1), blend(clr, ZONE_ALPHA))
+
+    mid = cv.color(MIDLINE_CLR)
+    n_drawn = 0
+    for k, (name, tv) in enumerate(lanes):
+        yoff = k * step
+        ym = int(lay.row(yoff + amp * 0.5))
+        cv.px[ym, x_plot][np.arange(PLOT_W) % 4 < 2] = mid
+        cv.text(lay.x0 - PAD, ym - GLYPH_H // 2, name, AXIS_CLR, ha="right")
+        sig = as_signal(tv) if tv else None
+        if not sig:
+            continue
+        sig = sig.window(t0, t1)
+        if not len(sig):
+            continue
+        dense = xz_min_changes is not None and len(sig) > xz_min_changes
+        draw_lane(cv, lay, sig, yoff, t0, t1, LANE_COLORS[n_drawn % len(LANE_COLORS)],
+                  xz_colors if dense else None)
+        n_drawn += 1
+
+    for z0, z1, label, _ in zones:
+        c0, c1 = lay.col([z0, z1], t0, t1)
+        cv.text(lay.x0 + (int(c0) + int(c1)) // 2, lay.top + 3, label, ZONE_LABEL_CLR, ha="center")
+
+    cv.rect(lay.top, lay.bottom + 1, lay.x0, lay.x0 + PLOT_W + 1, AXIS_CLR)
+    ticks = nice_ticks(t0, t1)
+    for t, c in zip(ticks, lay.col(ticks, t0, t1)):
+        x = lay.x0 + int(c)
+        cv.fill(lay.bottom, lay.bottom + TICK_PX, x, x + 1, AXIS_CLR)
+        cv.text(x, lay.bottom + TICK_PX + 2, tick_label(t), AXIS_CLR, ha="center")
+    cv.text(lay.x0 + PLOT_W // 2, lay.bottom + TICK_PX + ROW_H + 2, "time (VCD timescale units)",
+            AXIS_CLR, ha="center")
+
+    if summary:
+        w = len(summary) * GLYPH_W
+        x1 = lay.width - PAD
+        cv.fill(PAD // 2, PAD // 2 + ROW_H, x1 - w - PAD, x1, "#ffffff")
+        cv.rect(PAD // 2, PAD // 2 + ROW_H, x1 - w - PAD, x1, AXIS_CLR)
+        cv.text(x1 - PAD // 2, PAD // 2 + PAD // 2, summary, AXIS_CLR, ha="right")
+    cv.text(lay.x0 + PLOT_W // 2, lay.top - ROW_H, title, AXIS_CLR, ha="center")
+
+    cv.write_png(path, level)
+    return cv.shape
+
+# ===== Pyramid tiles (--tiles) =====
+class TileLayout(LaneLayout):
+    """LaneLayout of one bare tile: the lane area only (no labels, title or axis), plot_w wide."""
+
+    def __init__(self, nlanes, levels, amp, step, plot_w):
+        super().__init__([], nlanes, levels, amp, step, 0, plot_w)
+        self.x0, self.top = 0, 0
+        self.bottom = self.plot_h
+        self.width, self.height = plot_w, self.plot_h + LINE_PX
+
+def render_tiles(paths, lanes, t0, t1, levels, amp, step, plot_w, xz_colors=None, xz_min_changes=None, level=1):
+    """
+    The lanes of render_lanes() over [t0, t1) as len(paths) bare tiles of plot_w columns,
+    midlines included: drawn as one strip (one window + envelope per lane for the whole
+    run) and cut. Lane k keeps color k in every tile, so neighbouring tiles line up.
+    """
+    n = len(paths)
+    lay = TileLayout(len(lanes), levels, amp, step, n * plot_w)
+    cv = Canvas(lay.width, lay.height)
+    mid = cv.color(MIDLINE_CLR)
+    for k, (_, tv) in enumerate(lanes):
+        yoff = k * step
+        cv.px[int(lay.row(yoff + amp * 0.5))][np.arange(lay.plot_w) % 4 < 2] = mid
+        sig = as_signal(tv) if tv else None
+        if not sig:
+            continue
+        sig = sig.window(t0, t1)
+        if not len(sig):
+            continue
+        dense = xz_min_changes is not None and len(sig) > xz_min_changes * n
+        draw_lane(cv, lay, sig, yoff, t0, t1, LANE_COLORS[k % len(LANE_COLORS)], xz_colors if dense else None)
+    strip = cv.px
+    for i, path in enumerate(paths):
+        cv.px = strip[:, i * plot_w:(i + 1) * plot_w]
+        cv.write_png(path, level)
+    cv.px = strip
+    return cv.shape
+
+# ===== Histograms (--stats) =====
+HIST_W = 900         # plot columns per panel
+HIST_H = 160         # plot rows per panel
+
+def render_histograms(path, title, hists, level=1):
+    """hists: [(title, x label, counts, bin edges)], one panel each, stacked top-down."""
+    x0 = 8 * GLYPH_W + 2 * PAD
+    panel_h = ROW_H + HIST_H + TICK_PX + 2 * ROW_H
+    cv = Canvas(x0 + HIST_W + 4 * PAD, ROW_H + PAD + max(1, len(hists)) * panel_h)
+    cv.text((x0 + HIST_W) // 2, PAD // 2, title, AXIS_CLR, ha="center")
+    for k, (name, xlabel, counts, edges) in enumerate(hists):
+        top = ROW_H + PAD + k * panel_h + ROW_H
+        bottom = top + HIST_H
+        cv.text(x0 + HIST_W // 2, top - ROW_H + 2, name, AXIS_CLR, ha="center")
+        lo, hi = float(edges[0]), float(edges[-1])
+        if hi <= lo:
+            lo, hi = lo - 0.5, hi + 0.5
+        cols = np.round((np.asarray(edges, dtype=float) - lo) / (hi - lo) * HIST_W)
+        cols = np.clip(cols, 0, HIST_W).astype(np.int64)
+        peak = max(int(np.max(counts)), 1)
+        hs = np.round(np.asarray(counts, dtype=float) / peak * (HIST_H - 2)).astype(np.int64)
+        for c0, c1, h in zip(cols[:-1], cols[1:], hs):
+            if h:
+                cv.fill(bottom - int(h), bottom, x0 + int(c0), x0 + max(int(c1) - 1, int(c0) + 1), LANE_COLORS[0])
+        cv.rect(top, bottom + 1, x0, x0 + HIST_W + 1, AXIS_CLR)
+        cv.text(x0 - PAD, top, str(peak), AXIS_CLR, ha="right")
+        cv.text(x0 - PAD, bottom - GLYPH_H, "0", AXIS_CLR, ha="right")
+        ticks = nice_ticks(lo, hi)
+        for t in ticks:
+            x = x0 + int(round((t - lo) / (hi - lo) * HIST_W))
+            cv.fill(bottom, bottom + TICK_PX, x, x + 1, AXIS_CLR)
+            cv.text(x, bottom + TICK_PX + 2, tick_label(t), AXIS_CLR, ha="center")
+        cv.text(x0 + HIST_W // 2, bottom + TICK_PX + ROW_H + 2, xlabel, AXIS_CLR, ha="center")
+    cv.write_png(path, level)
+    return cv.shape
@@ -0,0 +1,165 @@
+# vcd_signal.py — presorted 1-bit four-state signal store (O(log n) value lookup)
+# A Signal is built once per net: changes are sorted, normalized to 0/1/x/z codes
+# and kept in compact NumPy arrays, so every decode/derive helper can look values
+# up by binary search instead of re-sorting the raw (time, value) list per call.
+
+import numpy as np
+
+from vcd_profile import count
+
+# ===== Four-state value codes =====
+V_0 = 0
+V_1 = 1
+V_X = 2
+V_Z = 3
+
+VAL_CHARS = "01xz"
+CODE_OF = {'0': V_0, '1': V_1, 'x': V_X, 'z': V_Z}
+
+def normalize_1bit_val(v):
+    if v is None:
+        return 'x'
+    s = str(v)
+    if s in ('0', '1'):
+        return s
+    if s in ('x', 'X'):
+        return 'x'
+    if s in ('z', 'Z'):
+        return 'z'
+    if s.startswith('b') and len(s) >= 2:
+        bits = s[1:]
+        if len(bits) == 1 and bits in ('0', '1', 'x', 'z', 'X', 'Z'):
+            return normalize_1bit_val(bits)
+        return 'x'
+    return 'x'
+
+def val_code(v):
+    return CODE_OF[normalize_1bit_val(v)]
+
+# ===== Signal =====
+class Signal:
+    """
+    1-bit four-state net as two parallel arrays:
+      t : int64 change times, ascending (equal times keep their dump order)
+      v : uint8 value codes (V_0 / V_1 / V_X / V_Z)
+    Lookups before the first change return '0', like the original value_at().
+    Iterating yields (time, '0'|'1'|'x'|'z') so a Signal can stand in for a tv list.
+    """
+    __slots__ = ("name", "t", "v")
+
+    def __init__(self, t=None, v=None, name=""):
+        self.name = name
+        self.t = np.asarray([] if t is None else t, dtype=np.int64)
+        self.v = np.asarray([] if v is None else v, dtype=np.uint8)
+        if self.t.shape != self.v.shape:
+            raise ValueError(f"Signal {name!r}: time/value length mismatch ({self.t.size} != {self.v.size})")
+
+    @classmethod
+    def from_tv(cls, tv, name=""):
+        """Build from a raw [(time, value), ...] list (any order, any value spelling)."""
+        if isinstance(tv, Signal):
+            return tv
+        if not tv:
+            return cls(name=name)
+        tv = sorted(tv, key=lambda x: x[0])  # stable: equal-time changes keep dump order
+        n = len(tv)
+        t = np.fromiter((int(ti) for ti, _ in tv), dtype=np.int64, count=n)
+        v = np.fromiter((CODE_OF[normalize_1bit_val(vi)] for _, vi in tv), dtype=np.uint8, count=n)
+        return cls(t, v, name)
+
+    def __len__(self):
+        return int(self.t.size)
+
+    def __bool__(self):
+        return self.t.size > 0
+
+    def __iter__(self):
+        for ti, vi in zip(self.t.tolist(), self.v.tolist()):
+            yield ti, VAL_CHARS[vi]
+
+    def __repr__(self):
+        return f"Signal({self.name!r}, changes={len(self)})"
+
+    def to_tv(self):
+        return list(self)
+
+    @property
+    def t_first(self):
+        return int(self.t[0]) if self.t.size else None
+
+    @property
+    def t_last(self):
+        return int(self.t[-1]) if self.t.size else None
+
+    # --- point lookups ---
+    def index_at(self, ts):
+        """Index of the last change at or before ts (-1 if none)."""
+        return int(np.searchsorted(self.t, ts, side="right")) - 1
+
+    def code_at(self, ts):
+        i = self.index_at(ts)
+        return int(self.v[i]) if i >= 0 else V_0
+
+    def value_at(self, ts):
+        count("value_at")
+        return VAL_CHARS[self.code_at(ts)]
+
+    # --- batch lookups ---
+    def codes_at(self, ts):
+        """Value codes at many timestamps at once (uint8 array, same shape as ts)."""
+        ts = np.asarray(ts, dtype=np.int64)
+        count("codes_at")
+        count("lookups", ts.size)
+        if not self.t.size:
+            return np.zeros(ts.shape, dtype=np.uint8)
+        idx = np.searchsorted(self.t, ts, side="right") - 1
+        out = self.v[np.maximum(idx, 0)]
+        out[idx < 0] = V_0
+        return out
+
+    def values_at(self, ts):
+        return [VAL_CHARS[c] for c in self.codes_at(ts).tolist()]
+
+    # --- derived views ---
+    def window(self, t0, t1):
+        """Changes in (t0, t1] plus the value held at t0 (as a change at t0)."""
+        if not self.t.size:
+            return self
+        i0 = self.index_at(t0)
+        i1 = int(np.searchsorted(self.t, t1, side="right"))
+        lo = max(i0, 0)
+        t = self.t[lo:i1].copy()
+        v = self.v[lo:i1].copy()
+        if i0 < 0:
+            t = np.concatenate(([t0], t))
+            v = np.concatenate(([V_0], v)).astype(np.uint8)
+        elif t.size:
+            t[0] = t0
+        return Signal(t, v, self.name)
+
+    def compress(self):
+        """Drop changes that repeat the previous value (first change is always kept)."""
+        if self.t.size < 2:
+            return self
+        keep = np.empty(self.v.size, dtype=bool)
+        keep[0] = True
+        np.not_equal(self.v[1:], self.v[:-1], out=keep[1:])
+        if keep.all():
+            return self
+        return Signal(self.t[keep], self.v[keep], self.name)
+
+    def rise_times(self):
+        """Times where the value becomes '1' from anything else (a leading '1' counts)."""
+        if not self.t.size:
+            return np.zeros(0, dtype=np.int64)
+        is1 = self.v == V_1
+        edge = is1.copy()
+        edge[1:] &= ~is1[:-1]
+        return self.t[edge]
+
+def as_signal(tv, name=""):
+    return Signal.from_tv(tv, name)
+
+def signal_from_codes(times, codes, name=""):
+    """Sample-derived lane: keep only the points where the code changes."""
+    return Signal(times, codes, name).compress()
@@ -0,0 +1,178 @@
+# vcd_stream.py — single-pass, selective VCD reader
+# The header is parsed first so the caller can pick nets by name; the body is then
+# streamed in large chunks and only value changes of the selected identifier codes
+# are kept (as compact typed arrays). Everything else is skipped by the regex engine.
+
+from array import array
+import re
+
+import numpy as np
+
+from vcd_profile import count
+from vcd_signal import CODE_OF, Signal, normalize_1bit_val
+
+CHUNK_BYTES = 4 << 20
+TIME_UNIT_S = {"s": 1.0, "ms": 1e-3, "us": 1e-6, "ns": 1e-9, "ps": 1e-12, "fs": 1e-15}
+
+# ===== Header =====
+def timescale_seconds(text, default=1e-12):
+    """'1ps' / '10 ns' -> seconds per time unit; default when missing or unparsable."""
+    m = re.fullmatch(r"\s*(\d+)\s*([munpf]?s)\s*", text or "")
+    return int(m.group(1)) * TIME_UNIT_S[m.group(2)] if m else default
+
+class VcdVar:
+    __slots__ = ("name", "code", "size", "kind")
+
+    def __init__(self, name, code, size, kind):
+        self.name = name
+        self.code = code
+        self.size = size
+        self.kind = kind
+
+    def __repr__(self):
+        return f"VcdVar({self.name!r}, code={self.code!r}, size={self.size})"
+
+def parse_vcd_header(lines):
+    """
+    Parse declaration lines up to $enddefinitions.
+    Returns (timescale, [VcdVar, ...]) with full dotted names in declaration order;
+    vector ranges stay part of the name (e.g. 'tb.tb_bit_idx[5:0]').
+    """
+    toks = []
+    for line in lines:
+        toks.extend(line.split())
+        if "$enddefinitions" in line:
+            break
+    else:
+        raise ValueError("VCD header has no $enddefinitions")
+
+    timescale = ""
+    scopes, out = [], []
+    i, n = 0, len(toks)
+    while i < n:
+        tok = toks[i]
+        if tok == "$scope":
+            scopes.append(toks[i + 2])
+            i += 3
+        elif tok == "$upscope":
+            if scopes:
+                scopes.pop()
+            i += 1
+        elif tok == "$var":
+            j = toks.index("$end", i)
+            kind, size, code, ref = toks[i + 1:i + 5]
+            ref = ref + "".join(toks[i + 5:j])
+            out.append(VcdVar(".".join(scopes + [ref]), code, int(size), kind))
+            i = j
+        elif tok == "$timescale":
+            j = toks.index("$end", i)
+            timescale = "".join(toks[i + 1:j])
+            i = j
+        elif tok in ("$date", "$version", "$comment"):
+            i = toks.index("$end", i)
+        i += 1
+    return timescale, out
+
+# ===== Body =====
+def change_regex(codes):
+    alt = "|".join(re.escape(c) for c in sorted(codes, key=len, reverse=True))
+    # time | scalar change of a selected code | vector change of a selected code
+    return re.compile(
+        r"(?<!\S)(?:#(\d+)|([01xzXZ])(" + alt + r")|[bB]([01xzXZ]+)\s+(" + alt + r"))(?!\S)"
+    )
+
+def _code_of_vector(bits):
+    return CODE_OF[normalize_1bit_val("b" + bits)]
+
+def scan_changes(chunk, rx, buf_t, buf_v, cur_t=0):
+    """
+    Append the selected changes found in `chunk` (whole lines) to buf_t/buf_v[code];
+    returns the current time after the chunk, so the next chunk continues from it.
+    """
+    count("vcd_bytes", len(chunk))
+    for m in rx.finditer(chunk):
+        ts, sv, sc, vv, vc = m.groups()
+        if ts is not None:
+            cur_t = int(ts)
+        elif sc is not None:
+            buf_t[sc].append(cur_t)
+            buf_v[sc].append(CODE_OF[sv.lower()])
+        else:
+            buf_t[vc].append(cur_t)
+            buf_v[vc].append(_code_of_vector(vv))
+    return cur_t
+
+class VcdReader:
+    """
+    with VcdReader(path) as rd:
+        names = rd.names                       # all nets, declaration order
+        sigs  = rd.read_signals([...])         # {full_name: Signal}
+    """
+
+    def __init__(self, path, chunk_bytes=CHUNK_BYTES):
+        self.path = str(path)
+        self.chunk_bytes = chunk_bytes
+        self.fh = open(self.path, "r", encoding="latin-1", newline="")
+        self.timescale, self.vars = parse_vcd_header(self.fh)
+        self.by_name = {v.name: v for v in self.vars}
+        self.names = [v.name for v in self.vars]
+
+    def close(self):
+        self.fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def iter_chunks(self):
+        """Body text in ~chunk_bytes pieces, each ending on a line boundary."""
+        carry = ""
+        while True:
+            buf = self.fh.read(self.chunk_bytes)
+            if not buf:
+                if carry:
+                    yield carry
+                return
+            buf = carry + buf
+            cut = buf.rfind("\n")
+            if cut < 0:
+                carry = buf
+                continue
+            carry = buf[cut + 1:]
+            yield buf[:cut + 1]
+
+    def read_signals(self, names):
+        """Stream the body once; keep value changes only for `names` (unknown names -> empty)."""
+        names = [n for n in dict.fromkeys(names) if n]
+        code_of_name = {n: self.by_name[n].code for n in names if n in self.by_name}
+        if not code_of_name:
+            return {n: Signal(name=n) for n in names}
+
+        buf_t = {c: array("q") for c in code_of_name.values()}
+        buf_v = {c: array("B") for c in code_of_name.values()}
+        rx = change_regex(buf_t.keys())
+        cur_t = 0
+        for chunk in self.iter_chunks():
+            cur_t = scan_changes(chunk, rx, buf_t, buf_v, cur_t)
+
+        count("changes", sum(len(b) for b in buf_t.values()))
+        out = {}
+        for n in names:
+            c = code_of_name.get(n)
+            if c is None:
+                out[n] = Signal(name=n)
+                continue
+            t = np.frombuffer(buf_t[c], dtype=np.int64) if buf_t[c] else None
+            v = np.frombuffer(buf_v[c], dtype=np.uint8) if buf_v[c] else None
+            # VCD times are monotonic; a stable sort only guards against odd writers
+            if t is not None and t.size > 1 and np.any(t[1:] < t[:-1]):
+                order = np.argsort(t, kind="stable")
+                t, v = t[order], v[order]
+            out[n] = Signal(t, v, n)
+        return out
+
+def read_vcd_signals(path, names):
+    with VcdReader(path) as rd:
+        return rd.read_signals(names)
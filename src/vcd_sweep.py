@@ -0,0 +1,180 @@
+# vcd_sweep.py — single-pass k-way sweep over sorted signal streams + derived lanes
+# All inputs are merged once (a stable merge of their already-sorted change times, with
+# one cursor per signal that only ever moves forward), so a derived lane costs one pass
+# over the union of changes instead of a value lookup per input per timestamp.
+# A lane is an expression over four-state code arrays (tri(tb_en, tb_val), mux(...),
+# ...) evaluated either at every merged change time (combinational) or at given edge
+# times (sample-and-hold). The same machinery backs the built-in semantic lanes and
+# user lanes given on the command line (--lane NAME=EXPR[@pos|@neg]).
+
+import numpy as np
+
+from vcd_profile import count
+from vcd_signal import V_0, V_1, V_X, V_Z, as_signal, signal_from_codes
+
+# ===== Sweep =====
+class Sweep:
+    """
+    Merged view of several signals:
+      t          : int64 row times (merged change times, or the requested sample times)
+      codes[name]: uint8 code each input holds at each row (V_0 before its first change)
+    Inputs are also reachable as attributes (sw.tb_en) for lane expressions.
+    """
+
+    def __init__(self, t, codes):
+        self.t = t
+        self.codes = codes
+
+    def __len__(self):
+        return int(self.t.size)
+
+    def __getitem__(self, name):
+        return self.codes[name]
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__["codes"][name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+def _cursor_codes(sig, cur):
+    if not sig.v.size:
+        return np.zeros(cur.shape, dtype=np.uint8)
+    out = sig.v[np.maximum(cur, 0)]
+    out[cur < 0] = V_0
+    return out
+
+def _merge_cursors(t_in, t_at):
+    """
+    Two-way merge of sorted change times with sorted sample times: for each sample, the
+    index of the last change at or before it (-1 if none). Samples sort after changes
+    at equal times, so a change exactly at the sample time counts.
+    """
+    order = np.argsort(np.concatenate((t_in, t_at)), kind="stable")  # merge of two sorted runs
+    rank = np.empty_like(order)
+    rank[order] = np.arange(order.size)
+    return rank[t_in.size:] - np.arange(t_at.size) - 1
+
+def sweep(signals, at=None):
+    """
+    signals: {name: Signal | tv list}. at=None: one row per distinct change time of any input;
+    at=array: one row per sample time (value held at that time, a change exactly at it counts).
+    """
+    sigs = {name: as_signal(tv, name) for name, tv in signals.items()}
+    codes = {}
+    if at is None:
+        streams = [s.t for s in sigs.values()]
+        t_all = np.concatenate(streams) if streams else np.zeros(0, dtype=np.int64)
+        src = np.repeat(np.arange(len(streams), dtype=np.int32), [t.size for t in streams])
+        order = np.argsort(t_all, kind="stable")  # k-way merge of sorted runs
+        t, src = t_all[order], src[order]
+        rows = np.flatnonzero(np.r_[t[1:] != t[:-1], True]) if t.size else np.zeros(0, dtype=np.int64)
+        t_out = t[rows]
+        for j, (name, sig) in enumerate(sigs.items()):
+            cur = (np.cumsum(src == j) - 1)[rows]  # last change of input j at/before the row
+            codes[name] = _cursor_codes(sig, cur)
+    else:
+        t_out = np.asarray(at, dtype=np.int64)
+        srt = None
+        if t_out.size > 1 and np.any(t_out[1:] < t_out[:-1]):
+            srt = np.argsort(t_out, kind="stable")
+        t_at = t_out if srt is None else t_out[srt]
+        for name, sig in sigs.items():
+            c = _cursor_codes(sig, _merge_cursors(sig.t, t_at))
+            if srt is not None:
+                c_at = np.empty_like(c)
+                c_at[srt] = c
+                c = c_at
+            codes[name] = c
+    count("sweep_rows", int(t_out.size))
+    return Sweep(t_out, codes)
+
+def merge_times(*tvs):
+    """Distinct change times of all inputs (ascending)."""
+    return sweep({str(i): tv for i, tv in enumerate(tvs) if tv}).t
+
+# ===== Four-state operators on code arrays =====
+def bit(c):
+    """Value as driven by a 0/1 net: anything else (x/z) reads as X."""
+    return np.where(c <= V_1, c, V_X).astype(np.uint8)
+
+def tri(en, val):
+    """en ? val : Z (x/z on en releases the line, like the testbench assign)."""
+    return np.where(en == V_1, bit(val), V_Z).astype(np.uint8)
+
+def mux(sel, a, b):
+    """sel ? a : b; unknown sel gives a where a == b, else X."""
+    return np.where(sel == V_1, a, np.where(sel == V_0, b, np.where(a == b, a, V_X))).astype(np.uint8)
+
+def not_(a):
+    return np.where(a == V_0, V_1, np.where(a == V_1, V_0, V_X)).astype(np.uint8)
+
+def and_(a, b):
+    return np.where((a == V_0) | (b == V_0), V_0,
+                    np.where((a == V_1) & (b == V_1), V_1, V_X)).astype(np.uint8)
+
+def or_(a, b):
+    return np.where((a == V_1) | (b == V_1), V_1,
+                    np.where((a == V_0) & (b == V_0), V_0, V_X)).astype(np.uint8)
+
+def xor_(a, b):
+    return np.where((a <= V_1) & (b <= V_1), a ^ b, V_X).astype(np.uint8)
+
+def resolve(a, b):
+    """Two drivers on one wire: Z yields to the other, agreement keeps the value, conflict is X."""
+    return np.where(a == V_Z, b, np.where((b == V_Z) | (a == b), a, V_X)).astype(np.uint8)
+
+def where(cond, a, b):
+    return np.where(cond, a, b).astype(np.uint8)
+
+OPS = dict(bit=bit, tri=tri, mux=mux, not_=not_, and_=and_, or_=or_, xor_=xor_, resolve=resolve,
+           where=where, V_0=V_0, V_1=V_1, V_X=V_X, V_Z=V_Z)
+
+# ===== Derived lanes =====
+def derive(expr, inputs, name="", at=None, eps=0):
+    """
+    Lane from expr(sweep) -> code array.
+      at=None : combinational, re-evaluated at every change of any input
+      at=times: sample-and-hold, inputs sampled at times+eps and the result held from each time
+    """
+    sw = sweep(inputs, None if at is None else np.asarray(at, dtype=np.int64) + eps)
+    if not len(sw):
+        return signal_from_codes([], [], name)
+    out = np.asarray(expr(sw), dtype=np.uint8)
+    t = sw.t if at is None else np.asarray(at, dtype=np.int64)
+    return signal_from_codes(t, np.broadcast_to(out, t.shape), name)
+
+class LaneSpec:
+    """User lane `NAME=EXPR[@pos|@neg]`; EXPR uses role names and the OPS helpers."""
+
+    def __init__(self, spec, roles):
+        name, sep, body = spec.partition("=")
+        if not sep or not name.strip() or not body.strip():
+            raise ValueError(f"--lane {spec!r}: expected NAME=EXPR[@pos|@neg]")
+        self.spec = spec
+        self.name = name.strip()
+        self.edge = None
+        body = body.strip()
+        for edge in ("pos", "neg"):
+            if body.endswith(f"@{edge}"):
+                self.edge = edge
+                body = body[:-len(edge) - 1].strip()
+        try:
+            self.code = compile(body, f"<lane {self.name}>", "eval")
+        except SyntaxError as e:
+            raise ValueError(f"--lane {spec!r}: {e.msg}") from None
+        unknown = [n for n in self.code.co_names if n not in roles and n not in OPS]
+        if unknown:
+            raise ValueError(f"--lane {spec!r}: unknown name(s) {', '.join(unknown)} "
+                             f"(roles: {', '.join(roles)})")
+        self.inputs = [n for n in self.code.co_names if n in roles]
+
+    def evaluate(self, sigs, pos=None, neg=None, eps=0):
+        """sigs: {role: Signal}; pos/neg: SCK edge times for @pos / @neg lanes."""
+        def expr(sw):
+            return eval(self.code, {"__builtins__": {}}, dict(OPS, **sw.codes))
+        inputs = {r: sigs[r] for r in self.inputs}
+        at = {"pos": pos, "neg": neg}.get(self.edge)
+        if self.edge and (at is None or not len(at)):
+            return signal_from_codes([], [], self.name)
+        return derive(expr, inputs, self.name, at=at, eps=eps if self.edge else 0)
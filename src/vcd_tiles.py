@@ -0,0 +1,294 @@
+# vcd_tiles.py — multi-resolution tile pyramid of the RAW lanes + static HTML viewer (--tiles)
+# One 1800-column RAW PNG cannot show a capture of millions of SCK cycles, and the frame
+# PNGs show 48 cycles without context. --tiles precomputes a zoom pyramid once per capture
+# and a viewer that only fetches what is on screen:
+#
+#   level z   [t0, t1] split into 2^z tiles of TILE_W columns (the per-column envelope of
+#             vcd_decimate, drawn by vcd_raster.render_tiles, so any level costs the same
+#             per tile however many changes it covers)
+#   depth     the first level whose tiles span <= TILE_CYCLES SCK cycles (every bit
+#             readable), at most --tiles-max-level
+#   jobs      (level, first tile, end tile) runs of <= TILE_CHUNK tiles, rendered by the
+#             pool workers like frame PNGs
+#   frames    zone boundary times + summary of every decoded frame, FRAME_CHUNK frames per
+#             frames/<k>.js, drawn over the tiles once a frame is wide enough
+#
+# <outdir>/tiles/<stem>/ holds index.html, tiles.json (manifest), z<z>/<i>.png and
+# frames/<k>.js. The viewer needs no server: open index.html directly (frame chunks load
+# as <script> so file:// works) or serve the directory with any static web server.
+# Drag pans, the wheel zooms, double-click resets; the view is kept in the URL hash.
+
+from pathlib import Path
+import json
+
+import numpy as np
+
+from swd_decode import FRAME_BITS
+from vcd_raster import TileLayout, render_tiles
+
+TILE_W = 512          # columns per tile
+TILE_CYCLES = 32      # deepest level: at most this many SCK cycles per tile (16 px per cycle)
+MAX_LEVEL = 12        # default depth cap: 2^12 tiles at the deepest level
+TILE_CHUNK = 128      # tiles per render job
+FRAME_CHUNK = 2048    # frames per frames/<k>.js
+MIN_ZONE_PX = 48      # frames narrower than this are drawn as a marker, not as zones
+NAMES_PX = 140        # lane label column of the viewer
+
+# ===== Pyramid geometry =====
+def pyramid_depth(n_cycles, max_level=MAX_LEVEL):
+    """Deepest level: the first whose tiles span <= TILE_CYCLES cycles, capped at max_level."""
+    need = max(1.0, n_cycles / TILE_CYCLES)
+    return int(min(max(0, max_level), np.ceil(np.log2(need))))
+
+def tile_span(t0, t1, z, i):
+    """[start, end) time of tile i of level z."""
+    w = (t1 - t0) / (1 << z)
+    return t0 + i * w, t0 + (i + 1) * w
+
+def tile_path(root: Path, z, i):
+    return root / f"z{z}" / f"{i}.png"
+
+def tile_chunks(depth, per_job=TILE_CHUNK):
+    """(level, first tile, end tile) of every render job, coarse levels first."""
+    return [(z, lo, min(lo + per_job, 1 << z)) for z in range(depth + 1) for lo in range(0, 1 << z, per_job)]
+
+class TilePyramid:
+    """One capture's pyramid: root dir, time range, depth and its render jobs."""
+
+    def __init__(self, root, t0, t1, depth, jobs):
+        self.root = root
+        self.t0, self.t1 = t0, t1
+        self.depth = depth
+        self.jobs = jobs  # [(z, lo, hi, last_png, fingerprint, fresh)]
+
+    @property
+    def n_tiles(self):
+        return (1 << (self.depth + 1)) - 1
+
+    @property
+    def stale(self):
+        return any(not job[-1] for job in self.jobs)
+
+def render_chunk(root: Path, lanes, t0, t1, z, lo, hi, levels, amp, step, xz_colors=None, xz_min_changes=None):
+    """Tiles lo..hi-1 of level z, drawn as one strip (the last tile is written last: it marks the job done)."""
+    (root / f"z{z}").mkdir(parents=True, exist_ok=True)
+    a, _ = tile_span(t0, t1, z, lo)
+    _, b = tile_span(t0, t1, z, hi - 1)
+    render_tiles([tile_path(root, z, i) for i in range(lo, hi)], lanes, a, b, levels, amp, step, TILE_W,
+                 xz_colors, xz_min_changes)
+
+# ===== Frame zones =====
+def zone_bounds(zones):
+    """Contiguous (b0, b1, label) zones -> (boundary bits, labels)."""
+    return [b0 for b0, _, _ in zones] + [zones[-1][1]], [label for _, _, label in zones]
+
+def frame_bounds(pos, neg, start_idx, is_read, read_bits, write_bits):
+    """(frames, boundaries) times: bit b < FRAME_BITS at its posedge, bit FRAME_BITS at the last negedge."""
+    bits = np.where(np.asarray(is_read, dtype=bool)[:, None], np.asarray(read_bits)[None, :],
+                    np.asarray(write_bits)[None, :])
+    idx = np.asarray(start_idx, dtype=np.int64)[:, None] + np.minimum(bits, FRAME_BITS - 1)
+    return np.where(bits < FRAME_BITS, pos[idx], neg[idx])
+
+def write_frame_chunks(root: Path, bounds, is_read, labels, per_chunk=FRAME_CHUNK):
+    """frames/<k>.js per chunk; returns [(first start, last end)] per chunk for the manifest."""
+    out = root / "frames"
+    out.mkdir(parents=True, exist_ok=True)
+    ranges = []
+    for k, lo in enumerate(range(0, len(bounds), per_chunk)):
+        b = bounds[lo:lo + per_chunk]
+        chunk = dict(first=lo, t=b.tolist(), read=[int(r) for r in is_read[lo:lo + per_chunk]],
+                     label=labels[lo:lo + per_chunk])
+        (out / f"{k}.js").write_text(f"frameChunk({k},{json.dumps(chunk, separators=(',', ':'))});\n")
+        ranges.append((int(b[:, 0].min()), int(b[:, -1].max())))
+    return ranges
+
+# ===== Manifest + viewer =====
+def tile_geometry(nlanes, levels, amp, step):
+    """(tile height, mid row of every lane) in tile pixels, as render_tiles() lays them out."""
+    lay = TileLayout(nlanes, levels, amp, step, TILE_W)
+    return lay.height, [int(lay.row(k * step + amp * 0.5)) for k in range(nlanes)]
+
+def write_viewer(root: Path, manifest):
+    """tiles.json + the self-contained index.html (manifest inlined)."""
+    root.mkdir(parents=True, exist_ok=True)
+    (root / "tiles.json").write_text(json.dumps(manifest, indent=1))
+    html = (VIEWER_HTML.replace("__TITLE__", f"{manifest['source']} | tiles")
+            .replace("__NAMES_PX__", str(NAMES_PX))
+            .replace("__MANIFEST__", json.dumps(manifest, separators=(",", ":"))))
+    (root / "index.html").write_text(html, encoding="utf-8")
+    return root / "index.html"
+
+VIEWER_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>__TITLE__</title>
+<style>
+body{margin:0;font:12px monospace;color:#222;background:#fff}
+#bar{padding:4px 8px;border-bottom:1px solid #ccc;white-space:nowrap;overflow:hidden}
+#wrap{display:flex;margin-top:8px}
+#names{flex:none;position:relative;width:__NAMES_PX__px}
+#names div{position:absolute;right:6px;transform:translateY(-50%)}
+#view{flex:auto;position:relative;overflow:hidden;cursor:grab;outline:1px solid #444}
+#view img{position:absolute;top:0;height:100%;image-rendering:pixelated;pointer-events:none}
+#zones{position:absolute;left:0;top:0;z-index:100;pointer-events:none}
+#axis{display:block;margin-left:__NAMES_PX__px}
+</style></head><body>
+<div id="bar"></div>
+<div id="wrap"><div id="names"></div><div id="view"><canvas id="zones"></canvas></div></div>
+<canvas id="axis" height="40"></canvas>
+<script>
+const M = __MANIFEST__;
+const view = document.getElementById("view"), zc = document.getElementById("zones"),
+      axis = document.getElementById("axis"), bar = document.getElementById("bar"),
+      names = document.getElementById("names");
+const T0 = M.t0, SPAN = M.t1 - M.t0, MIN_SPAN = Math.max(SPAN / 2 ** M.depth / 8, 1);
+const imgs = new Map();     // "z/i" -> <img> currently in the view
+const frames = [];          // loaded frame chunks by index
+const loading = new Set();
+let a = T0, b = M.t1, hoverText = "";
+
+view.style.height = names.style.height = M.tile_h + "px";
+M.lanes.forEach((n, k) => {
+  const d = document.createElement("div");
+  d.textContent = n; d.style.top = M.lane_rows[k] + "px"; names.appendChild(d);
+});
+
+const W = () => view.clientWidth;
+const X = t => (t - a) / (b - a) * W();
+const T = px => a + px / W() * (b - a);
+
+function level() {  // coarsest level with at least one tile column per screen pixel
+  const need = SPAN * W() / ((b - a) * M.tile_w);
+  return Math.max(0, Math.min(M.depth, Math.ceil(Math.log2(Math.max(need, 1)))));
+}
+
+function place(z, i, keep) {
+  const key = z + "/" + i, tw = SPAN / 2 ** z;
+  let img = imgs.get(key);
+  if (!img) {
+    img = new Image(); img.src = `z${z}/${i}.png`; img.style.zIndex = z;
+    view.appendChild(img); imgs.set(key, img);
+  }
+  const x0 = Math.floor(X(T0 + i * tw)), x1 = Math.ceil(X(T0 + (i + 1) * tw));
+  img.style.left = x0 + "px"; img.style.width = (x1 - x0) + "px";
+  keep.add(key);
+}
+
+function drawTiles(z) {
+  const keep = new Set(), tw = SPAN / 2 ** z;
+  place(0, 0, keep);  // coarse backdrop while the finer tiles load
+  const i0 = Math.max(0, Math.floor((a - T0) / tw)), i1 = Math.min(2 ** z - 1, Math.floor((b - T0) / tw));
+  for (let i = i0; z > 0 && i <= i1; i++) place(z, i, keep);
+  for (const [key, img] of imgs) if (!keep.has(key)) { img.remove(); imgs.delete(key); }
+}
+
+function loadFrames() {
+  M.frame_chunks.forEach(([c0, c1], k) => {
+    if (c1 < a || c0 > b || frames[k] || loading.has(k)) return;
+    loading.add(k);
+    const s = document.createElement("script");
+    s.src = `frames/${k}.js`; document.head.appendChild(s);
+  });
+}
+window.frameChunk = (k, chunk) => { frames[k] = chunk; loading.delete(k); draw(); };
+
+function firstFrom(ch, t) {  // first frame of the chunk starting at or after t, one back
+  let lo = 0, hi = ch.t.length;
+  while (lo < hi) { const m = (lo + hi) >> 1; if (ch.t[m][0] < t) lo = m + 1; else hi = m; }
+  return Math.max(0, lo - 1);
+}
+
+function drawZones() {
+  zc.width = W(); zc.height = M.tile_h;
+  const g = zc.getContext("2d");
+  g.font = "11px monospace"; g.textAlign = "center"; g.textBaseline = "top";
+  for (const ch of frames) {
+    if (!ch) continue;
+    for (let f = firstFrom(ch, a); f < ch.t.length && ch.t[f][0] <= b; f++) {
+      const bt = ch.t[f], kind = M.zones[ch.read[f] ? "read" : "write"];
+      const fx0 = X(bt[0]), fx1 = X(bt[bt.length - 1]);
+      if (fx1 < 0) continue;
+      if (fx1 - fx0 < M.min_zone_px) {
+        g.globalAlpha = 0.6; g.fillStyle = "#1f4fbf";
+        g.fillRect(fx0, 0, Math.max(1, fx1 - fx0), 4);
+        continue;
+      }
+      kind.labels.forEach((label, j) => {
+        const x0 = X(bt[j]), x1 = X(bt[j + 1]);
+        g.globalAlpha = M.zone_alpha; g.fillStyle = M.zone_colors[label];
+        g.fillRect(x0, 0, x1 - x0, M.tile_h);
+        g.globalAlpha = 1; g.fillStyle = "#1f4fbf";
+        if (x1 - x0 > 7 * label.length) g.fillText(label, (x0 + x1) / 2, 3);
+      });
+    }
+  }
+}
+
+function niceStep(span) {
+  const raw = span / 8, p = 10 ** Math.floor(Math.log10(raw)), m = raw / p;
+  return p * (m < 1.5 ? 1 : m < 3.5 ? 2 : m < 7.5 ? 5 : 10);
+}
+
+function drawAxis() {
+  axis.width = W();
+  const g = axis.getContext("2d"), step = niceStep(b - a);
+  g.font = "11px monospace"; g.textAlign = "center"; g.textBaseline = "top"; g.fillStyle = "#444";
+  for (let t = Math.ceil(a / step) * step; t <= b; t += step) {
+    const x = Math.round(X(t));
+    g.fillRect(x, 0, 1, 5);
+    g.fillText(t.toLocaleString("en-US", {maximumFractionDigits: 3}), x, 7);
+  }
+  g.fillText("time (VCD timescale units)", W() / 2, 24);
+}
+
+function draw() {
+  const z = level();
+  drawTiles(z); loadFrames(); drawZones(); drawAxis();
+  const ns = (b - a) * M.timescale_s * 1e9;
+  bar.textContent = `${M.source} | level ${z}/${M.depth} | ${Math.round(a)} .. ${Math.round(b)} ` +
+                    `(${ns.toPrecision(4)} ns) | ${M.n_frames} frame(s)` + (hoverText ? ` | ${hoverText}` : "");
+  history.replaceState(null, "", `#${Math.round(a)},${Math.round(b)}`);
+}
+
+function setView(na, nb) {
+  const s = Math.min(Math.max(nb - na, MIN_SPAN), SPAN);
+  a = Math.min(Math.max(na, T0), M.t1 - s); b = a + s;
+  draw();
+}
+
+function hover(px) {
+  const t = T(px);
+  hoverText = "";
+  for (const ch of frames) {
+    if (!ch) continue;
+    const f = firstFrom(ch, t);
+    for (let g = f; g < Math.min(f + 2, ch.t.length); g++) {
+      const bt = ch.t[g];
+      if (bt[0] <= t && t <= bt[bt.length - 1]) hoverText = `frame#${ch.first + g} ${ch.label[g]}`;
+    }
+  }
+}
+
+let drag = null;
+view.addEventListener("mousedown", e => { drag = {x: e.clientX, a, b}; view.style.cursor = "grabbing"; });
+window.addEventListener("mouseup", () => { drag = null; view.style.cursor = ""; });
+window.addEventListener("mousemove", e => {
+  const r = view.getBoundingClientRect();
+  if (drag) {
+    const dt = (e.clientX - drag.x) / W() * (drag.b - drag.a);
+    setView(drag.a - dt, drag.b - dt);
+  } else if (e.clientY >= r.top && e.clientY < r.bottom) {
+    hover(e.clientX - r.left); draw();
+  }
+});
+view.addEventListener("wheel", e => {
+  e.preventDefault();
+  const t = T(e.clientX - view.getBoundingClientRect().left), f = Math.exp(e.deltaY * 0.002);
+  setView(t - (t - a) * f, t + (b - t) * f);
+}, {passive: false});
+view.addEventListener("dblclick", () => setView(T0, M.t1));
+window.addEventListener("resize", draw);
+
+const h = location.hash.slice(1).split(",").map(Number);
+if (h.length === 2 && h.every(Number.isFinite) && h[1] > h[0]) setView(h[0], h[1]); else draw();
+</script>
+</body></html>
+"""
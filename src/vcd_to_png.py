@@ -1,13 +1,49 @@
 # vcd_to_png.py — RAW waveform + SWD zone annotation (cycle-pair based)
 # Update: y-axis lanes become semantic: clk/rst/rnw + host/target drive/sample
 
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
 from pathlib import Path
 import argparse
+import io
+import json
+import sys
+import tempfile
 
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-from vcdvcd import VCDVCD
+import numpy as np
+
+from vcd_signal import (
+    V_1, V_X, V_Z, Signal, as_signal,
+)
+from la_dump import UNIT_BYTES, LaFormat, parse_channel_map
+from swd_capture import SIGNAL_ROLES, Capture, build_lanes, probe_scopes, select_signals, user_lanes
+from swd_check import check_capture
+from swd_decode import sck_cycle_arrays
+from swd_model import compare_capture
+from swd_export import EXPORT_FORMATS, FrameWriter, export_frames
+from vcd_cache import VcdCache, code_digest
+from vcd_decimate import envelope, envelope_vertices, step_arrays, xz_runs
+from vcd_follow import FollowDecoder, split_header, tail_chunks
+from vcd_profile import count, stage
+from vcd_raster import PLOT_W as RASTER_PLOT_W, render_histograms, render_lanes
+from vcd_sweep import LaneSpec, merge_times
+from vcd_tiles import (
+    MAX_LEVEL, MIN_ZONE_PX, TILE_W, TilePyramid, frame_bounds, pyramid_depth, render_chunk, tile_chunks,
+    tile_geometry, tile_path, write_frame_chunks, write_viewer, zone_bounds,
+)
+import vcd_profile
+
+_plt = None
+
+def pyplot():
+    """matplotlib is imported on first render only (--decode-only never loads it)."""
+    global _plt
+    if _plt is None:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        _plt = plt
+    return _plt
 
 # ===== Visual params =====
 TRACK_AMP   = 0.85
@@ -21,8 +57,13 @@ Y_0 = 0.0
 Y_1 = TRACK_AMP
 Y_Z = 0.20 * TRACK_AMP
 Y_X = 0.70 * TRACK_AMP
+Y_LEVELS = (Y_0, Y_1, Y_X, Y_Z)  # indexed by value code 0/1/x/z
+
+RENDERERS = ("matplotlib", "raster")
 
-SAMPLE_EPS = 1  # avoid sampling exactly at transition timestamp
+# RAW lanes switch to envelope decimation above this many changes per pixel column
+DECIMATE_CHANGES_PER_COL = 2
+XZ_CLR = dict(x="#d62728", z="#7f7f7f")
 
 ZONE_CLR = dict(
     PAD="#cfe9ff",
@@ -38,132 +79,50 @@ ZONE_CLR = dict(
 DEFAULT_SUFFIXES = [".sck", ".rst_n", ".rnw", ".mosi", ".miso", ".swdio", ".tb_swdio_en", ".tb_swdio_val"]
 
 # ===== VCD helpers =====
-def build_ref_to_tv(v):
-    ref_to_tv = {}
-    data = getattr(v, "data", {})
-    for node in data.values():
-        tv = getattr(node, "tv", [])
-        if not tv:
-            continue
-        refs = getattr(node, "references", [])
-        if refs:
-            for r in refs:
-                ref_to_tv[str(r)] = tv
-            continue
-        nets = getattr(node, "nets", [])
-        for net in nets:
-            hier = str(getattr(net, "hier", "")).strip(".")
-            name = str(getattr(net, "name", "")).strip(".")
-            full = (hier + "." + name).strip(".")
-            if full:
-                ref_to_tv[full] = tv
-    return ref_to_tv
-
-def pick_by_suffix(ref_to_tv, suffix):
-    return next((full for full in ref_to_tv.keys() if full.endswith(suffix)), "")
-
-def normalize_1bit_val(v):
-    if v is None:
-        return 'x'
-    s = str(v)
-    if s in ('0', '1'):
-        return s
-    if s in ('x', 'X'):
-        return 'x'
-    if s in ('z', 'Z'):
-        return 'z'
-    if s.startswith('b') and len(s) >= 2:
-        bits = s[1:]
-        if len(bits) == 1 and bits in ('0', '1', 'x', 'z', 'X', 'Z'):
-            return normalize_1bit_val(bits)
-        return 'x'
-    return 'x'
-
 def value_at(tv, ts):
-    last = '0'
-    for t, v in sorted(tv, key=lambda x: x[0]):
-        if t > ts:
-            break
-        last = normalize_1bit_val(v)
-    return last
+    return as_signal(tv).value_at(ts)
 
 def tv_to_step_1bit(tv, t_end=None):
-    if not tv:
-        return [], []
-    tv = sorted(tv, key=lambda x: x[0])
-    tvn = [(t, normalize_1bit_val(v)) for t, v in tv]
-
-    t = [tvn[0][0]]
-    yv = [tvn[0][1]]
-    last = tvn[0][1]
-    for ti, vi in tvn[1:]:
-        t += [ti, ti]
-        yv += [last, vi]
-        last = vi
-
-    if t_end is None:
-        t_end = t[-1] + 1
-    if t_end > t[-1]:
-        t.append(t_end)
-        yv.append(last)
-
-    def map_y(v):
-        if v == '0': return Y_0
-        if v == '1': return Y_1
-        if v == 'z': return Y_Z
-        return Y_X
-
-    y = [map_y(v) for v in yv]
-    return t, y
+    return step_arrays(tv, Y_LEVELS, t_end)
+
+def draw_lane(ax, tv, yoff, x0, x1, ncols):
+    """
+    Exact step when the lane has few changes in [x0, x1]; otherwise the per-pixel-column
+    min/max envelope (vcd_decimate), with X/Z hidden inside toggling bars re-marked on top.
+    """
+    sig = as_signal(tv)
+    n_in = int(np.searchsorted(sig.t, x1, side="right") - np.searchsorted(sig.t, x0, side="left"))
+    if n_in <= DECIMATE_CHANGES_PER_COL * ncols:
+        t, y = tv_to_step_1bit(sig, t_end=x1)
+        if len(t):
+            count("plot_points", len(t))
+            ax.plot(t, y + yoff, linewidth=LW, clip_on=True)
+        return
+    env = envelope(sig, x0, x1, ncols)
+    t, y = envelope_vertices(env, Y_LEVELS)
+    count("plot_points", len(t))
+    ax.plot(t, y + yoff, linewidth=LW, clip_on=True)
+    for code, clr in ((V_X, XZ_CLR["x"]), (V_Z, XZ_CLR["z"])):
+        xs, xe = xz_runs(env, code)
+        if xs.size:
+            ax.hlines(np.full(xs.size, yoff + Y_LEVELS[code]), xs, xe, colors=clr, linewidth=LW * 1.6, zorder=3)
 
 def collect_time_range(tvs):
     times = []
     for tv in tvs:
-        if not tv:
+        sig = as_signal(tv)
+        if not sig:
             continue
-        times.append(min(t for t, _ in tv))
-        times.append(max(t for t, _ in tv))
+        times.append(sig.t_first)
+        times.append(sig.t_last)
     if not times:
         return 0, 100
     return min(times), max(times)
 
-def rise_edges(tv):
-    tv = sorted(tv, key=lambda x: x[0])
-    edges, last = [], None
-    for t, v in tv:
-        vv = normalize_1bit_val(v)
-        if vv == '1' and last != '1':
-            edges.append(t)
-        last = vv
-    return edges
-
 # ===== Build clock cycles: list of (posedge_time, negedge_time) =====
 def build_sck_cycles(tv_sck):
-    tv = sorted(tv_sck, key=lambda x: x[0])
-    last = None
-    pending_rise = None
-    cycles = []
-    for t, v in tv:
-        vv = normalize_1bit_val(v)
-        if last is None:
-            last = vv
-            continue
-        if vv == last:
-            continue
-        if vv == '1' and last != '1':
-            pending_rise = t
-        elif vv == '0' and last == '1' and pending_rise is not None:
-            cycles.append((pending_rise, t))
-            pending_rise = None
-        last = vv
-    return cycles
-
-# ===== Sampling instants on cycles =====
-def pos_ts(cycles, start_idx, bit_i):
-    return cycles[start_idx + bit_i][0] + SAMPLE_EPS
-
-def neg_ts(cycles, start_idx, bit_i):
-    return cycles[start_idx + bit_i][1] + SAMPLE_EPS
+    pos, neg = sck_cycle_arrays(tv_sck)
+    return list(zip(pos.tolist(), neg.tolist()))
 
 def t_edge(cycles, start_idx, bit_idx):
     if bit_idx <= 47:
@@ -172,140 +131,29 @@ def t_edge(cycles, start_idx, bit_idx):
 
 # ===== Semantic lane derivations =====
 def merge_change_times(*tvs):
-    ts = set()
-    for tv in tvs:
-        if not tv:
-            continue
-        for t, _ in tv:
-            ts.add(int(t))
-    return sorted(ts)
-
-def derive_target_drive_tv(tv_tb_en, tv_tb_val):
-    """
-    target_drive = tb_en ? tb_val : Z
-    """
-    if not tv_tb_en or not tv_tb_val:
-        return []
-    pts = merge_change_times(tv_tb_en, tv_tb_val)
-    out = []
-    last = None
-    for t in pts:
-        en = value_at(tv_tb_en, t)
-        if en == '1':
-            v = value_at(tv_tb_val, t)
-            v = v if v in ('0','1') else 'x'
-        else:
-            v = 'z'
-        if v != last:
-            out.append((t, v))
-            last = v
-    return out
-
-def derive_host_drive_on_wire_tv(tv_mosi, tv_swdio, tv_tb_en=None):
-    """
-    host_drive = (target not driving) AND (bus not Z) ? MOSI : Z
-    - If TB drives (tb_en=1): host_drive=Z
-    - Else if bus is Z: host_drive=Z (turnaround / released)
-    - Else host_drive = MOSI (what host is putting onto the line through DUT)
-    """
-    if not tv_mosi or not tv_swdio:
-        return []
-    pts = merge_change_times(tv_mosi, tv_swdio, tv_tb_en if tv_tb_en else [])
-    out = []
-    last = None
-    for t in pts:
-        if tv_tb_en and value_at(tv_tb_en, t) == '1':
-            v = 'z'
-        else:
-            bus = value_at(tv_swdio, t)
-            if bus == 'z':
-                v = 'z'
-            else:
-                mv = value_at(tv_mosi, t)
-                v = mv if mv in ('0','1') else 'x'
-        if v != last:
-            out.append((t, v))
-            last = v
-    return out
-
-def derive_sample_hold_tv_from_cycles(cycles, tv_sig, edge="pos"):
-    """
-    Build a sample-hold waveform:
-      - edge="pos": sample tv_sig at each posedge+eps, update at posedge time
-      - edge="neg": sample tv_sig at each negedge+eps, update at negedge time
-    """
-    if not cycles or not tv_sig:
-        return []
-    out = []
-    last = None
-    for (tp, tn) in cycles:
-        if edge == "pos":
-            t_upd = tp
-            t_smp = tp + SAMPLE_EPS
-        else:
-            t_upd = tn
-            t_smp = tn + SAMPLE_EPS
-        v = value_at(tv_sig, t_smp)
-        if v != last:
-            out.append((t_upd, v))
-            last = v
-    return out
-
-# ===== Decode helpers (annotation only) =====
-def bits_lsb_first_to_int(bit_list):
-    if not bit_list or any(b not in ('0','1') for b in bit_list):
-        return 0, False
-    v = 0
-    for i, b in enumerate(bit_list):
-        if b == '1':
-            v |= (1 << i)
-    return v, True
-
-def parity_even_32(v):
-    return bin(v & 0xFFFFFFFF).count("1") & 1
-
-def target_bit_at(cycles, start_idx, bit_i, tv_swdio, tv_tb_en=None, tv_tb_val=None):
-    ts = neg_ts(cycles, start_idx, bit_i)
-    vb = value_at(tv_swdio, ts)
-    if vb in ('0','1'):
-        return vb
-    if tv_tb_en and tv_tb_val:
-        en = value_at(tv_tb_en, ts)
-        if en == '1':
-            vv = value_at(tv_tb_val, ts)
-            if vv in ('0','1'):
-                return vv
-    return vb
-
-def decode_req_from_mosi(cycles, start_idx, tv_mosi):
-    bits = [value_at(tv_mosi, pos_ts(cycles, start_idx, i)) for i in range(2, 10)]
-    val, ok = bits_lsb_first_to_int(bits)
-    return bits, val, ok
-
-def decode_ack(cycles, start_idx, tv_swdio, tv_tb_en=None, tv_tb_val=None):
-    b0 = target_bit_at(cycles, start_idx, 11, tv_swdio, tv_tb_en, tv_tb_val)
-    b1 = target_bit_at(cycles, start_idx, 12, tv_swdio, tv_tb_en, tv_tb_val)
-    b2 = target_bit_at(cycles, start_idx, 13, tv_swdio, tv_tb_en, tv_tb_val)
-    return [b0,b1,b2], f"{b2}{b1}{b0}"
-
-def infer_rnw(tv_rnw, cycles, start_idx):
-    if not tv_rnw:
-        return None
-    v = value_at(tv_rnw, pos_ts(cycles, start_idx, 0))
-    return v if v in ('0','1') else None
+    return merge_times(*tvs)
 
 # ===== RAW plot =====
-def plot_raw(vcd_path: Path, outdir: Path, lanes):
+def plot_raw(vcd_path: Path, outdir: Path, lanes, renderer="matplotlib"):
     xmin, xmax = collect_time_range([tv for _, tv in lanes])
     outdir.mkdir(parents=True, exist_ok=True)
 
+    if renderer == "raster":
+        out = raw_png_path(outdir, vcd_path)
+        with stage("raster"):
+            render_lanes(out, f"{vcd_path.name} | RAW waveform (semantic lanes)", lanes, xmin, xmax,
+                         Y_LEVELS, TRACK_AMP, TRACK_STEP, xz_colors={V_X: XZ_CLR["x"], V_Z: XZ_CLR["z"]},
+                         xz_min_changes=DECIMATE_CHANGES_PER_COL * RASTER_PLOT_W)
+        print(f"[OK] RAW  {vcd_path.name} -> {out}")
+        return
+
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(14, 0.9 + 0.75 * max(1, len(lanes))), dpi=150)
+    ncols = int(fig.get_figwidth() * fig.dpi)
     yoff = 0.0
     for name, tv in lanes:
         if tv:
-            t, y = tv_to_step_1bit(tv, t_end=xmax)
-            if t:
-                ax.step(t, [yi + yoff for yi in y], where="post", linewidth=LW, clip_on=True)
+            draw_lane(ax, tv, yoff, xmin, xmax, ncols)
         ax.text(-0.01, yoff + TRACK_AMP * 0.5, name,
                 transform=ax.get_yaxis_transform(), ha="right", va="center", fontsize=FONTSZ_LAB)
         ax.hlines(yoff + TRACK_AMP * 0.5, xmin, xmax, linestyles="dotted", linewidth=0.6, color="0.75")
@@ -317,13 +165,25 @@ def plot_raw(vcd_path: Path, outdir: Path, lanes):
     ax.set_title(f"{vcd_path.name} | RAW waveform (semantic lanes)", fontsize=FONTSZ_MAIN)
     ax.set_xlabel("time (VCD timescale units)")
 
-    out = outdir / f"{vcd_path.stem}_RAW.png"
-    plt.tight_layout()
-    plt.savefig(out, bbox_inches="tight")
-    plt.close()
+    out = raw_png_path(outdir, vcd_path)
+    with stage("savefig"):
+        plt.tight_layout()
+        plt.savefig(out, bbox_inches="tight")
+        plt.close()
     print(f"[OK] RAW  {vcd_path.name} -> {out}")
 
 # ===== Frame plot with zones =====
+# (first bit, end bit, label) per frame kind; bit 48 is the negedge closing bit 47
+FRAME_ZONES = dict(
+    read=((0, 2, "PAD"), (2, 10, "REQ"), (10, 11, "TA1"), (11, 14, "ACK"),
+          (14, 46, "DATA"), (46, 47, "PAR"), (47, 48, "TAIL")),
+    write=((0, 2, "PAD"), (2, 10, "REQ"), (10, 11, "TA1"), (11, 14, "ACK"),
+           (14, 15, "TA2"), (15, 47, "DATA"), (47, 48, "PAR")),
+)
+
+def frame_zones(rnw):
+    return FRAME_ZONES["read" if rnw == '1' else "write"]
+
 def shade_zone(ax, cycles, start_idx, b0, b1, label, color):
     x0 = t_edge(cycles, start_idx, b0)
     x1 = t_edge(cycles, start_idx, b1)
@@ -332,75 +192,45 @@ def shade_zone(ax, cycles, start_idx, b0, b1, label, color):
     ax.text(xmid, 0.97, label, transform=ax.get_xaxis_transform(),
             ha="center", va="top", fontsize=FONTSZ_TINY, color="#1f4fbf", zorder=10)
 
-def plot_frame(vcd_path: Path, outdir: Path, lanes, cycles, start_idx,
-               tv_mosi, tv_swdio, tv_rnw=None, tv_tb_en=None, tv_tb_val=None,
-               mode="auto", idx=0):
+def frame_job(frames, fi):
+    """(start_idx, rnw, summary) of one FrameTable row — all plot_frame needs from the decode."""
+    rnw = '1' if frames.rnw[fi] == V_1 else '0'
+    return int(frames.start_idx[fi]), rnw, frames.summary(fi)
+
+def plot_frame(vcd_path: Path, outdir: Path, lanes, cycles, start_idx, rnw, summary, idx=0,
+               renderer="matplotlib"):
     xmin = t_edge(cycles, start_idx, 0)
     xmax = t_edge(cycles, start_idx, 48)
     outdir.mkdir(parents=True, exist_ok=True)
 
-    # Decide RNW
-    if mode == "read":
-        rnw = '1'
-    elif mode == "write":
-        rnw = '0'
-    else:
-        rnw = infer_rnw(tv_rnw, cycles, start_idx) or 'x'
-
-    _, req_val, req_ok = decode_req_from_mosi(cycles, start_idx, tv_mosi)
-    _, ack_str = decode_ack(cycles, start_idx, tv_swdio, tv_tb_en, tv_tb_val)
-    ack_ok = (ack_str == "001")
-
-    if rnw == '1':  # READ
-        data_bits = [target_bit_at(cycles, start_idx, i, tv_swdio, tv_tb_en, tv_tb_val) for i in range(14, 46)]
-        par_bit   = target_bit_at(cycles, start_idx, 46, tv_swdio, tv_tb_en, tv_tb_val)
-        tail_bit  = target_bit_at(cycles, start_idx, 47, tv_swdio, tv_tb_en, tv_tb_val)
-
-        data_val, data_ok = bits_lsb_first_to_int(data_bits)
-        par_ok = (ack_ok and data_ok and par_bit in ('0','1') and int(par_bit) == parity_even_32(data_val))
-
-        data_txt = f"0x{data_val:08X}" if (ack_ok and data_ok) else "—"
-        par_txt  = f"{par_bit}/" + ("OK" if par_ok else ("ERR" if (ack_ok and data_ok and par_bit in ('0','1')) else "?"))
-        verdict  = "READ_OK" if ack_ok else ("READ_WAIT/FAULT" if ack_str in ("010","100") else "READ(?)")
-        tail_txt = f" TAIL={tail_bit}"
-    else:           # WRITE
-        data_bits = [value_at(tv_mosi, pos_ts(cycles, start_idx, i)) for i in range(15, 47)]
-        par_bit   = value_at(tv_mosi, pos_ts(cycles, start_idx, 47))
-
-        data_val, data_ok = bits_lsb_first_to_int(data_bits)
-        par_ok = (ack_ok and data_ok and par_bit in ('0','1') and int(par_bit) == parity_even_32(data_val))
-
-        data_txt = f"0x{data_val:08X}" if (ack_ok and data_ok) else "—"
-        par_txt  = f"{par_bit}/" + ("OK" if par_ok else ("ERR" if (ack_ok and data_ok and par_bit in ('0','1')) else "?"))
-        verdict  = "WRITE_OK" if ack_ok else ("WRITE_WAIT/FAULT" if ack_str in ("010","100") else "WRITE(?)")
-        tail_txt = ""
+    if renderer == "raster":
+        out = frame_png_path(outdir, vcd_path, idx)
+        zones = [(t_edge(cycles, start_idx, b0), t_edge(cycles, start_idx, b1), label, ZONE_CLR[label])
+                 for b0, b1, label in frame_zones(rnw)]
+        with stage("raster"):
+            render_lanes(out, f"{vcd_path.name} | Frame {idx:02d} | RAW + Zones", lanes, xmin, xmax,
+                         Y_LEVELS, TRACK_AMP, TRACK_STEP, zones=zones, summary=summary)
+        print(f"[OK] FRAME {vcd_path.name} -> {out}")
+        return
 
+    plt = pyplot()
     fig, ax = plt.subplots(figsize=(14, 0.9 + 0.75 * max(1, len(lanes))), dpi=150)
 
     yoff = 0.0
     for name, tv in lanes:
         if tv:
-            t, y = tv_to_step_1bit(tv, t_end=xmax)
-            if t:
-                ax.step(t, [yi + yoff for yi in y], where="post", linewidth=LW, clip_on=True)
+            t, y = tv_to_step_1bit(as_signal(tv).window(xmin, xmax), t_end=xmax)
+            if len(t):
+                count("plot_points", len(t))
+                ax.plot(t, y + yoff, linewidth=LW, clip_on=True)
         ax.text(-0.01, yoff + TRACK_AMP * 0.5, name,
                 transform=ax.get_yaxis_transform(), ha="right", va="center", fontsize=FONTSZ_LAB)
         ax.hlines(yoff + TRACK_AMP * 0.5, xmin, xmax, linestyles="dotted", linewidth=0.6, color="0.75")
         yoff += TRACK_STEP
 
     # Zones
-    shade_zone(ax, cycles, start_idx, 0,  2,  "PAD",  ZONE_CLR["PAD"])
-    shade_zone(ax, cycles, start_idx, 2,  10, "REQ",  ZONE_CLR["REQ"])
-    shade_zone(ax, cycles, start_idx, 10, 11, "TA1",  ZONE_CLR["TA1"])
-    shade_zone(ax, cycles, start_idx, 11, 14, "ACK",  ZONE_CLR["ACK"])
-    if rnw == '1':
-        shade_zone(ax, cycles, start_idx, 14, 46, "DATA", ZONE_CLR["DATA"])
-        shade_zone(ax, cycles, start_idx, 46, 47, "PAR",  ZONE_CLR["PAR"])
-        shade_zone(ax, cycles, start_idx, 47, 48, "TAIL", ZONE_CLR["TAIL"])
-    else:
-        shade_zone(ax, cycles, start_idx, 14, 15, "TA2",  ZONE_CLR["TA2"])
-        shade_zone(ax, cycles, start_idx, 15, 47, "DATA", ZONE_CLR["DATA"])
-        shade_zone(ax, cycles, start_idx, 47, 48, "PAR",  ZONE_CLR["PAR"])
+    for b0, b1, label in frame_zones(rnw):
+        shade_zone(ax, cycles, start_idx, b0, b1, label, ZONE_CLR[label])
 
     ax.set_xlim(xmin, xmax)
     ax.set_ylim(-0.2, (TRACK_STEP * (len(lanes) - 1)) + TRACK_AMP + 0.4)
@@ -408,178 +238,637 @@ def plot_frame(vcd_path: Path, outdir: Path, lanes, cycles, start_idx,
     ax.set_title(f"{vcd_path.name} | Frame {idx:02d} | RAW + Zones", fontsize=FONTSZ_MAIN)
     ax.set_xlabel("time (VCD timescale units)")
 
-    req_txt = f"0x{req_val:02X}" if req_ok else "—"
-    summary = f"RNW={rnw} REQ={req_txt} ACK={ack_str} {verdict} DATA={data_txt} PAR={par_txt}{tail_txt}"
     fig.text(0.995, 0.995, summary, ha="right", va="top", fontsize=FONTSZ_LAB,
              bbox=dict(boxstyle="round,pad=0.35", facecolor="white", alpha=0.96, lw=0.8))
 
-    out = outdir / f"{vcd_path.stem}_F{idx:02d}_ZONES.png"
-    plt.tight_layout()
-    plt.savefig(out, bbox_inches="tight")
-    plt.close()
+    out = frame_png_path(outdir, vcd_path, idx)
+    with stage("savefig"):
+        plt.tight_layout()
+        plt.savefig(out, bbox_inches="tight")
+        plt.close()
     print(f"[OK] FRAME {vcd_path.name} -> {out}")
 
-# ===== Frame alignment search (cycle-based) =====
-def frame_score(cycles, start_idx, tv_mosi, tv_swdio, tv_tb_en=None, tv_tb_val=None):
-    score = 0
-    for i in (0, 1):
-        if value_at(tv_mosi, pos_ts(cycles, start_idx, i)) == '0':
-            score += 1
-    bus10 = value_at(tv_swdio, neg_ts(cycles, start_idx, 10))
-    if bus10 == 'z':
-        score += 2
+# ===== Bus statistics histograms (--stats) =====
+def plot_stats(vcd_path: Path, out: Path, hists, renderer="matplotlib"):
+    title = f"{vcd_path.name} | bus statistics"
+    if renderer == "raster":
+        with stage("raster"):
+            render_histograms(out, title, hists)
+        return
+
+    plt = pyplot()
+    fig, axes = plt.subplots(max(1, len(hists)), 1, figsize=(9, 0.6 + 2.2 * max(1, len(hists))), dpi=150,
+                             squeeze=False)
+    for ax, (name, xlabel, counts, edges) in zip(axes[:, 0], hists):
+        ax.bar(edges[:-1], counts, width=np.diff(edges), align="edge", edgecolor="white", linewidth=0.4)
+        ax.set_title(name, fontsize=FONTSZ_LAB)
+        ax.set_xlabel(xlabel, fontsize=FONTSZ_LAB)
+        ax.set_ylabel("count", fontsize=FONTSZ_LAB)
+    fig.suptitle(title, fontsize=FONTSZ_MAIN)
+    with stage("savefig"):
+        plt.tight_layout()
+        plt.savefig(out, bbox_inches="tight")
+        plt.close()
+
+# ===== Tile pyramid + viewer (--tiles) =====
+def plan_tiles(cap, vcd_path: Path, root: Path, args, cache=None):
+    """
+    Manifest, frame zone chunks and index.html of one capture's pyramid (written now,
+    they are small); the tiles themselves become render jobs like the frame PNGs.
+    """
+    lanes = cap.lanes
+    t0, t1 = collect_time_range([tv for _, tv in lanes])
+    t1 = max(t1, t0 + 1)
+    depth = pyramid_depth(cap.pos.size, args.tiles_max_level)
+    tile_h, lane_rows = tile_geometry(len(lanes), Y_LEVELS, TRACK_AMP, TRACK_STEP)
+
+    zones, bits = {}, {}
+    for kind, zs in FRAME_ZONES.items():
+        bits[kind], labels = zone_bounds(zs)
+        zones[kind] = dict(bits=bits[kind], labels=labels)
+    frames = cap.frames if cap.decodable else None
+    chunks = []
+    if frames is not None and len(frames):
+        with stage("tiles_frames"):
+            is_read = frames.rnw == V_1
+            bounds = frame_bounds(cap.pos, cap.neg, frames.start_idx, is_read, bits["read"], bits["write"])
+            chunks = write_frame_chunks(root, bounds, is_read, [frames.summary(i) for i in range(len(frames))])
+    index = write_viewer(root, dict(
+        source=vcd_path.name, t0=int(t0), t1=int(t1), timescale_s=cap.tick_s, depth=depth,
+        tile_w=TILE_W, tile_h=tile_h, lanes=[name for name, _ in lanes], lane_rows=lane_rows,
+        zones=zones, zone_colors=ZONE_CLR, zone_alpha=0.25, min_zone_px=MIN_ZONE_PX,
+        n_frames=len(frames) if frames is not None else 0, frame_chunks=chunks))
+
+    jobs = []
+    for z, lo, hi in tile_chunks(depth):
+        last = tile_path(root, z, hi - 1)
+        fp = (cache.fingerprint(cap.key, cache.render_tag, "tiles", t0, t1, z, lo, hi, *args.lane)
+              if cache else None)
+        jobs.append((z, lo, hi, last, fp, bool(cache and cache.render_fresh(last, fp))))
+    pyr = TilePyramid(root, t0, t1, depth, jobs)
+    print(f"[OK] TILES {vcd_path.name}: levels 0..{depth}, {pyr.n_tiles} tile(s) in {len(jobs)} job(s) -> {index}")
+    return pyr
+
+def tile_job(vcd_path: Path, pyr, lanes_fn, job, cache=None):
+    z, lo, hi, last, fp, fresh = job
+    if fresh:
+        print(f"[SKIP] TILES {vcd_path.name} z{z} {lo}..{hi - 1} (unchanged)")
+        return
+    lanes = lanes_fn()
+    with stage("render_tiles"):
+        render_chunk(pyr.root, lanes, pyr.t0, pyr.t1, z, lo, hi, Y_LEVELS, TRACK_AMP, TRACK_STEP,
+                     xz_colors={V_X: XZ_CLR["x"], V_Z: XZ_CLR["z"]}, xz_min_changes=DECIMATE_CHANGES_PER_COL * TILE_W)
+    print(f"[OK] TILES {vcd_path.name} z{z} {lo}..{hi - 1} -> {pyr.root / f'z{z}'}")
+    if cache:
+        cache.render_done(last, fp)
+
+# ===== Parse cache / render skipping =====
+HERE = Path(__file__).resolve().parent
+PARSE_CODE = ("vcd_stream.py", "fst_stream.py", "vcd_signal.py", "swd_decode.py", "la_dump.py")
+RENDER_CODE = ("vcd_to_png.py", "vcd_decimate.py", "vcd_raster.py", "swd_decode.py", "vcd_bitplane.py",
+               "vcd_signal.py", "vcd_tiles.py")
+
+def open_cache(args):
+    if args.no_cache:
+        return None
+    cache = VcdCache(args.cache, max_bytes=args.cache_max_mb << 20,
+                     code_tag=code_digest(*(HERE / f for f in PARSE_CODE)))
+    cache.render_tag = code_digest(*(HERE / f for f in RENDER_CODE))
+    return cache
+
+def raw_png_path(outdir: Path, vcd_path: Path):
+    return outdir / f"{vcd_path.stem}_RAW.png"
+
+def frame_png_path(outdir: Path, vcd_path: Path, idx):
+    return outdir / f"{vcd_path.stem}_F{idx:02d}_ZONES.png"
+
+# ===== Per-file pipeline =====
+class FileRender:
+    """What the frame stage needs from process_file(): lazy lanes + one job per frame (+ tile jobs)."""
+
+    def __init__(self, vcd_path, lanes_fn, cycles, jobs, tiles=None):
+        self.vcd_path = vcd_path
+        self.lanes_fn = lanes_fn
+        self.cycles = cycles
+        self.jobs = jobs  # [(info, start_idx, rnw, summary, idx, out_png, fingerprint, fresh)]
+        self.tiles = tiles  # TilePyramid with --tiles
+
+    @property
+    def stale(self):
+        return any(not job[-1] for job in self.jobs) or bool(self.tiles and self.tiles.stale)
+
+def print_selection(vcd_path: Path, sel):
+    print(f"[SEL] file={vcd_path.name}")
+    print(f"[SEL]  sck={sel['sck']}")
+    print(f"[SEL]  rst_n={sel['rst_n'] or '(none)'}")
+    print(f"[SEL]  rnw={sel['rnw'] or '(none)'}")
+    print(f"[SEL]  mosi={sel['mosi'] or '(none)'}")
+    print(f"[SEL]  swdio={sel['swdio'] or '(none)'}")
+    print(f"[SEL]  tb_en={sel['tb_en'] or '(none)'}")
+    print(f"[SEL]  tb_val={sel['tb_val'] or '(none)'}")
+    print(f"[SEL]  miso={sel.get('miso') or '(none)'}")
+
+def capture_kwargs(args):
+    return dict(align=args.align, mode=args.mode, max_shift=args.max_shift, min_score=args.min_score,
+                lane_specs=args.lane)
+
+def open_captures(vcd_path: Path, args, explicit, cache=None, parse_cache=None):
+    """
+    Captures to process for one VCD: one per probe instance when the header holds several
+    (all extracted in a single pass, stored in parse_cache, default cache), else the single
+    --map / suffix selection. --map always pins one selection; --la reads sample dumps.
+    """
+    if args.la_format is not None:
+        return [Capture(vcd_path, cache=cache, la=args.la_format, **capture_kwargs(args))]
+    scopes = [] if explicit else probe_scopes(vcd_path)
+    if len(scopes) > 1:
+        print(f"[INFO] {vcd_path.name}: {len(scopes)} probe instances ({', '.join(scopes)})")
+        return Capture.probes(vcd_path, parse_cache or cache, **capture_kwargs(args))
+    return [Capture(vcd_path, explicit, cache, **capture_kwargs(args))]
+
+def process_file(vcd_path: Path, args, explicit, cache=None):
+    """process_capture() for every capture of one VCD, lazily: yields FileRender | None."""
+    for cap in open_captures(vcd_path, args, explicit, cache):
+        yield process_capture(cap, args, cache)
+
+def process_capture(cap, args, cache=None):
+    """
+    Decode one capture (a VCD, or one probe instance of it), render RAW, export frames.
+    Returns a FileRender when frame PNGs or pyramid tiles should follow, else None.
+    """
+    vcd_path = cap.out_path
+    outroot = Path(args.outdir)
+    key, sigs = cap.key, cap.signals
+
+    print_selection(vcd_path, cap.sel)
+    print(f"[INFO] {vcd_path.name}: sck_cycles={cap.pos.size}")
+
+    def lanes():
+        return cap.lanes
+
+    def cycles():
+        return cap.cycles
+
+    # RAW always (unless decode-only)
+    tiles = None
+    if not args.decode_only:
+        out = raw_png_path(outroot / "raw", vcd_path)
+        fp = cache.fingerprint(key, cache.render_tag, "raw", args.renderer, *args.lane) if cache else None
+        if cache and cache.render_fresh(out, fp):
+            print(f"[SKIP] RAW  {vcd_path.name} -> {out} (unchanged)")
+        else:
+            lanes_ = lanes()
+            with stage("render_raw"):
+                plot_raw(vcd_path, outroot / "raw", lanes_, args.renderer)
+            if cache:
+                cache.render_done(out, fp)
+        if args.tiles:
+            with stage("tiles_plan"):
+                tiles = plan_tiles(cap, vcd_path, outroot / "tiles" / vcd_path.stem, args, cache)
+        if args.no_frames:
+            return FileRender(vcd_path, lanes, cycles, [], tiles) if tiles else None
+
+    if not cap.decodable:
+        print(f"[INFO] {vcd_path.name}: insufficient signals/cycles for frame annotation")
+        return FileRender(vcd_path, lanes, cycles, [], tiles) if tiles else None
+
+    cs, frames = cap.samples, cap.frames
+
+    if args.check:
+        with stage("check"):
+            vt = check_capture(cs, frames, sigs["swdio"], sigs["tb_en"], sigs["tb_val"],
+                               min_margin=args.check_margin * 1e-12, tick_s=cap.tick_s)
+        report_violations(vcd_path, vt, outroot / "checks", args.check_show)
+
+    if args.model:
+        with stage("model"):
+            md = compare_capture(sigs)
+        report_model(vcd_path, md, outroot / "checks", args.check_show)
+
+    if args.stats:
+        report_stats(vcd_path, cap.stats, outroot / "stats", None if args.decode_only else args.renderer)
+
+    export = args.export or (["npz"] if args.decode_only else [])
+    if export:
+        with stage("export"):
+            written = export_frames(frames, outroot / "decoded", vcd_path.stem, export,
+                                    source=vcd_path.name, align=args.align, mode=args.mode)
+        for out in written:
+            print(f"[OK] DECODE {vcd_path.name}: {len(frames)} frame(s) -> {out}")
+
+    if args.mode == "auto" and not len(frames):
+        print(f"[INFO] {vcd_path.name}: no frame >=min_score (likely RAW-only capture)")
+        return FileRender(vcd_path, lanes, cycles, [], tiles) if tiles else None
+    if args.decode_only:
+        return None
+
+    jobs = []
+    for i in range(len(frames)):
+        start_idx, rnw, summary = frame_job(frames, i)
+        out = frame_png_path(outroot / "frames", vcd_path, i)
+        fp = (cache.fingerprint(key, cache.render_tag, "frame", start_idx, rnw, summary, i, args.renderer, *args.lane)
+              if cache else None)
+        fresh = bool(cache and cache.render_fresh(out, fp))
+        jobs.append((frame_info(vcd_path, frames, i), start_idx, rnw, summary, i, out, fp, fresh))
+    return FileRender(vcd_path, lanes, cycles, jobs, tiles)
+
+def report_violations(vcd_path: Path, vt, outdir: Path, show=10):
+    """[CHECK] summary per rule, the first `show` rows, full table as CSV."""
+    counts = vt.counts()
+    if not counts:
+        print(f"[CHECK] {vcd_path.name}: {vt.n_cycles} cycle(s) clean")
     else:
-        if tv_tb_en and value_at(tv_tb_en, neg_ts(cycles, start_idx, 10)) == '0':
-            score += 1
-    _, ack_str = decode_ack(cycles, start_idx, tv_swdio, tv_tb_en, tv_tb_val)
-    if ack_str in ("001", "010", "100"):
-        score += 8
-    for bi in (11, 12, 13):
-        b = target_bit_at(cycles, start_idx, bi, tv_swdio, tv_tb_en, tv_tb_val)
-        if b in ('0','1'):
-            score += 1
-    return score, ack_str
-
-def find_best_frames_after_rst(cycles, rst_rises, tv_mosi, tv_swdio, tv_tb_en=None, tv_tb_val=None,
-                              max_shift=32, min_score=8):
-    out = []
-    n = len(cycles)
-    if n < 48:
-        return out
-    for t0 in rst_rises:
-        base = None
-        for i in range(n):
-            if cycles[i][0] > t0:
-                base = i
-                break
-        if base is None:
+        txt = " ".join(f"{rule}={runs}/{cyc}" for rule, (runs, cyc) in counts.items())
+        print(f"[CHECK] {vcd_path.name}: {vt.n_cycles} cycle(s), violations (runs/cycles): {txt}")
+        for i in range(min(show, len(vt))):
+            print(f"[CHECK]   {vt.row_text(i)}")
+    outdir.mkdir(parents=True, exist_ok=True)
+    out = outdir / f"{vcd_path.stem}_violations.csv"
+    vt.write_csv(out)
+    print(f"[OK] CHECK {vcd_path.name}: {len(vt)} row(s) -> {out}")
+
+def report_model(vcd_path: Path, md, outdir: Path, show=10):
+    """[MODEL] mismatch counts per net, the first `show` rows, full table as CSV."""
+    txt = " ".join(f"{net}={n}" for net, n in md.counts().items())
+    verdict = "matches the model" if not len(md) else "MISMATCH"
+    print(f"[MODEL] {vcd_path.name}: {md.n_rows} change time(s), {verdict} ({txt})")
+    for i in range(min(show, len(md))):
+        print(f"[MODEL]   {md.row_text(i)}")
+    outdir.mkdir(parents=True, exist_ok=True)
+    out = outdir / f"{vcd_path.stem}_model.csv"
+    md.write_csv(out)
+    print(f"[OK] MODEL {vcd_path.name}: {len(md)} row(s) -> {out}")
+
+def report_stats(vcd_path: Path, st, outdir: Path, renderer=None):
+    """[STATS] digest, full summary as JSON, histograms as PNG (renderer None = JSON only)."""
+    print(f"[STATS] {vcd_path.name}: {st.text()}")
+    outdir.mkdir(parents=True, exist_ok=True)
+    out = outdir / f"{vcd_path.stem}_stats.json"
+    out.write_text(json.dumps(dict(source=vcd_path.name, **st.summary()), indent=2))
+    print(f"[OK] STATS {vcd_path.name} -> {out}")
+    if renderer is not None:
+        png = outdir / f"{vcd_path.stem}_stats.png"
+        plot_stats(vcd_path, png, st.histograms(), renderer)
+        print(f"[OK] STATS {vcd_path.name} -> {png}")
+
+def frame_info(vcd_path: Path, frames, i, idx=None):
+    return (f"[INFO] {vcd_path.name}: frame#{i if idx is None else idx} score={frames.score[i]} ack={frames.ack_str(i)} "
+            f"start_idx={frames.start_idx[i]} start_t={frames.start_t[i]}")
+
+def render_job(vcd_path: Path, out_fr: Path, lanes_fn, cycles_fn, job, cache=None, renderer="matplotlib"):
+    info, start_idx, rnw, summary, idx, out, fp, fresh = job
+    print(info)
+    if fresh:
+        print(f"[SKIP] FRAME {vcd_path.name} -> {out} (unchanged)")
+        return
+    lanes, cycles = lanes_fn(), cycles_fn()
+    with stage("render_frame"):
+        plot_frame(vcd_path, out_fr, lanes, cycles, start_idx, rnw, summary, idx=idx, renderer=renderer)
+    if cache:
+        cache.render_done(out, fp)
+
+def run_serial(vcds, args, explicit, cache=None):
+    out_fr = Path(args.outdir) / "frames"
+    for vcd_path in vcds:
+        with vcd_profile.file_scope(vcd_path.name):
+            for res in process_file(vcd_path, args, explicit, cache):
+                if res is None:
+                    continue
+                for job in res.jobs:
+                    render_job(res.vcd_path, out_fr, res.lanes_fn, res.cycles, job, cache, args.renderer)
+                for job in res.tiles.jobs if res.tiles else ():
+                    tile_job(res.vcd_path, res.tiles, res.lanes_fn, job, cache)
+
+# ===== Follow mode (--follow) =====
+# A VCD that is still being written (or a FIFO / stdin) is decoded as it grows: frames
+# are printed, exported and rendered batch by batch, on the lanes of the current window
+# only (vcd_follow drops older history). No RAW PNG — the capture is never complete.
+
+def run_follow(args, explicit):
+    src = args.follow
+    vcd_path = Path("stdin.vcd" if src == "-" else Path(src).name)
+    outroot = Path(args.outdir)
+    try:
+        head, body = split_header(tail_chunks(src, timeout=args.follow_timeout, poll=args.follow_poll))
+        dec = FollowDecoder(head, lambda names: select_signals(names, explicit), align=args.align,
+                            mode=args.mode, max_shift=args.max_shift, min_score=args.min_score)
+    except (OSError, ValueError) as e:
+        print_selection(vcd_path, select_signals([], explicit))
+        print(f"[ERR] {vcd_path.name}: {e}")
+        return
+    print_selection(vcd_path, dec.sel)
+    print(f"[INFO] {vcd_path.name}: following {src} (align={dec.align}); RAW PNG skipped", flush=True)
+
+    export = args.export or (["npz"] if args.decode_only else [])
+    writer = FrameWriter(outroot / "decoded", vcd_path.stem, export, source=vcd_path.name,
+                         align=dec.align, mode=args.mode) if export else None
+    render = not (args.decode_only or args.no_frames)
+    for frames, win in dec.run(body):
+        if writer is not None:
+            with stage("export"):
+                writer.append(frames)
+        lanes = cycles = None
+        for i in range(len(frames)):
+            idx = dec.frames_total - len(frames) + i
+            print(frame_info(vcd_path, frames, i, idx))
+            if not render:
+                continue
+            if lanes is None:
+                sigs = {role: win.sigs.get(role) or Signal(name=dec.sel[role]) for role, _ in SIGNAL_ROLES}
+                with stage("lanes"):
+                    lanes = build_lanes((win.pos, win.neg), sigs["sck"], sigs["rst_n"], sigs["rnw"], sigs["mosi"],
+                                        sigs["swdio"], sigs["tb_en"], sigs["tb_val"])
+                    lanes += user_lanes(args.lane, sigs, win.pos, win.neg)
+                cycles = win.cycles()
+            _, rnw, summary = frame_job(frames, i)
+            with stage("render_frame"):
+                plot_frame(vcd_path, outroot / "frames", lanes, cycles, int(win.start_local[i]), rnw, summary,
+                           idx=idx, renderer=args.renderer)
+        sys.stdout.flush()
+
+    if writer is not None:
+        for out in writer.close():
+            print(f"[OK] DECODE {vcd_path.name}: {writer.count} frame(s) -> {out}")
+    print(f"[INFO] {vcd_path.name}: {dec.frames_total} frame(s), sck_cycles={dec.cycles_total}, "
+          f"peak window={dec.peak_window} cycles")
+
+# ===== Process-pool pipeline (--jobs N) =====
+# Stage 1 runs process_file() per VCD and spills lanes + cycle table as .npy files;
+# a VCD with several probe instances is parsed once by its file job, which stores the
+# instances in the parse cache, and each instance then decodes in its own job.
+# Stage 2 renders frames and pyramid tile runs, each worker memory-maps the spill of
+# its capture once.
+# Workers capture their stdout and the parent prints it in file/frame order, so the
+# log reads exactly like a serial run. With --profile each job also returns its stage
+# records, which the parent merges.
+
+def worker_profiler(args):
+    if args.profile is not None and vcd_profile.PROFILER is None:
+        vcd_profile.enable(mem=args.profile_mem)
+    return vcd_profile.PROFILER
+
+def profile_records():
+    p = vcd_profile.PROFILER
+    return p.take() if p is not None else []
+
+def spill_lanes(spill: Path, lanes, cycles):
+    spill.mkdir(parents=True, exist_ok=True)
+    np.save(spill / "cycles.npy", np.asarray(cycles, dtype=np.int64).reshape(-1, 2))
+    for k, (_, tv) in enumerate(lanes):
+        sig = as_signal(tv)
+        np.save(spill / f"lane{k}_t.npy", sig.t)
+        np.save(spill / f"lane{k}_v.npy", sig.v)
+    return [name for name, _ in lanes]
+
+_SPILL_CACHE = {}
+
+def load_spill(spill: Path, lane_names):
+    key = str(spill)
+    if key not in _SPILL_CACHE:
+        cycles = np.load(spill / "cycles.npy", mmap_mode="r")
+        lanes = [(name, Signal(np.load(spill / f"lane{k}_t.npy", mmap_mode="r"),
+                               np.load(spill / f"lane{k}_v.npy", mmap_mode="r"), name))
+                 for k, name in enumerate(lane_names)]
+        _SPILL_CACHE.clear()  # frames arrive grouped by file; keep one file mapped
+        _SPILL_CACHE[key] = (lanes, cycles)
+    return _SPILL_CACHE[key]
+
+def _spill_renders(results, spill_root):
+    renders = []
+    for res in results:
+        if res is None:
             continue
-        best = None
-        for sh in range(0, max_shift):
-            s = base + sh
-            if s + 48 > n:
-                break
-            sc, ack = frame_score(cycles, s, tv_mosi, tv_swdio, tv_tb_en, tv_tb_val)
-            cand = (sc, ack, s)
-            if (best is None) or (cand[0] > best[0]):
-                best = cand
-        if best and best[0] >= min_score:
-            sc, ack, s = best
-            out.append((sc, ack, s, cycles[s][0]))
-    return out
+        spill, lane_names = None, []
+        if res.stale:
+            spill = Path(spill_root) / res.vcd_path.stem
+            lanes = res.lanes_fn()
+            with stage("spill"):
+                lane_names = spill_lanes(spill, lanes, res.cycles())
+        renders.append((res.vcd_path, spill, lane_names, res.jobs, res.tiles))
+    return renders
+
+def _parse_cache(cache, spill_root):
+    """Where a file job leaves its probe instances for the instance jobs (scratch under --no-cache)."""
+    return cache or VcdCache(Path(spill_root) / ".parse")
+
+def _job_file(vcd_path, args, explicit, spill_root):
+    """
+    One VCD. With several probe instances only the shared parse runs here; the instances
+    are returned as (scope, label) for _job_instance, so their decode spreads over workers.
+    """
+    buf = io.StringIO()
+    instances, renders = [], []
+    cache = open_cache(args)
+    worker_profiler(args)
+    with redirect_stdout(buf), vcd_profile.file_scope(vcd_path.name):
+        caps = open_captures(vcd_path, args, explicit, cache, _parse_cache(cache, spill_root))
+        if len(caps) > 1:
+            instances = [(cap.instance, cap.label) for cap in caps]
+        else:
+            renders = _spill_renders([process_capture(caps[0], args, cache)], spill_root)
+    return buf.getvalue(), instances, renders, profile_records()
+
+def _job_instance(vcd_path, args, spill_root, instance):
+    buf = io.StringIO()
+    cache = open_cache(args)
+    worker_profiler(args)
+    scope, label = instance
+    with redirect_stdout(buf), vcd_profile.file_scope(vcd_path.name):
+        cap = Capture(vcd_path, cache=_parse_cache(cache, spill_root), instance=scope, label=label,
+                      **capture_kwargs(args))
+        renders = _spill_renders([process_capture(cap, args, cache)], spill_root)
+    return buf.getvalue(), [], renders, profile_records()
+
+def _job_frame(vcd_path, out_fr, spill, lane_names, job, args):
+    buf = io.StringIO()
+    worker_profiler(args)
+    with redirect_stdout(buf), vcd_profile.file_scope(vcd_path.name):
+        render_job(vcd_path, out_fr, lambda: load_spill(spill, lane_names)[0],
+                   lambda: load_spill(spill, lane_names)[1], job, open_cache(args), args.renderer)
+    return buf.getvalue(), profile_records()
+
+def _job_tiles(vcd_path, spill, lane_names, pyr, job, args):
+    buf = io.StringIO()
+    worker_profiler(args)
+    with redirect_stdout(buf), vcd_profile.file_scope(vcd_path.name):
+        tile_job(vcd_path, pyr, lambda: load_spill(spill, lane_names)[0], job, open_cache(args))
+    return buf.getvalue(), profile_records()
+
+def run_pool(vcds, args, explicit, jobs):
+    out_fr = Path(args.outdir) / "frames"
+    with tempfile.TemporaryDirectory(prefix="vcd_to_png_") as spill_root, \
+         ProcessPoolExecutor(max_workers=jobs) as ex:
+        file_futs = [ex.submit(_job_file, p, args, explicit, spill_root) for p in vcds]
+        units = []  # (future, frame futures) in log order: file, then its probe instances
+        for vcd_path, fut in zip(vcds, file_futs):
+            _, instances, *_ = fut.result()
+            futs = [fut] + [ex.submit(_job_instance, vcd_path, args, spill_root, inst) for inst in instances]
+            for f in futs:
+                _, _, renders, _ = f.result()
+                ffuts = []
+                for out_path, spill, lane_names, fjobs, pyr in renders:
+                    ffuts += [ex.submit(_job_frame, out_path, out_fr, spill, lane_names, job, args) for job in fjobs]
+                    ffuts += [ex.submit(_job_tiles, out_path, spill, lane_names, pyr, job, args)
+                              for job in (pyr.jobs if pyr else ())]
+                units.append((f, ffuts))
+        prof = vcd_profile.PROFILER
+        for fut, ffuts in units:
+            text, *_, records = fut.result()
+            sys.stdout.write(text)
+            if prof is not None:
+                prof.merge(records)
+            for ff in ffuts:
+                text, records = ff.result()
+                sys.stdout.write(text)
+                if prof is not None:
+                    prof.merge(records)
+            sys.stdout.flush()
 
 # ===== Main =====
 def main():
     ap = argparse.ArgumentParser(description="Render RAW VCD waveforms + SWD zone annotation (semantic lanes).")
-    ap.add_argument("--glob", default="*.vcd", help="VCD glob")
+    ap.add_argument("--glob", default="*.vcd", help="VCD glob (FST dumps too, e.g. '*.fst': detected by content)")
     ap.add_argument("--outdir", default="vcd_png", help="output directory root")
     ap.add_argument("--mode", choices=("auto","read","write"), default="auto")
     ap.add_argument("--default", action="store_true",
                     help="use semantic lanes (clk/rst/rnw + host/target drive/sample)")
     ap.add_argument("--map", action="append", default=[],
-                    help="explicit mapping: sck=... swdio=... mosi=... rst_n=... rnw=... tb_en=... tb_val=...")
+                    help="explicit mapping: sck=... swdio=... mosi=... rst_n=... rnw=... tb_en=... tb_val=... "
+                         "(without --map every swd-probe instance found in the VCD is decoded, as <stem>@<inst>)")
+    ap.add_argument("--align", choices=("auto","rst","scan"), default="auto",
+                    help="frame alignment: rst = best start within max_shift after each rst_n rise (never overlapping "
+                         "the previous frame; on a collision the higher score wins), "
+                         "scan = every non-overlapping frame in the capture, auto = rst if rst_n rises exist")
     ap.add_argument("--max_shift", type=int, default=32, help="alignment search shift (cycles)")
     ap.add_argument("--min_score", type=int, default=8, help="minimum score to accept a frame")
+    ap.add_argument("--la", default="", metavar="ROLE=BIT,...",
+                    help="inputs are logic-analyzer sample dumps (raw little-endian sample words, bit k = "
+                         "channel k), not VCDs: channel of each role, e.g. 'sck=0,mosi=1,swdio=2,rst_n=3'; "
+                         "use with --glob '*.bin'")
+    ap.add_argument("--la-rate", dest="la_rate", type=float, default=100e6,
+                    help="with --la: sample rate in samples/s (transition times are converted to ps)")
+    ap.add_argument("--la-unit", dest="la_unit", type=int, choices=UNIT_BYTES, default=1,
+                    help="with --la: bytes per sample word")
+    ap.add_argument("--la-offset", dest="la_offset", type=int, default=0,
+                    help="with --la: header bytes to skip before the first sample")
     ap.add_argument("--no_frames", action="store_true", help="only RAW, skip annotation")
+    ap.add_argument("--renderer", choices=RENDERERS, default="matplotlib",
+                    help="PNG backend: matplotlib, or raster = fixed-layout NumPy drawing + zlib PNG writer "
+                         "(milliseconds per frame, matplotlib is never imported)")
+    ap.add_argument("--lane", action="append", default=[], metavar="NAME=EXPR[@pos|@neg]",
+                    help="extra derived lane over the roles (sck rst_n rnw mosi swdio tb_en tb_val miso) with "
+                         "tri/mux/bit/not_/and_/or_/xor_/resolve/where and V_0/V_1/V_X/V_Z, e.g. "
+                         "'bus=resolve(tri(tb_en, tb_val), mosi)'; @pos/@neg = sample-and-hold at that SCK edge")
+    ap.add_argument("--jobs", type=int, default=1,
+                    help="worker processes for per-file parse/decode and per-frame rendering (1 = serial)")
+    ap.add_argument("--cache", default=".vcd_cache",
+                    help="parse cache directory (content-addressed signals + cycle table, render fingerprints)")
+    ap.add_argument("--cache-max-mb", dest="cache_max_mb", type=int, default=1024,
+                    help="size bound of the parse cache; least-recently-used entries are evicted")
+    ap.add_argument("--no-cache", dest="no_cache", action="store_true",
+                    help="always parse and render from scratch")
+    ap.add_argument("--decode-only", dest="decode_only", action="store_true",
+                    help="decode frames and export them; no lanes, no PNGs, matplotlib is never imported")
+    ap.add_argument("--export", action="append", choices=EXPORT_FORMATS, default=[],
+                    help="write decoded frames to <outdir>/decoded/<stem>_frames.<fmt> (repeatable; "
+                         "--decode-only defaults to npz)")
+    ap.add_argument("--check", action="store_true",
+                    help="check every SCK cycle for X/contention/undriven bits/unreleased turnarounds/edge margins "
+                         "and write <outdir>/checks/<stem>_violations.csv")
+    ap.add_argument("--check-margin", dest="check_margin", type=float, default=1.0, metavar="PS",
+                    help="with --check: smallest accepted SWDIO change distance from a sampling edge "
+                         "in ps, rounded up to whole time units of each capture's timescale (0 = off)")
+    ap.add_argument("--check-show", dest="check_show", type=int, default=10,
+                    help="with --check / --model: violation / mismatch rows printed per file")
+    ap.add_argument("--stats", action="store_true",
+                    help="throughput / bus-efficiency analytics (SCK rate, transfers/s, payload vs. clocks, padding and "
+                         "idle overhead, WAIT retries, frame gaps): <outdir>/stats/<stem>_stats.json + histogram PNG "
+                         "(JSON only with --decode-only)")
+    ap.add_argument("--tiles", action="store_true",
+                    help="zoomable waveform: a multi-resolution pyramid of raster lane tiles (rendered by the --jobs "
+                         "workers) + decoded frame zones and a static viewer, <outdir>/tiles/<stem>/index.html")
+    ap.add_argument("--tiles-max-level", dest="tiles_max_level", type=int, default=MAX_LEVEL,
+                    help="with --tiles: deepest zoom level (2^N tiles); the pyramid stops earlier once a tile "
+                         "spans a few dozen SCK cycles")
+    ap.add_argument("--model", action="store_true",
+                    help="differential check against the Python model of swd-probe.v: predict SWDIO/MISO from the "
+                         "captured inputs at every change and write <outdir>/checks/<stem>_model.csv")
+    ap.add_argument("--follow", default="", metavar="PATH|-",
+                    help="decode a VCD while it is being written (or a FIFO, or '-' for stdin): frames are "
+                         "printed/exported/rendered as soon as they are complete; --glob and --jobs are ignored")
+    ap.add_argument("--follow-timeout", dest="follow_timeout", type=float, default=10.0,
+                    help="with --follow on a regular file: stop after it has not grown for this many seconds")
+    ap.add_argument("--follow-poll", dest="follow_poll", type=float, default=0.2,
+                    help="with --follow: poll interval (s) while waiting for new data")
+    ap.add_argument("--profile", nargs="?", const="", default=None, metavar="OUT.json",
+                    help="time every pipeline stage per file (wall/CPU, call counts, RSS) and print a table; "
+                         "with a path, also write the records as JSON")
+    ap.add_argument("--profile-mem", dest="profile_mem", action="store_true",
+                    help="with --profile: trace peak allocation per stage (tracemalloc, slows Python-heavy stages)")
+    ap.add_argument("--profile-stage", dest="profile_stage", default="",
+                    help="with --profile: run this stage (parse, cycles, lanes, decode, align, render_raw, "
+                         "render_frame, savefig, ...) under cProfile")
+    ap.add_argument("--profile-dump", dest="profile_dump", default="",
+                    help="cProfile output of --profile-stage (default: profile_<stage>.prof)")
     args = ap.parse_args()
 
+    for spec in args.lane:
+        try:
+            LaneSpec(spec, [role for role, _ in SIGNAL_ROLES])
+        except ValueError as e:
+            ap.error(str(e))
+
+    args.la_format = None
+    if args.la:
+        try:
+            args.la_format = LaFormat(parse_channel_map(args.la, [role for role, _ in SIGNAL_ROLES]),
+                                      args.la_rate, args.la_unit, args.la_offset)
+        except ValueError as e:
+            ap.error(str(e))
+        if args.follow:
+            ap.error("--follow reads VCD text; it cannot be combined with --la")
+
+    prof = None
+    if args.profile is not None:
+        if args.profile_stage and args.jobs > 1:
+            print("[WARN] --profile-stage needs a serial run; cProfile disabled with --jobs > 1")
+        prof = vcd_profile.enable(mem=args.profile_mem,
+                                  cprofile_stage=(args.profile_stage if args.jobs <= 1 else None) or None)
+
     explicit = {}
     for m in args.map:
         if "=" in m:
             k, v = m.split("=", 1)
             explicit[k.strip()] = v.strip()
 
-    vcds = sorted(Path(".").glob(args.glob))
-    if not vcds:
-        print("[ERR] no VCD matched")
-        return
-
-    outroot = Path(args.outdir)
-    out_raw = outroot / "raw"
-    out_fr  = outroot / "frames"
-
-    for vcd_path in vcds:
-        v = VCDVCD(str(vcd_path), store_tvs=True)
-        ref_to_tv = build_ref_to_tv(v)
-
-        sck_name   = explicit.get("sck")   or pick_by_suffix(ref_to_tv, ".sck")
-        rst_name   = explicit.get("rst_n") or pick_by_suffix(ref_to_tv, ".rst_n")
-        rnw_name   = explicit.get("rnw")   or pick_by_suffix(ref_to_tv, ".rnw")
-        mosi_name  = explicit.get("mosi")  or pick_by_suffix(ref_to_tv, ".mosi")
-        swdio_name = explicit.get("swdio") or pick_by_suffix(ref_to_tv, ".swdio")
-        tb_en_name = explicit.get("tb_en") or pick_by_suffix(ref_to_tv, ".tb_swdio_en")
-        tb_val_name= explicit.get("tb_val")or pick_by_suffix(ref_to_tv, ".tb_swdio_val")
-
-        print(f"[SEL] file={vcd_path.name}")
-        print(f"[SEL]  sck={sck_name}")
-        print(f"[SEL]  rst_n={rst_name or '(none)'}")
-        print(f"[SEL]  rnw={rnw_name or '(none)'}")
-        print(f"[SEL]  mosi={mosi_name or '(none)'}")
-        print(f"[SEL]  swdio={swdio_name or '(none)'}")
-        print(f"[SEL]  tb_en={tb_en_name or '(none)'}")
-        print(f"[SEL]  tb_val={tb_val_name or '(none)'}")
-
-        tv_sck   = ref_to_tv.get(sck_name, []) if sck_name else []
-        tv_rst   = ref_to_tv.get(rst_name, []) if rst_name else []
-        tv_rnw   = ref_to_tv.get(rnw_name, []) if rnw_name else []
-        tv_mosi  = ref_to_tv.get(mosi_name, []) if mosi_name else []
-        tv_swdio = ref_to_tv.get(swdio_name, []) if swdio_name else []
-        tv_tb_en = ref_to_tv.get(tb_en_name, []) if tb_en_name else []
-        tv_tb_val= ref_to_tv.get(tb_val_name, []) if tb_val_name else []
-
-        cycles = build_sck_cycles(tv_sck) if tv_sck else []
-        print(f"[INFO] {vcd_path.name}: sck_cycles={len(cycles)}")
-
-        # --- build semantic lanes ---
-        lanes = []
-        lanes.append(("clk (SCK)", tv_sck))
-        lanes.append(("rst_n", tv_rst))
-        lanes.append(("rnw (1=READ)", tv_rnw))
-
-        host_drive = derive_host_drive_on_wire_tv(tv_mosi, tv_swdio, tv_tb_en if tv_tb_en else None)
-        host_samp  = derive_sample_hold_tv_from_cycles(cycles, tv_swdio, edge="pos") if cycles else []
-        tgt_drive  = derive_target_drive_tv(tv_tb_en, tv_tb_val) if (tv_tb_en and tv_tb_val) else []
-        tgt_samp   = derive_sample_hold_tv_from_cycles(cycles, tv_swdio, edge="neg") if cycles else []
-
-        lanes.append(("host_drive (to SWDIO)", host_drive))
-        lanes.append(("host_sample (SWDIO @posedge)", host_samp))
-        lanes.append(("target_drive (TB)", tgt_drive))
-        lanes.append(("target_sample (SWDIO @negedge)", tgt_samp))
-
-        # RAW always
-        plot_raw(vcd_path, out_raw, lanes)
-
-        if args.no_frames:
-            continue
-
-        if not (tv_sck and tv_mosi and tv_swdio and cycles and len(cycles) >= 48):
-            print(f"[INFO] {vcd_path.name}: insufficient signals/cycles for frame annotation")
-            continue
-
-        rst_rises = rise_edges(tv_rst) if tv_rst else []
-        if not rst_rises:
-            rst_rises = [-1]  # allow scan from start (special likely won't score)
-
-        best = find_best_frames_after_rst(
-            cycles, rst_rises, tv_mosi, tv_swdio,
-            tv_tb_en if tv_tb_en else None,
-            tv_tb_val if tv_tb_val else None,
-            max_shift=args.max_shift, min_score=args.min_score
-        )
-
-        if args.mode == "auto" and not best:
-            print(f"[INFO] {vcd_path.name}: no frame >=min_score (likely RAW-only capture)")
-            continue
+    if args.follow:
+        with vcd_profile.file_scope(Path(args.follow).name if args.follow != "-" else "stdin.vcd"):
+            run_follow(args, explicit)
+    else:
+        vcds = sorted(Path(".").glob(args.glob))
+        if not vcds:
+            print("[ERR] no VCD matched")
+            return
 
-        for i, (sc, ack, start_idx, start_time) in enumerate(best):
-            print(f"[INFO] {vcd_path.name}: frame#{i} score={sc} ack={ack} start_idx={start_idx} start_t={start_time}")
-            plot_frame(
-                vcd_path, out_fr, lanes, cycles, start_idx,
-                tv_mosi=tv_mosi, tv_swdio=tv_swdio, tv_rnw=tv_rnw,
-                tv_tb_en=(tv_tb_en if tv_tb_en else None),
-                tv_tb_val=(tv_tb_val if tv_tb_val else None),
-                mode=args.mode, idx=i
-            )
+        if args.jobs > 1:
+            run_pool(vcds, args, explicit, args.jobs)
+        else:
+            run_serial(vcds, args, explicit, open_cache(args))
+
+    if not args.no_cache:
+        removed, total = open_cache(args).evict()
+        if removed:
+            print(f"[CACHE] evicted {removed} entr{'y' if removed == 1 else 'ies'}, {total >> 20} MiB kept")
+
+    if prof is not None:
+        print("[PROFILE]")
+        print(prof.table())
+        if args.profile:
+            prof.write_json(args.profile, argv=sys.argv[1:], jobs=args.jobs, mem=args.profile_mem)
+            print(f"[OK] PROFILE -> {args.profile}")
+        dump = args.profile_dump or f"profile_{args.profile_stage}.prof"
+        if args.profile_stage and prof.dump_cprofile(dump):
+            print(f"[OK] CPROFILE {args.profile_stage} -> {dump}  (python -m pstats {dump})")
 
 if __name__ == "__main__":
     main()